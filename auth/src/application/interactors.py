@@ -89,6 +89,7 @@ class ConfirmSignupInteractor:
     async def __call__(self, user_uuid: str) -> TokenDM:
         await self._cache_gateway.cancel_shedule_user_deletion(user_uuid)
         user_dm = await self._cache_gateway.load_user(user_uuid=user_uuid)
+        user_dm.is_active = True
         await self._cache_gateway.delete_user(user_uuid=user_uuid)
         new_user_dm = await self._signup_gateway.signup(user_dm)
         await self._db_session.commit()
@@ -56,7 +56,7 @@ class RevokeTokensDM:
 @dataclass(slots=True)
 class DeleteUserTaskDM(BaseDM):
     user_uuid: str
-    delay: int
+    delay: int = field(default=1800)
 
 
 @dataclass(slots=True)
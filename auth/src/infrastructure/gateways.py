@@ -1,5 +1,6 @@
 import json
 from datetime import timedelta, datetime, timezone
+from hashlib import sha256
 from typing import Optional, Dict, Any
 
 from jose import JWTError, jwt
@@ -18,6 +19,7 @@ from auth.src.application.interfaces import (
 )
 from auth.src.config import SecurityConfig
 from auth.src.domain.entities import (
+    DeleteUserTaskDM,
     GetUserDM,
     RevokeTokenDM,
     RevokeTokensDM, 
@@ -28,6 +30,11 @@ from auth.src.domain.entities import (
 )
 
 
+DELETION_SCHEDULE_KEY = "schedule:delete_rotten_user"
+# Chats closes the sockets opened with a revoked access token
+REVOCATION_CHANNEL = "auth:revoked"
+
+
 class AuthGateway(Auth):
     def __init__(self,config: SecurityConfig) -> None:
         self._config = config
@@ -138,7 +145,7 @@ class CrudsGateway(Cruds):
         return
 
 
-class CacheGateway(RedisService):
+class CacheGateway(RedisService, DeleteUserTask):
     def __init__(self, redis_client: Redis) -> None:
         self._redis_client = redis_client
 
@@ -157,8 +164,12 @@ class CacheGateway(RedisService):
     async def delete_user(self, user_uuid: str) -> None:
         await self._redis_client.delete(f'user_{user_uuid}')
 
+    async def schedule_user_deletion(self, params: DeleteUserTaskDM) -> None:
+        due = datetime.now(timezone.utc).timestamp() + params.delay
+        await self._redis_client.zadd(DELETION_SCHEDULE_KEY, {params.user_uuid: due})
+
     async def cancel_shedule_user_deletion(self, user_uuid: str) -> None:
-        await self._redis_client.set(f"task:{user_uuid}:cancelled", "true", ex=1800)
+        await self._redis_client.zrem(DELETION_SCHEDULE_KEY, user_uuid)
 
     async def _save_revoked_token(
         self, 
@@ -173,13 +184,18 @@ class CacheGateway(RedisService):
             value="revoked",
             ex=ttl
         )
+        if token_type == "access":
+            await self._redis_client.publish(
+                REVOCATION_CHANNEL,
+                sha256(token.encode()).hexdigest()
+            )
 
     async def save_revoked_tokens(self, params: RevokeTokensDM) -> bool:
         now = datetime.now(timezone.utc).timestamp()
         tokens = [params.access_token, params.refresh_token]
         exps = [params.access_exp, params.refresh_exp]
         token_types = ["access", "refresh"]
-        async for token, exp, token_type in zip(tokens, exps, token_types):
+        for token, exp, token_type in zip(tokens, exps, token_types):
             await self._save_revoked_token(token, exp, now, token_type)
         return True
 
@@ -190,23 +206,13 @@ class CacheGateway(RedisService):
         return revoked is not None
 
 
-class TasksGateway(DeleteUserTask, SendConfirmationEmail):
+class TasksGateway(SendConfirmationEmail):
     def __init__(
         self, 
         rabbitmq_broker: RabbitBroker,
     ) -> None:
         self._broker = rabbitmq_broker
 
-    async def schedule_user_deletion(self, user_uuid: str) -> None:
-        async with self._broker as broker:
-            await broker.publish(
-                RabbitMessage(
-                    body={"user_uuid": user_uuid},
-                ),
-                exchange="delayed_delete_exchange",
-                routing_key="delete_user_route"
-            )
-
     async def send_confirmation_email(self, params: SendConfirmEmailDM) -> None:
         async with self._broker as broker:
             await broker.publish(
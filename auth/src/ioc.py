@@ -88,13 +88,13 @@ class AppProvider(Provider):
     cache_gateway = provide(
         CacheGateway,
         scope=Scope.REQUEST,
-        provides=interfaces.RedisService
+        provides=AnyOf[interfaces.RedisService, interfaces.DeleteUserTask]
     )
 
     tasks_gateway = provide(
         TasksGateway,
         scope=Scope.REQUEST,
-        provides=AnyOf[interfaces.DeleteUserTask, interfaces.SendConfirmationEmail]
+        provides=interfaces.SendConfirmationEmail
     )
 
     signup_interactor = provide(SignupInteractor, scope=Scope.REQUEST)
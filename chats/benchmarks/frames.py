@@ -0,0 +1,104 @@
+"""
+Encode/decode cost and wire size of chat frames, binary codec against JSON.
+
+Runs both codecs of `chats.src.infrasructure.protocol` over `message` push
+frames and `send` client frames with message bodies of several sizes, and
+reports operations per second and bytes on the wire. The `json+deflate`
+size is what per-message deflate on the socket would send for the JSON
+frame without context takeover.
+
+    python -m chats.benchmarks.frames --sizes 32 256 4096 --seconds 1
+"""
+import argparse
+import random
+import zlib
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+from uuid import uuid4
+
+from chats.src.infrasructure.protocol import BinaryFrameCodec, JsonFrameCodec
+
+
+WORDS = "квартира цена просмотр метро ремонт договор залог этаж балкон кухня district price".split()
+
+
+def _text(size: int) -> str:
+    words: List[str] = []
+    while sum(len(word) + 1 for word in words) < size:
+        words.append(random.choice(WORDS))
+    return " ".join(words)[:size]
+
+
+def _message_frame(size: int) -> Dict[str, Any]:
+    return {
+        "type": "message",
+        "message": {
+            "uuid": str(uuid4()),
+            "chat_uuid": str(uuid4()),
+            "sender_type": "user",
+            "sender_uuid": str(uuid4()),
+            "recipient_type": "user",
+            "recipient_uuid": str(uuid4()),
+            "message": _text(size),
+            "timestamp": datetime.now(),
+            "is_edited": False,
+            "edited_at": None,
+        },
+    }
+
+
+def _send_frame(size: int) -> Dict[str, Any]:
+    return {
+        "type": "send",
+        "id": "c-1842",
+        "chat_uuid": str(uuid4()),
+        "recipient_uuid": str(uuid4()),
+        "recipient_type": "user",
+        "content": _text(size),
+    }
+
+
+def _rate(operation: Callable[[], Any], seconds: float) -> float:
+    count, started = 0, perf_counter()
+    deadline = started + seconds
+    while perf_counter() < deadline:
+        for _ in range(100):
+            operation()
+        count += 100
+    return count / (perf_counter() - started)
+
+
+def _deflated(data: bytes) -> int:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return len(compressor.compress(data) + compressor.flush())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 256, 2048, 16384])
+    parser.add_argument("--threshold", type=int, default=1024)
+    parser.add_argument("--seconds", type=float, default=0.5)
+    args = parser.parse_args()
+    codecs = {"json": JsonFrameCodec(), "binary": BinaryFrameCodec(args.threshold)}
+    print(
+        f"{'frame':<8} {'size':>6} {'codec':<7} {'encode/s':>10} {'decode/s':>10} "
+        f"{'bytes':>7} {'json+deflate':>13}"
+    )
+    for name, build in (("message", _message_frame), ("send", _send_frame)):
+        for size in args.sizes:
+            frame = build(size)
+            for codec_name, codec in codecs.items():
+                data = codec.encode(frame)
+                encode = _rate(lambda: codec.encode(frame), args.seconds)
+                decode = _rate(lambda: codec.decode(data), args.seconds)
+                wire = len(data.encode() if isinstance(data, str) else data)
+                deflated = _deflated(data.encode()) if isinstance(data, str) else ""
+                print(
+                    f"{name:<8} {size:>6} {codec_name:<7} {encode:>10.0f} {decode:>10.0f} "
+                    f"{wire:>7} {deflated:>13}"
+                )
+
+
+if __name__ == "__main__":
+    main()
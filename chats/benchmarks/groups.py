@@ -0,0 +1,196 @@
+"""
+Delivery cost of group messages, fan-out on write against fan-out on read.
+
+For every group size of --sizes, spreads the members over --nodes chats
+nodes on the configured Redis; --online of them hold a socket, whose
+writes are only recorded, and --following of those follow the chat. Each
+of --messages messages is then delivered both ways: through
+`MessageFanout.notify` to every member but the sender, which appends to
+each inbox and pushes to every online socket, and through
+`PresenceService.notify_chat`, which publishes once on the chat channel and
+reaches the followers only. Reports the latency until the last expected
+socket write, the Redis commands and socket writes per message, and how
+many members are left to catch up through the seq sync.
+
+    python -m chats.benchmarks.groups --sizes 10 1000 50000 --messages 20
+
+Connection settings come from the usual REDIS_* variables.
+"""
+import argparse
+import asyncio
+import logging
+import random
+from datetime import datetime
+from os import environ as env
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List
+from uuid import NAMESPACE_URL, uuid4, uuid5
+
+from redis.asyncio import Redis
+
+from chats.src.config import (
+    FanoutConfig, InboxConfig, PresenceConfig, RedisConfig, SendQueueConfig
+)
+from chats.src.domain.entities import MessageDM, MessageEventDM, UserDM
+from chats.src.infrasructure.cache import new_redis_client
+from chats.src.infrasructure.fanout import MessageFanout
+from chats.src.infrasructure.hub import ClientConnection, ConnectionHub
+from chats.src.infrasructure.inbox import INBOX_KEY, RedisInbox
+from chats.src.infrasructure.metrics import SocketMetrics
+from chats.src.infrasructure.presence import PresenceService
+from chats.src.infrasructure.protocol import JsonFrameCodec
+
+
+class _Sink:
+    """Stands in for a socket and counts what would have been written."""
+
+    writes = 0
+
+    async def send_text(self, data: str) -> None:
+        _Sink.writes += 1
+
+    async def send_bytes(self, data: bytes) -> None:
+        _Sink.writes += 1
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        pass
+
+
+def _uuids(kind: str, count: int) -> List[str]:
+    return [str(uuid5(NAMESPACE_URL, f"nedviga-bench/{kind}/{i}")) for i in range(count)]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+def _event(chat_uuid: str, sender_uuid: str, seq: int) -> MessageEventDM:
+    return MessageEventDM(event="message", message=MessageDM(
+        uuid=str(uuid4()),
+        chat_uuid=chat_uuid,
+        sender_type="user",
+        sender_uuid=sender_uuid,
+        recipient_type="group",
+        recipient_uuid=chat_uuid,
+        message="новое объявление в группе",
+        timestamp=datetime.utcnow(),
+        is_edited=False,
+        edited_at=None,
+        seq=seq
+    ))
+
+
+async def _commands(redis_client: Redis) -> int:
+    stats = await redis_client.info("commandstats")
+    return sum(entry["calls"] for entry in stats.values())
+
+
+async def _measure(
+    redis_client: Redis,
+    deliver: Callable[[int], Awaitable[None]],
+    expected: int,
+    messages: int,
+    timeout: float,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    writes, commands = _Sink.writes, await _commands(redis_client)
+    for seq in range(messages):
+        target = _Sink.writes + expected
+        started = perf_counter()
+        await deliver(seq)
+        while _Sink.writes < target and perf_counter() - started < timeout:
+            await asyncio.sleep(0.0005)
+        latencies.append(perf_counter() - started)
+    # The INFO calls themselves are not counted.
+    commands = await _commands(redis_client) - commands - 1
+    return {
+        "p50": _percentile(latencies, 50),
+        "p99": _percentile(latencies, 99),
+        "commands": commands / messages,
+        "writes": (_Sink.writes - writes) / messages,
+    }
+
+
+async def run_size(args: argparse.Namespace, redis_client: Redis, size: int) -> None:
+    logger = logging.getLogger("groups-bench")
+    fanout_config, inbox_config = FanoutConfig(**env), InboxConfig(**env)
+    presence_config = PresenceConfig(**{**env, "CHATS_PRESENCE_STATS_INTERVAL": "3600"})
+    queue_config = SendQueueConfig(**{**env, "CHATS_WS_QUEUE_SIZE": str(args.messages * 2 + 16)})
+    codec, metrics = JsonFrameCodec(), SocketMetrics()
+    chat_uuid = _uuids(f"group-{size}", 1)[0]
+    members = _uuids(f"group-{size}/member", size)
+    sender, recipients = members[0], members[1:]
+    online = random.sample(recipients, int(len(recipients) * args.online))
+    following = random.sample(online, int(len(online) * args.following))
+    nodes = []
+    for _ in range(args.nodes):
+        hub = ConnectionHub(logger)
+        inbox = RedisInbox(redis_client, inbox_config, logger)
+        fanout = MessageFanout(hub, inbox, redis_client, fanout_config, logger)
+        presence = PresenceService(hub, redis_client, presence_config, logger)
+        await fanout.start()
+        await presence.start()
+        nodes.append((hub, fanout, presence))
+    followers = set(following)
+    for i, user_uuid in enumerate(online):
+        hub, fanout, presence = nodes[i % args.nodes]
+        connection = ClientConnection(
+            UserDM(uuid=user_uuid, user_type="user"), _Sink(), "bench", codec, queue_config, metrics
+        )
+        hub.register(connection)
+        await fanout.attach(user_uuid)
+        if user_uuid in followers:
+            await presence.subscribe(connection, chat_uuid)
+    await asyncio.sleep(0.1)
+    _, fanout, presence = nodes[0]
+
+    async def on_write(seq: int) -> None:
+        await fanout.notify(recipients, _event(chat_uuid, sender, seq))
+
+    async def on_read(seq: int) -> None:
+        await presence.notify_chat(chat_uuid, _event(chat_uuid, sender, seq))
+
+    for name, deliver, expected, behind in (
+        ("fan-out on write", on_write, len(online), 0),
+        ("fan-out on read", on_read, len(following), len(recipients) - len(following)),
+    ):
+        result = await _measure(redis_client, deliver, expected, args.messages, args.timeout)
+        print(
+            f"{size:>7} members  {name:<17} "
+            f"p50 {result['p50'] * 1000:8.2f}  p99 {result['p99'] * 1000:8.2f} ms  "
+            f"redis {result['commands']:>9.1f}/msg  "
+            f"writes {result['writes']:>7.1f}/msg  "
+            f"to sync {behind:>6}"
+        )
+    for hub, fanout, presence in nodes:
+        await presence.stop()
+        await fanout.stop()
+        await hub.close()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for user_uuid in recipients:
+            pipe.delete(INBOX_KEY.format(user_uuid=user_uuid))
+        await pipe.execute()
+
+
+async def run(args: argparse.Namespace) -> None:
+    redis_client = new_redis_client(RedisConfig(**env))
+    for size in args.sizes:
+        await run_size(args, redis_client, size)
+    await redis_client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50000])
+    parser.add_argument("--nodes", type=int, default=2)
+    parser.add_argument("--online", type=float, default=0.2)
+    parser.add_argument("--following", type=float, default=0.1)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,468 @@
+"""
+Socket capacity and end-to-end message latency of a chats node.
+
+Starts a stand-in for the auth service that accepts `bench.<user uuid>`
+tokens, seeds --connections / 2 direct chats and launches a chats node
+(`python -m chats.src.main`) pointed at the stand-in, unless --url names
+a running one. That node has to be started with the AUTH_URL printed for
+--auth-port, which --url requires; sockets the node closes with 4001 (the
+token was refused) stop the run. Opens --connections sockets to `/chat/ws`, one per user,
+then has random members of the chats send --rate messages per second for
+--seconds to their partner. Reports the connect rate and latency, the
+resident memory the node gained per socket, the node's CPU while sending,
+and percentiles of the ack latency (sender) and of the delivery latency
+(recipient socket). Memory and CPU come from /proc, for the spawned node
+or for the process given by --pid.
+
+    python -m chats.benchmarks.load --connections 5000 --rate 500 --seconds 30
+
+Runs only against Postgres and Redis on this host (the usual POSTGRES_*
+and REDIS_* variables) with migrations applied. Messages are stored with
+sender_type 'bench' and removed with the seeded chats afterwards, unless
+--keep is passed.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import resource
+import signal
+import statistics
+import sys
+from dataclasses import dataclass, field
+from time import perf_counter, process_time, time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from uuid import NAMESPACE_URL, uuid5
+
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _uuids(kind: str, count: int) -> List[str]:
+    return [str(uuid5(NAMESPACE_URL, f"nedviga-bench/{kind}/{i}")) for i in range(count)]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+def _is_local(host: str) -> bool:
+    # A path is a unix socket of this host.
+    return host in LOCAL_HOSTS or host.startswith("/")
+
+
+def _rss(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as stat:
+        # The command name may contain spaces; fields resume after ')'.
+        fields = stat.read().rpartition(")")[2].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+class AuthStandIn:
+    """Answers the node's token checks the way the auth service does."""
+
+    def __init__(self, ttl: int) -> None:
+        self._ttl = ttl
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.requests = 0
+
+    async def start(self, port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", port)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/verify"
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n")[1:]:
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                body = json.loads(await reader.readexactly(length) or b"{}")
+                prefix, _, user_uuid = str(body.get("token", "")).partition(".")
+                if prefix == "bench" and user_uuid:
+                    status = "200 OK"
+                    payload = {"uuid": user_uuid, "role": "bench", "exp": time() + self._ttl}
+                else:
+                    status, payload = "401 Unauthorized", {"detail": "invalid token"}
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                self.requests += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class _Socket:
+    """Just enough of RFC 6455 for JSON text frames, without extensions."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+        self.close_code: Optional[int] = None
+
+    @classmethod
+    async def connect(cls, host: str, port: int, path: str) -> "_Socket":
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        if not head.startswith(b"HTTP/1.1 101"):
+            writer.close()
+            raise ConnectionError(head.split(b"\r\n")[0].decode())
+        return cls(reader, writer)
+
+    async def send(self, text: str) -> None:
+        self._write(0x1, text.encode())
+        await self._writer.drain()
+
+    async def receive(self) -> Optional[str]:
+        chunks: List[bytes] = []
+        while True:
+            first, second = await self._reader.readexactly(2)
+            opcode, length = first & 0x0F, second & 0x7F
+            if length == 126:
+                length = int.from_bytes(await self._reader.readexactly(2), "big")
+            elif length == 127:
+                length = int.from_bytes(await self._reader.readexactly(8), "big")
+            payload = await self._reader.readexactly(length)
+            if opcode == 0x8:
+                if len(payload) >= 2:
+                    self.close_code = int.from_bytes(payload[:2], "big")
+                return None
+            if opcode == 0x9:
+                self._write(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            chunks.append(payload)
+            if first & 0x80:
+                return b"".join(chunks).decode()
+
+    async def close(self) -> None:
+        try:
+            self._write(0x8, (1000).to_bytes(2, "big"))
+            await self._writer.drain()
+        except ConnectionError:
+            pass
+        self._writer.close()
+
+    def _write(self, opcode: int, payload: bytes) -> None:
+        # Client frames are always masked.
+        length = len(payload)
+        if length < 126:
+            header = bytes([0x80 | opcode, 0x80 | length])
+        elif length < 1 << 16:
+            header = bytes([0x80 | opcode, 0x80 | 126]) + length.to_bytes(2, "big")
+        else:
+            header = bytes([0x80 | opcode, 0x80 | 127]) + length.to_bytes(8, "big")
+        mask = os.urandom(4)
+        key = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+        self._writer.write(header + mask + masked)
+
+
+@dataclass
+class _Results:
+    connect: List[float] = field(default_factory=list)
+    connect_failures: int = 0
+    rejected: int = 0
+    sent: Dict[str, float] = field(default_factory=dict)
+    acks: List[float] = field(default_factory=list)
+    errors: int = 0
+    deliveries: List[float] = field(default_factory=list)
+
+
+def _receive(results: _Results, frame: dict) -> None:
+    now = perf_counter()
+    kind = frame.get("type")
+    if kind == "batch":
+        for inner in frame["frames"]:
+            _receive(results, inner)
+    elif kind == "ack" and frame.get("id") in results.sent:
+        results.acks.append(now - results.sent[frame["id"]])
+    elif kind == "error":
+        results.errors += 1
+    elif kind == "message":
+        content = frame["message"]["message"]
+        if content.startswith("load:") and (sent := results.sent.get(content[5:])) is not None:
+            results.deliveries.append(now - sent)
+
+
+async def _read(socket: _Socket, results: _Results) -> None:
+    try:
+        while (data := await socket.receive()) is not None:
+            _receive(results, json.loads(data))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    # The node accepts the upgrade before it checks the token.
+    if socket.close_code == 4001:
+        results.rejected += 1
+
+
+async def _seed(chats: List[str]) -> None:
+    from sqlalchemy import text
+
+    from chats.src.config import PostgresConfig
+    from chats.src.infrasructure.database import new_session_maker
+
+    session_maker = new_session_maker(PostgresConfig(**os.environ))
+    async with session_maker() as session:
+        await session.execute(
+            text("""
+                INSERT INTO chats (uuid, created_at)
+                SELECT chat_uuid, localtimestamp FROM unnest(CAST(:chats AS uuid[])) AS chat_uuid
+                ON CONFLICT DO NOTHING
+            """),
+            {"chats": chats}
+        )
+        await session.commit()
+    await session_maker.kw["bind"].dispose()
+
+
+async def _cleanup(chats: List[str], users: List[str]) -> None:
+    from sqlalchemy import text
+
+    from chats.src.config import PostgresConfig, RedisConfig
+    from chats.src.infrasructure.cache import new_redis_client
+    from chats.src.infrasructure.database import new_session_maker
+    from chats.src.infrasructure.inbox import INBOX_KEY
+    from chats.src.infrasructure.members import CHAT_INFO_KEY
+    from chats.src.infrasructure.recent import RECENT_KEY, RECENT_MARKER_KEY
+
+    session_maker = new_session_maker(PostgresConfig(**os.environ))
+    async with session_maker() as session:
+        result = await session.execute(
+            text("""
+                DELETE FROM messages
+                WHERE chat_uuid = ANY(CAST(:chats AS uuid[])) AND sender_type = 'bench'
+            """),
+            {"chats": chats}
+        )
+        await session.execute(
+            text("DELETE FROM chats WHERE uuid = ANY(CAST(:chats AS uuid[]))"),
+            {"chats": chats}
+        )
+        await session.commit()
+    await session_maker.kw["bind"].dispose()
+    redis_client = new_redis_client(RedisConfig(**os.environ))
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for user_uuid in users:
+            pipe.delete(INBOX_KEY.format(user_uuid=user_uuid))
+        for chat_uuid in chats:
+            pipe.delete(
+                RECENT_KEY.format(chat_uuid=chat_uuid),
+                RECENT_MARKER_KEY.format(chat_uuid=chat_uuid),
+                CHAT_INFO_KEY.format(chat_uuid=chat_uuid)
+            )
+        await pipe.execute()
+    await redis_client.aclose()
+    print(f"removed {result.rowcount} messages and {len(chats)} chats")
+
+
+async def _start_node(auth_url: str, port: int) -> asyncio.subprocess.Process:
+    node = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "chats.src.main",
+        env={
+            **os.environ,
+            "AUTH_URL": auth_url,
+            "CHATS_HOST": "127.0.0.1",
+            "CHATS_PORT": str(port),
+            "CHATS_LOG_LEVEL": "WARNING",
+        }
+    )
+    started = perf_counter()
+    while perf_counter() - started < 30:
+        if node.returncode is not None:
+            raise SystemExit(f"chats node exited with code {node.returncode}")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return node
+        except OSError:
+            await asyncio.sleep(0.2)
+    node.terminate()
+    raise SystemExit("chats node did not start listening within 30s")
+
+
+async def run(args: argparse.Namespace) -> None:
+    for name in ("POSTGRES_HOST", "REDIS_HOST"):
+        if not _is_local(os.environ.get(name, "")):
+            raise SystemExit(f"{name} must point to this host, got {os.environ.get(name)!r}")
+    if args.url:
+        url = urlsplit(args.url)
+        if not _is_local(url.hostname or ""):
+            raise SystemExit("--url must point to this host")
+        if args.auth_port is None:
+            raise SystemExit("--url needs --auth-port: the node must verify tokens against this tool")
+    # Every socket is a descriptor here and on the spawned node, which
+    # inherits the limit.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.connections + 100 > hard:
+        print(f"warning: open file limit {hard} is below --connections")
+
+    users = _uuids("load-user", args.connections - args.connections % 2)
+    chats = _uuids("load-chat", len(users) // 2)
+    peers: List[Tuple[str, str, str]] = []
+    for i, chat_uuid in enumerate(chats):
+        peers += [(users[2 * i], users[2 * i + 1], chat_uuid), (users[2 * i + 1], users[2 * i], chat_uuid)]
+
+    auth = AuthStandIn(args.token_ttl)
+    auth_url = await auth.start(args.auth_port or 0)
+    print(f"{'auth stand-in':<28} AUTH_URL={auth_url}")
+    node: Optional[asyncio.subprocess.Process] = None
+    results = _Results()
+    sockets: Dict[str, _Socket] = {}
+    readers: List[asyncio.Task] = []
+    try:
+        await _seed(chats)
+        if args.url:
+            host, port, pid = url.hostname, url.port or 80, args.pid
+        else:
+            node = await _start_node(auth_url, args.port)
+            host, port, pid = "127.0.0.1", args.port, node.pid
+        rss_before = _rss(pid) if pid else 0
+        limit = asyncio.Semaphore(args.connect_concurrency)
+
+        async def open_socket(user_uuid: str) -> None:
+            async with limit:
+                started = perf_counter()
+                try:
+                    socket = await _Socket.connect(host, port, f"/chat/ws?token=bench.{user_uuid}")
+                except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    results.connect_failures += 1
+                    return
+                results.connect.append(perf_counter() - started)
+                sockets[user_uuid] = socket
+                readers.append(asyncio.create_task(_read(socket, results)))
+
+        started = perf_counter()
+        await asyncio.gather(*(open_socket(user_uuid) for user_uuid in users))
+        connect_elapsed = perf_counter() - started
+        await asyncio.sleep(args.settle)
+        if results.rejected:
+            raise SystemExit(
+                f"{results.rejected} sockets were closed with 4001: the node does not "
+                f"verify tokens against {auth_url}"
+            )
+        rss_after = _rss(pid) if pid else 0
+
+        cpu_before, own_before = (_cpu_seconds(pid) if pid else 0.0), process_time()
+        started, sent = perf_counter(), 0
+        while (elapsed := perf_counter() - started) < args.seconds:
+            if sent >= elapsed * args.rate:
+                await asyncio.sleep(min(0.01, (sent + 1) / args.rate - elapsed))
+                continue
+            sender, recipient, chat_uuid = random.choice(peers)
+            if (socket := sockets.get(sender)) is None:
+                continue
+            frame_id = str(sent)
+            results.sent[frame_id] = perf_counter()
+            sent += 1
+            try:
+                await socket.send(json.dumps({
+                    "type": "send",
+                    "id": frame_id,
+                    "chat_uuid": chat_uuid,
+                    "recipient_uuid": recipient,
+                    "content": f"load:{frame_id}",
+                }))
+            except ConnectionError:
+                results.errors += 1
+        send_elapsed = perf_counter() - started
+        node_cpu = (_cpu_seconds(pid) - cpu_before) / send_elapsed if pid else None
+        own_cpu = (process_time() - own_before) / send_elapsed
+        await asyncio.sleep(args.drain)
+    finally:
+        await asyncio.gather(*(socket.close() for socket in sockets.values()), return_exceptions=True)
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        if node is not None:
+            node.send_signal(signal.SIGINT)
+            await node.wait()
+        await auth.stop()
+        if not args.keep:
+            await _cleanup(chats, users)
+
+    connected = len(results.connect)
+    print(f"{'sockets connected':<28} {connected}/{len(users)}, {results.connect_failures} failed")
+    if connected:
+        print(
+            f"{'connect rate':<28} {connected / connect_elapsed:.0f}/s, "
+            f"p50 {_percentile(results.connect, 50) * 1000:.1f}  "
+            f"p99 {_percentile(results.connect, 99) * 1000:.1f} ms"
+        )
+    if pid and connected:
+        print(
+            f"{'node memory':<28} {rss_before / 2**20:.1f} -> {rss_after / 2**20:.1f} MiB, "
+            f"{(rss_after - rss_before) / connected / 1024:.1f} KiB per socket"
+        )
+    print(
+        f"{'messages sent':<28} {sent} ({sent / send_elapsed:.0f}/s), "
+        f"{len(results.acks)} acked, {len(results.deliveries)} delivered, {results.errors} errors"
+    )
+    for name, values in (("ack latency", results.acks), ("delivery latency", results.deliveries)):
+        if values:
+            print(
+                f"{name:<28} mean {statistics.mean(values) * 1000:7.1f}  "
+                f"p50 {_percentile(values, 50) * 1000:7.1f}  "
+                f"p95 {_percentile(values, 95) * 1000:7.1f}  "
+                f"p99 {_percentile(values, 99) * 1000:7.1f} ms"
+            )
+    if node_cpu is not None:
+        print(f"{'node cpu while sending':<28} {node_cpu * 100:.0f}% of one core")
+    # A saturated generator inflates the latencies it measures.
+    print(f"{'generator cpu':<28} {own_cpu * 100:.0f}% of one core")
+    print(f"{'auth checks':<28} {auth.requests}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=200.0)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--settle", type=float, default=2.0)
+    parser.add_argument("--drain", type=float, default=3.0)
+    parser.add_argument("--token-ttl", type=int, default=3600)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="running node, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--auth-port", type=int, help="fixed port of the auth stand-in, required with --url")
+    parser.add_argument("--pid", type=int, help="process of the running node, for memory and CPU")
+    parser.add_argument("--keep", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Fan-out volume and heartbeat write rate of the presence service.
+
+Starts --nodes `PresenceService` instances against the configured Redis,
+each holding its share of --users simulated sockets whose writes are only
+counted. Every user follows --chats-per-user of --chats chats and types in
+one of them at --keystrokes per second. Reports the typing frames sockets
+sent, the presence events published to Redis, the frames written back to
+sockets and the heartbeat writes, per second, next to what a broadcast per
+keystroke would have written.
+
+    python -m chats.benchmarks.presence --nodes 4 --users 4000 --seconds 20
+
+Connection settings come from the usual REDIS_* variables.
+"""
+import argparse
+import asyncio
+import logging
+import random
+from collections import Counter
+from os import environ as env
+from time import monotonic
+from uuid import NAMESPACE_URL, uuid5
+
+from chats.src.config import PresenceConfig, RedisConfig, SendQueueConfig
+from chats.src.domain.entities import UserDM
+from chats.src.infrasructure.cache import new_redis_client
+from chats.src.infrasructure.hub import ClientConnection, ConnectionHub
+from chats.src.infrasructure.metrics import SocketMetrics
+from chats.src.infrasructure.presence import PresenceService
+from chats.src.infrasructure.protocol import JsonFrameCodec
+
+
+class _Sink:
+    """Stands in for a socket and counts what would have been written."""
+
+    def __init__(self, counter: Counter) -> None:
+        self._counter = counter
+
+    async def send_text(self, data: str) -> None:
+        self._counter["socket_writes"] += 1
+
+    async def send_bytes(self, data: bytes) -> None:
+        self._counter["socket_writes"] += 1
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        pass
+
+
+def _uuid(kind: str, index: int) -> str:
+    return str(uuid5(NAMESPACE_URL, f"nedviga-bench/{kind}/{index}"))
+
+
+async def run(args: argparse.Namespace) -> None:
+    logger = logging.getLogger("presence-bench")
+    config = PresenceConfig(**{
+        **env,
+        "CHATS_TYPING_TICK": str(args.tick),
+        "CHATS_TYPING_REFRESH": str(args.refresh),
+        "CHATS_PRESENCE_HEARTBEAT_INTERVAL": str(args.heartbeat),
+        "CHATS_PRESENCE_STATS_INTERVAL": str(args.seconds * 2),
+    })
+    redis_client = new_redis_client(RedisConfig(**env))
+    counter: Counter = Counter()
+    codec = JsonFrameCodec()
+    queue_config, socket_metrics = SendQueueConfig(**env), SocketMetrics()
+    nodes = []
+    for _ in range(args.nodes):
+        hub = ConnectionHub(logger)
+        presence = PresenceService(hub, redis_client, config, logger)
+        await presence.start()
+        nodes.append((hub, presence))
+    chats = [_uuid("chat", i) for i in range(args.chats)]
+    followers: Counter = Counter()
+    sockets = []
+    for i in range(args.users):
+        hub, presence = nodes[i % args.nodes]
+        user = UserDM(uuid=_uuid("user", i), user_type="user")
+        connection = ClientConnection(user, _Sink(counter), "bench", codec, queue_config, socket_metrics)
+        hub.register(connection)
+        followed = random.sample(chats, args.chats_per_user)
+        for chat_uuid in followed:
+            await presence.subscribe(connection, chat_uuid)
+            followers[chat_uuid] += 1
+        sockets.append((presence, connection, followed[0]))
+    await asyncio.sleep(args.tick * 2)
+    for _, presence in nodes:
+        presence.stats.clear()
+    counter.clear()
+
+    async def type_in(presence: PresenceService, connection: ClientConnection, chat_uuid: str) -> None:
+        while True:
+            await asyncio.sleep(random.expovariate(args.keystrokes))
+            presence.typing(connection, chat_uuid, True)
+            counter["naive_writes"] += followers[chat_uuid]
+
+    started = monotonic()
+    typists = [asyncio.create_task(type_in(*socket)) for socket in sockets]
+    await asyncio.sleep(args.seconds)
+    for task in typists:
+        task.cancel()
+    await asyncio.gather(*typists, return_exceptions=True)
+    elapsed = monotonic() - started
+    stats = sum((presence.stats for _, presence in nodes), Counter())
+    for name, count in (
+        ("typing frames received", stats["typing_received"]),
+        ("presence events published", stats["events_published"]),
+        ("presence events received", stats["events_received"]),
+        ("socket writes", counter["socket_writes"]),
+        ("writes if broadcast per keystroke", counter["naive_writes"]),
+        ("heartbeat writes", stats["heartbeat_writes"]),
+    ):
+        print(f"{name:<34} {count / elapsed:>12.1f}/s")
+    for _, presence in nodes:
+        await presence.stop()
+    await redis_client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=2)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=1000)
+    parser.add_argument("--chats-per-user", type=int, default=3)
+    parser.add_argument("--keystrokes", type=float, default=4.0)
+    parser.add_argument("--tick", type=float, default=0.5)
+    parser.add_argument("--refresh", type=float, default=3.0)
+    parser.add_argument("--heartbeat", type=float, default=20.0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
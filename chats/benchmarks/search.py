@@ -0,0 +1,206 @@
+"""
+Latency of ranked full-text search over a seeded messages table.
+
+Seeds synthetic messages (sender_type 'bench') across --chats chats from a
+fixed vocabulary drawn with a skewed distribution, so queries hit both very
+common and rare lexemes, then runs the real query through
+`Gateways.search_messages`: scoped to one chat and to one user, first pages
+and pages reached by following cursors.
+
+    python -m chats.benchmarks.search --rows 5000000 --queries 200
+
+Connection settings come from the usual POSTGRES_* variables. Seeded rows
+are kept between runs (pass --skip-seed to reuse them) and removed with
+--cleanup.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+from collections import defaultdict
+from time import monotonic
+from typing import Dict, List
+from uuid import NAMESPACE_URL, uuid5
+
+
+WORDS = [
+    "квартира", "дом", "цена", "просмотр", "комната", "аренда", "метро", "ремонт",
+    "собственник", "договор", "ипотека", "залог", "этаж", "балкон", "кухня", "район",
+    "парковка", "мебель", "техника", "животные", "депозит", "комиссия", "срочно",
+    "студия", "новостройка", "вторичка", "окна", "двор", "школа", "садик", "лифт",
+    "concierge", "penthouse", "loft", "terrace", "garage", "sauna", "fireplace",
+    "таунхаус", "дача", "участок", "коттедж", "евроремонт", "перепланировка", "кладовая",
+    "гардеробная", "эркер", "мансарда", "подвал", "видеонаблюдение", "шлагбаум",
+]
+
+SEED_QUERY = """
+    INSERT INTO messages (
+        uuid, chat_uuid, sender_type, sender_uuid,
+        recipient_type, recipient_uuid,
+        message, timestamp, is_edited
+    )
+    SELECT
+        gen_random_uuid(),
+        chats[1 + g % :chat_count],
+        'bench',
+        users[1 + (g % :chat_count) * 2 % :user_count],
+        'bench',
+        users[1 + ((g % :chat_count) * 2 + 1) % :user_count],
+        (
+            SELECT string_agg(words[1 + floor(power(random(), 3) * array_length(words, 1))::int], ' ')
+            FROM generate_series(1, 4 + g % 12)
+        ),
+        localtimestamp - make_interval(secs => (:total - g) * 0.05),
+        FALSE
+    FROM generate_series(:start, :stop) AS g,
+        (SELECT
+            CAST(:chats AS uuid[]) AS chats,
+            CAST(:users AS uuid[]) AS users,
+            CAST(:words AS text[]) AS words
+        ) AS seed
+"""
+
+
+def _uuids(kind: str, count: int) -> List[str]:
+    return [str(uuid5(NAMESPACE_URL, f"nedviga-bench/{kind}/{i}")) for i in range(count)]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+async def seed(session_maker, rows: int, chats: List[str], users: List[str], batch: int) -> None:
+    from sqlalchemy import text
+
+    async with session_maker() as session:
+        await session.execute(
+            text("""
+                INSERT INTO chats (uuid, created_at)
+                SELECT chat_uuid, localtimestamp FROM unnest(CAST(:chats AS uuid[])) AS chat_uuid
+                ON CONFLICT DO NOTHING
+            """),
+            {"chats": chats}
+        )
+        await session.commit()
+    started = monotonic()
+    for start in range(0, rows, batch):
+        stop = min(rows, start + batch) - 1
+        async with session_maker() as session:
+            await session.execute(text(SEED_QUERY), {
+                "chat_count": len(chats), "user_count": len(users), "total": rows,
+                "start": start, "stop": stop,
+                "chats": chats, "users": users, "words": WORDS,
+            })
+            await session.commit()
+        elapsed = monotonic() - started
+        print(f"seeded {stop + 1}/{rows} rows, {(stop + 1) / elapsed:.0f} rows/s", end="\r")
+    print()
+    async with session_maker() as session:
+        flush_started = monotonic()
+        pages = (await session.execute(text("""
+            SELECT coalesce(sum(gin_clean_pending_list(CAST(inhrelid AS regclass))), 0)
+            FROM pg_inherits
+            WHERE inhparent = CAST('ix_messages_search_vector' AS regclass)
+        """))).scalar_one()
+        await session.commit()
+        print(f"pending list: {pages} pages merged in {monotonic() - flush_started:.2f}s")
+    async with session_maker() as session:
+        await session.execute(text("ANALYZE messages"))
+        await session.commit()
+
+
+async def cleanup(session_maker, chats: List[str]) -> None:
+    from sqlalchemy import text
+
+    async with session_maker() as session:
+        result = await session.execute(text("DELETE FROM messages WHERE sender_type = 'bench'"))
+        await session.execute(
+            text("DELETE FROM chats WHERE uuid = ANY(CAST(:chats AS uuid[]))"),
+            {"chats": chats}
+        )
+        await session.commit()
+    print(f"removed {result.rowcount} seeded messages")
+
+
+async def measure(session_maker, chats: List[str], users: List[str], queries: int, pages: int) -> None:
+    from chats.src.domain.entities import SearchCursorDM, SearchMessagesDM
+    from chats.src.infrasructure.gateways import Gateways
+
+    timings: Dict[str, List[float]] = defaultdict(list)
+    found: Dict[str, int] = defaultdict(int)
+    for _ in range(queries):
+        index = random.randrange(len(chats))
+        chat, user = chats[index], users[index * 2 % len(users)]
+        common, rare = WORDS[random.randrange(5)], WORDS[-1 - random.randrange(10)]
+        cases = {
+            "chat, common word": (common, chat),
+            "chat, rare word": (rare, chat),
+            "chat, two words": (f"{common} {rare}", chat),
+            "user, common word": (common, None),
+            "user, rare word": (rare, None),
+        }
+        for name, (query, chat_uuid) in cases.items():
+            after = None
+            for page in range(pages):
+                async with session_maker() as session:
+                    started = monotonic()
+                    results = await Gateways(session).search_messages(SearchMessagesDM(
+                        user_uuid=user, query=query, limit=21, chat_uuid=chat_uuid, after=after
+                    ))
+                    timings[f"{name}, page {'1' if page == 0 else '2+'}"].append(monotonic() - started)
+                found[name] += len(results[:20])
+                if len(results) <= 20:
+                    break
+                last = results[19]
+                after = SearchCursorDM(
+                    rank=last.rank,
+                    timestamp=last.message.timestamp,
+                    uuid=str(last.message.uuid)
+                )
+    for name, values in timings.items():
+        print(
+            f"{name:<30} n={len(values):<5} "
+            f"mean {statistics.mean(values) * 1000:7.1f}  "
+            f"p50 {_percentile(values, 50) * 1000:7.1f}  "
+            f"p95 {_percentile(values, 95) * 1000:7.1f}  "
+            f"p99 {_percentile(values, 99) * 1000:7.1f} ms"
+        )
+    for name, count in found.items():
+        print(f"{name:<30} {count / queries:.1f} results per query")
+
+
+async def run(args: argparse.Namespace) -> None:
+    from chats.src.config import PostgresConfig
+    from chats.src.infrasructure.database import new_session_maker
+    from os import environ as env
+
+    session_maker = new_session_maker(PostgresConfig(**env))
+    chats, users = _uuids("chat", args.chats), _uuids("user", args.users)
+    try:
+        if args.cleanup:
+            await cleanup(session_maker, chats)
+            return
+        if not args.skip_seed:
+            await seed(session_maker, args.rows, chats, users, args.batch)
+        await measure(session_maker, chats, users, args.queries, args.pages)
+    finally:
+        await session_maker.kw["bind"].dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chats", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--cleanup", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,109 @@
 from dataclasses import dataclass
-from re import S
+from typing import List, Optional
+
+from chats.src.domain.entities import FoundMessageDM, MessageDM
 
 
 @dataclass(slots=True)
 class SendMessageDTO:
-    token: str
-    recipient_uuid: str
+    sender_uuid: str
+    sender_type: str
+    recipient_uuid: Optional[str]
+    recipient_type: str
+    chat_uuid: str
+    content: str
+
+
+@dataclass(slots=True)
+class EditMessageDTO:
+    user_uuid: str
+    message_uuid: str
+    chat_uuid: str
+    content: str
+
+
+@dataclass(slots=True)
+class DeleteMessageDTO:
+    user_uuid: str
+    message_uuid: str
+    chat_uuid: str
+
+
+@dataclass(slots=True)
+class GetMessagesDTO:
+    user_uuid: str
+    chat_uuid: str
+    limit: int
+    before: Optional[str] = None
+    after: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SyncMessagesDTO:
+    user_uuid: str
+    chat_uuid: str
+    after_seq: int
+    limit: int
+
+
+@dataclass(slots=True)
+class SyncPageDTO:
+    messages: List[MessageDM]
+    next_seq: int
+    last_seq: int
+    complete: bool
+
+
+@dataclass(slots=True)
+class ExportMessagesDTO:
+    user_uuid: str
+    chat_uuid: str
+
+
+@dataclass(slots=True)
+class MessagesPageDTO:
+    messages: List[MessageDM]
+    before: Optional[str]
+    after: Optional[str]
+
+
+@dataclass(slots=True)
+class SearchMessagesDTO:
+    user_uuid: str
+    query: str
+    limit: int
+    chat_uuid: Optional[str] = None
+    cursor: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SearchPageDTO:
+    results: List[FoundMessageDM]
+    cursor: Optional[str]
+
+
+@dataclass(slots=True)
+class ResyncInboxDTO:
+    user_uuid: str
+    cursor: Optional[str]
+
+
+@dataclass(slots=True)
+class CreateGroupDTO:
+    user_uuid: str
+    title: str
+    member_uuids: List[str]
+
+
+@dataclass(slots=True)
+class AddMembersDTO:
+    user_uuid: str
+    chat_uuid: str
+    member_uuids: List[str]
+
+
+@dataclass(slots=True)
+class RemoveMemberDTO:
+    user_uuid: str
     chat_uuid: str
-    content: str
\ No newline at end of file
+    member_uuid: str
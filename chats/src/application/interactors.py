@@ -1,19 +1,563 @@
-from chats.src.application.dto import SendMessageDTO
-from chats.src.application.interfaces import DBSession, UUIDGenerator, SendMessage, AuthService
-from chats.src.domain.entities import MessageDM
+import re
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Union
+from uuid import UUID
+
+from chats.src.application.dto import (
+    AddMembersDTO,
+    CreateGroupDTO,
+    DeleteMessageDTO,
+    EditMessageDTO,
+    ExportMessagesDTO,
+    GetMessagesDTO,
+    MessagesPageDTO,
+    RemoveMemberDTO,
+    ResyncInboxDTO,
+    SearchMessagesDTO,
+    SearchPageDTO,
+    SendMessageDTO,
+    SyncMessagesDTO,
+    SyncPageDTO
+)
+from chats.src.config import ExportConfig, GroupsConfig, InboxConfig, RecentCacheConfig
+from chats.src.application.interfaces import (
+    ArchivedMessages,
+    AuthService,
+    ChatDirectory,
+    ChatMembers,
+    DBSession,
+    DeleteMessage,
+    DeliverMessages,
+    EditMessage,
+    ExportMessages,
+    GetMessages,
+    MessageInbox,
+    NotifyChat,
+    RecentMessages,
+    SearchMessages,
+    SendMessage,
+    StoreMessages,
+    SyncMessages,
+    UUIDGenerator
+)
+from chats.src.domain.entities import (
+    ChatDM,
+    CreateGroupDM,
+    DeleteMessageDM,
+    EditMessageDM,
+    FoundMessageDM,
+    GetMessagesDM,
+    InboxPageDM,
+    MessageCursorDM,
+    MessageDM,
+    MessageEventDM,
+    SearchCursorDM,
+    SearchMessagesDM,
+    SendMessageDM,
+    SyncMessagesDM,
+    UserDM
+)
+
+
+INBOX_CURSOR = re.compile(r"^\d{1,20}-\d{1,20}$")
+
+
+def _encode_cursor(message: MessageDM) -> str:
+    raw = f"{message.timestamp.isoformat()}|{message.uuid}".encode()
+    return urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _page(messages: List[MessageDM], older: bool) -> MessagesPageDTO:
+    return MessagesPageDTO(
+        messages=messages,
+        before=_encode_cursor(messages[-1]) if older else None,
+        after=_encode_cursor(messages[0])
+    )
+
+
+def _cursor(message: MessageDM) -> MessageCursorDM:
+    return MessageCursorDM(timestamp=message.timestamp, uuid=str(message.uuid))
+
+
+def _decode_cursor(token: Optional[str]) -> Optional[MessageCursorDM]:
+    if token is None:
+        return None
+    try:
+        raw = urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        timestamp, _, uuid = raw.partition("|")
+        return MessageCursorDM(timestamp=datetime.fromisoformat(timestamp), uuid=str(UUID(uuid)))
+    except ValueError:
+        raise ValueError("Некорректный курсор.")
+
+
+def _encode_search_cursor(found: FoundMessageDM) -> str:
+    raw = f"{found.rank!r}|{found.message.timestamp.isoformat()}|{found.message.uuid}".encode()
+    return urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode_search_cursor(token: Optional[str]) -> Optional[SearchCursorDM]:
+    if token is None:
+        return None
+    try:
+        raw = urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        rank, timestamp, uuid = raw.split("|")
+        return SearchCursorDM(
+            rank=float(rank),
+            timestamp=datetime.fromisoformat(timestamp),
+            uuid=str(UUID(uuid))
+        )
+    except ValueError:
+        raise ValueError("Некорректный курсор.")
+
+
+async def _reader(members: ChatMembers, chat_uuid: str, user_uuid: str) -> Optional[str]:
+    # Direct chats are read through the participant filter; a group is
+    # open as a whole to its members and to no one else.
+    chat = await members.get_chat(chat_uuid)
+    if chat is None or not chat.is_group:
+        return user_uuid
+    if not await members.is_member(chat_uuid, user_uuid):
+        raise PermissionError("Вы не участник чата.")
+    return None
+
+
+class AuthenticateInteractor:
+    def __init__(self, auth: AuthService) -> None:
+        self._auth = auth
+
+    async def __call__(self, token: str) -> UserDM:
+        user_data = await self._auth.verify_token_with_auth_service(token)
+        exp = user_data.get("exp")
+        return UserDM(
+            uuid=str(user_data["uuid"]),
+            user_type=user_data.get("role") or "user",
+            expires_at=datetime.fromtimestamp(float(exp), timezone.utc) if exp else None
+        )
+
 
 class SendMessageInteractor:
     def __init__(
         self, 
-        session: DBSession, 
         uuid_generator: UUIDGenerator,
-        auth: AuthService,
         gateway: SendMessage,
+        members: ChatMembers,
+        delivery: DeliverMessages,
     ) -> None:
-        self._session = session
         self._uuid_generator = uuid_generator
-        self._auth = auth
         self._gateway = gateway
+        self._members = members
+        self._delivery = delivery
 
     async def __call__(self, dto: SendMessageDTO) -> MessageDM:
-        
\ No newline at end of file
+        chat = await self._members.get_chat(dto.chat_uuid)
+        if chat is None:
+            raise ValueError("Чат не найден.")
+        recipient_type, recipient_uuid = dto.recipient_type, dto.recipient_uuid
+        if chat.is_group:
+            # A group message is stored once, addressed to the group.
+            if not await self._members.is_member(dto.chat_uuid, dto.sender_uuid):
+                raise PermissionError("Вы не участник чата.")
+            recipient_type, recipient_uuid = "group", dto.chat_uuid
+        elif recipient_uuid is None:
+            raise ValueError("Не указан получатель.")
+        message_dm = await self._gateway.handle_message(SendMessageDM(
+            uuid=str(self._uuid_generator()),
+            chat_uuid=dto.chat_uuid,
+            user_type=dto.sender_type,
+            user_uuid=dto.sender_uuid,
+            recipient_type=recipient_type,
+            recipient_uuid=recipient_uuid,
+            message=dto.content
+        ))
+        await self._delivery.deliver(MessageEventDM(event="message", message=message_dm))
+        return message_dm
+
+
+class StoreMessagesInteractor:
+    def __init__(
+        self,
+        session: DBSession,
+        gateway: StoreMessages,
+        cache: RecentMessages,
+    ) -> None:
+        self._session = session
+        self._gateway = gateway
+        self._cache = cache
+
+    async def __call__(self, batch: List[SendMessageDM]) -> List[Union[MessageDM, Exception]]:
+        outcomes = await self._store(batch)
+        await self._cache.add_recent([m for m in outcomes if isinstance(m, MessageDM)])
+        return outcomes
+
+    async def _store(self, batch: List[SendMessageDM]) -> List[Union[MessageDM, Exception]]:
+        try:
+            messages = await self._gateway.insert_messages(batch)
+            await self._session.commit()
+            return messages
+        except Exception as e:
+            await self._session.rollback()
+            if len(batch) == 1:
+                return [e]
+        # One bad row fails the whole statement, so the rest are saved one
+        # by one and only the offending messages are rejected.
+        outcomes: List[Union[MessageDM, Exception]] = []
+        for params in batch:
+            try:
+                outcomes += await self._gateway.insert_messages([params])
+                await self._session.commit()
+            except Exception as e:
+                await self._session.rollback()
+                outcomes.append(e)
+        return outcomes
+
+
+class EditMessageInteractor:
+    def __init__(
+        self,
+        session: DBSession,
+        gateway: EditMessage,
+        cache: RecentMessages,
+        delivery: DeliverMessages,
+    ) -> None:
+        self._session = session
+        self._gateway = gateway
+        self._cache = cache
+        self._delivery = delivery
+
+    async def __call__(self, dto: EditMessageDTO) -> MessageDM:
+        message_dm = await self._gateway.edit_message(EditMessageDM(
+            user_uuid=dto.user_uuid,
+            message_uuid=dto.message_uuid,
+            chat_uuid=dto.chat_uuid,
+            new_content=dto.content
+        ))
+        await self._session.commit()
+        await self._cache.replace_recent(message_dm)
+        await self._delivery.deliver(MessageEventDM(event="edited", message=message_dm))
+        return message_dm
+
+
+class DeleteMessageInteractor:
+    def __init__(
+        self,
+        session: DBSession,
+        gateway: DeleteMessage,
+        cache: RecentMessages,
+        delivery: DeliverMessages,
+    ) -> None:
+        self._session = session
+        self._gateway = gateway
+        self._cache = cache
+        self._delivery = delivery
+
+    async def __call__(self, dto: DeleteMessageDTO) -> MessageDM:
+        message_dm = await self._gateway.delete_message(DeleteMessageDM(
+            user_uuid=dto.user_uuid,
+            message_uuid=dto.message_uuid,
+            chat_uuid=dto.chat_uuid
+        ))
+        await self._session.commit()
+        await self._cache.remove_recent(message_dm)
+        await self._delivery.deliver(MessageEventDM(event="deleted", message=message_dm))
+        return message_dm
+
+
+class GetMessagesInteractor:
+    def __init__(
+        self,
+        gateway: GetMessages,
+        archive: ArchivedMessages,
+        cache: RecentMessages,
+        members: ChatMembers,
+        config: RecentCacheConfig,
+    ) -> None:
+        self._gateway = gateway
+        self._archive = archive
+        self._cache = cache
+        self._members = members
+        self._config = config
+
+    async def __call__(self, dto: GetMessagesDTO) -> MessagesPageDTO:
+        if dto.before is not None and dto.after is not None:
+            raise ValueError("Укажите только один из курсоров: before или after.")
+        user_uuid = await _reader(self._members, dto.chat_uuid, dto.user_uuid)
+        if dto.before is None and dto.after is None and dto.limit < self._config.size:
+            if page := await self._recent_page(dto, user_uuid):
+                return page
+        messages = await self._load(GetMessagesDM(
+            chat_uuid=dto.chat_uuid,
+            user_uuid=user_uuid,
+            limit=dto.limit + 1,
+            before=_decode_cursor(dto.before),
+            after=_decode_cursor(dto.after)
+        ))
+        has_more = len(messages) > dto.limit
+        if dto.after is not None:
+            messages = messages[-dto.limit:] if has_more else messages
+        else:
+            messages = messages[:dto.limit]
+        if not messages:
+            return MessagesPageDTO(messages=[], before=dto.after, after=dto.after or dto.before)
+        # Older pages always exist past a page of newer messages; newer ones
+        # may appear at any time, so `after` is returned for every page.
+        return _page(messages, older=has_more or dto.after is not None)
+
+    async def _recent_page(self, dto: GetMessagesDTO, user_uuid: Optional[str]) -> Optional[MessagesPageDTO]:
+        recent = await self._cache.get_recent(dto.chat_uuid, dto.limit + 1)
+        if recent is None:
+            messages = await self._load(GetMessagesDM(
+                chat_uuid=dto.chat_uuid,
+                user_uuid=None,
+                limit=self._config.size
+            ))
+            complete = len(messages) < self._config.size
+            await self._cache.fill_recent(dto.chat_uuid, messages, complete)
+        else:
+            messages, complete = recent.messages, recent.complete
+        if user_uuid is not None:
+            messages = [
+                m for m in messages
+                if user_uuid in (str(m.sender_uuid), str(m.recipient_uuid))
+            ]
+        has_more = len(messages) > dto.limit
+        if not has_more and not complete:
+            return None
+        messages = messages[:dto.limit]
+        if not messages:
+            return MessagesPageDTO(messages=[], before=None, after=None)
+        return _page(messages, older=has_more)
+
+    async def _load(self, params: GetMessagesDM) -> List[MessageDM]:
+        # Archived partitions hold everything older than the oldest row
+        # still in Postgres, so the archive is only read past either end.
+        if params.after is None:
+            messages = await self._gateway.get_chat_messages(params)
+            if len(messages) < params.limit:
+                messages += await self._archive.get_archived_messages(replace(
+                    params,
+                    limit=params.limit - len(messages),
+                    before=_cursor(messages[-1]) if messages else params.before
+                ))
+            return messages
+        messages = await self._archive.get_archived_messages(params)
+        if len(messages) < params.limit:
+            messages = await self._gateway.get_chat_messages(replace(
+                params,
+                limit=params.limit - len(messages),
+                after=_cursor(messages[0]) if messages else params.after
+            )) + messages
+        return messages
+
+
+class SyncMessagesInteractor:
+    def __init__(
+        self,
+        gateway: SyncMessages,
+        archive: ArchivedMessages,
+        members: ChatMembers,
+    ) -> None:
+        self._gateway = gateway
+        self._archive = archive
+        self._members = members
+
+    async def __call__(self, dto: SyncMessagesDTO) -> SyncPageDTO:
+        if dto.after_seq < 0:
+            raise ValueError("Некорректный номер сообщения.")
+        params = SyncMessagesDM(
+            chat_uuid=dto.chat_uuid,
+            user_uuid=await _reader(self._members, dto.chat_uuid, dto.user_uuid),
+            after_seq=dto.after_seq,
+            limit=dto.limit
+        )
+        last_seq = await self._gateway.get_last_seq(dto.chat_uuid)
+        messages = await self._gateway.get_messages_after_seq(params)
+        first = messages[0].seq if messages else last_seq + 1
+        if first > dto.after_seq + 1:
+            # Numbers missing from Postgres were either deleted or live in
+            # archived partitions; an unreadable archive raises instead of
+            # letting them pass for deletions.
+            archived = await self._archive.get_archived_after_seq(params)
+            messages = ([m for m in archived if m.seq < first] + messages)[:dto.limit]
+        complete = len(messages) < dto.limit
+        if complete:
+            next_seq = max([last_seq, dto.after_seq] + [m.seq for m in messages[-1:]])
+        else:
+            next_seq = messages[-1].seq
+        return SyncPageDTO(
+            messages=messages,
+            next_seq=next_seq,
+            last_seq=max(last_seq, next_seq),
+            complete=complete
+        )
+
+
+class ExportMessagesInteractor:
+    def __init__(
+        self,
+        gateway: ExportMessages,
+        archive: ArchivedMessages,
+        members: ChatMembers,
+        config: ExportConfig,
+    ) -> None:
+        self._gateway = gateway
+        self._archive = archive
+        self._members = members
+        self._config = config
+
+    async def __call__(self, dto: ExportMessagesDTO) -> AsyncIterator[List[MessageDM]]:
+        # Oldest first: archived partitions, then Postgres from past the
+        # last archived message, in case a partition is both archived and
+        # not yet dropped.
+        params = GetMessagesDM(
+            chat_uuid=dto.chat_uuid,
+            user_uuid=await _reader(self._members, dto.chat_uuid, dto.user_uuid),
+            limit=self._config.batch_size
+        )
+        last: Optional[MessageDM] = None
+        async for messages in self._archive.stream_archived_messages(params):
+            last = messages[-1]
+            yield messages
+        if last is not None:
+            params = replace(params, after=_cursor(last))
+        async for messages in self._gateway.stream_chat_messages(params):
+            yield messages
+
+
+class SearchMessagesInteractor:
+    def __init__(self, gateway: SearchMessages) -> None:
+        self._gateway = gateway
+
+    async def __call__(self, dto: SearchMessagesDTO) -> SearchPageDTO:
+        query = dto.query.strip()
+        if not query:
+            raise ValueError("Пустой поисковый запрос.")
+        results = await self._gateway.search_messages(SearchMessagesDM(
+            user_uuid=dto.user_uuid,
+            query=query,
+            limit=dto.limit + 1,
+            chat_uuid=dto.chat_uuid,
+            after=_decode_search_cursor(dto.cursor)
+        ))
+        has_more = len(results) > dto.limit
+        results = results[:dto.limit]
+        return SearchPageDTO(
+            results=results,
+            cursor=_encode_search_cursor(results[-1]) if has_more else None
+        )
+
+
+class ResyncInboxInteractor:
+    def __init__(self, inbox: MessageInbox, config: InboxConfig) -> None:
+        self._inbox = inbox
+        self._config = config
+
+    async def __call__(self, dto: ResyncInboxDTO) -> InboxPageDM:
+        if dto.cursor is not None and not INBOX_CURSOR.match(dto.cursor):
+            raise ValueError("Некорректный курсор.")
+        return await self._inbox.read(dto.user_uuid, dto.cursor, self._config.resync_limit)
+
+
+class AuthorizeChatInteractor:
+    def __init__(self, members: ChatMembers) -> None:
+        self._members = members
+
+    async def __call__(self, chat_uuid: str, user_uuid: str) -> None:
+        await _reader(self._members, chat_uuid, user_uuid)
+
+
+class GetGroupsInteractor:
+    def __init__(self, directory: ChatDirectory) -> None:
+        self._directory = directory
+
+    async def __call__(self, user_uuid: str) -> List[ChatDM]:
+        return await self._directory.get_user_groups(user_uuid)
+
+
+class CreateGroupInteractor:
+    def __init__(
+        self,
+        session: DBSession,
+        uuid_generator: UUIDGenerator,
+        directory: ChatDirectory,
+        config: GroupsConfig,
+    ) -> None:
+        self._session = session
+        self._uuid_generator = uuid_generator
+        self._directory = directory
+        self._config = config
+
+    async def __call__(self, dto: CreateGroupDTO) -> ChatDM:
+        member_uuids = list(dict.fromkeys(u for u in dto.member_uuids if u != dto.user_uuid))
+        if len(member_uuids) + 1 > self._config.max_members:
+            raise ValueError("Слишком много участников.")
+        chat = await self._directory.create_group(CreateGroupDM(
+            uuid=str(self._uuid_generator()),
+            title=dto.title,
+            owner_uuid=dto.user_uuid,
+            member_uuids=member_uuids
+        ))
+        await self._session.commit()
+        return chat
+
+
+class AddMembersInteractor:
+    def __init__(
+        self,
+        session: DBSession,
+        directory: ChatDirectory,
+        members: ChatMembers,
+        config: GroupsConfig,
+    ) -> None:
+        self._session = session
+        self._directory = directory
+        self._members = members
+        self._config = config
+
+    async def __call__(self, dto: AddMembersDTO) -> ChatDM:
+        chat = await self._directory.get_chat(dto.chat_uuid)
+        if chat is None or not chat.is_group:
+            raise LookupError("Группа не найдена.")
+        member = await self._directory.get_member(dto.chat_uuid, dto.user_uuid)
+        if member is None or member.role != "owner":
+            raise PermissionError("Добавлять участников может только владелец группы.")
+        if chat.member_count + len(dto.member_uuids) > self._config.max_members:
+            raise ValueError("Слишком много участников.")
+        chat = await self._directory.add_members(dto.chat_uuid, dto.member_uuids)
+        await self._session.commit()
+        await self._members.invalidate(dto.chat_uuid)
+        return chat
+
+
+class RemoveMemberInteractor:
+    def __init__(
+        self,
+        session: DBSession,
+        directory: ChatDirectory,
+        members: ChatMembers,
+        chats: NotifyChat,
+    ) -> None:
+        self._session = session
+        self._directory = directory
+        self._members = members
+        self._chats = chats
+
+    async def __call__(self, dto: RemoveMemberDTO) -> ChatDM:
+        chat = await self._directory.get_chat(dto.chat_uuid)
+        if chat is None or not chat.is_group:
+            raise LookupError("Группа не найдена.")
+        member = await self._directory.get_member(dto.chat_uuid, dto.user_uuid)
+        if member is None:
+            raise PermissionError("Вы не участник чата.")
+        if dto.member_uuid != dto.user_uuid and member.role != "owner":
+            raise PermissionError("Удалять участников может только владелец группы.")
+        if dto.member_uuid == dto.user_uuid and member.role == "owner":
+            raise ValueError("Владелец не может покинуть группу.")
+        chat = await self._directory.remove_member(dto.chat_uuid, dto.member_uuid)
+        await self._session.commit()
+        await self._members.remove(dto.chat_uuid, dto.member_uuid)
+        # Sockets of the member that follow the chat would otherwise keep
+        # receiving the messages of a large group.
+        await self._chats.kick(dto.chat_uuid, dto.member_uuid)
+        return chat
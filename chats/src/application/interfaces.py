@@ -1,10 +1,11 @@
-from typing import List, Protocol
+from typing import AsyncIterator, Dict, List, Optional, Protocol, Sequence
 from abc import abstractmethod
 from uuid import UUID
 
 from chats.src.domain.entities import (
-    DeleteMessageDM, EditMessageDM, GetMessagesDM, 
-    MessageDM, SendMessageDM
+    ChatDM, ChatMemberDM, CreateGroupDM, DeleteMessageDM, EditMessageDM,
+    FoundMessageDM, GetMessagesDM, InboxPageDM, MessageDM, MessageEventDM,
+    RecentMessagesDM, SearchMessagesDM, SendMessageDM, SyncMessagesDM
 )
 
 
@@ -15,7 +16,12 @@ class AuthService(Protocol):
 
 class SendMessage(Protocol):
     @abstractmethod
-    async def handle_message(self, params: SendMessageDM) -> None: ...
+    async def handle_message(self, params: SendMessageDM) -> MessageDM: ...
+
+
+class StoreMessages(Protocol):
+    @abstractmethod
+    async def insert_messages(self, params: List[SendMessageDM]) -> List[MessageDM]: ...
 
 
 class GetMessages(Protocol):
@@ -23,6 +29,56 @@ class GetMessages(Protocol):
     async def get_chat_messages(self, params: GetMessagesDM) -> List[MessageDM]: ...
 
 
+class SearchMessages(Protocol):
+    @abstractmethod
+    async def search_messages(self, params: SearchMessagesDM) -> List[FoundMessageDM]: ...
+
+
+class SyncMessages(Protocol):
+    @abstractmethod
+    async def get_last_seq(self, chat_uuid: str) -> int: ...
+
+    @abstractmethod
+    async def get_messages_after_seq(self, params: SyncMessagesDM) -> List[MessageDM]: ...
+
+
+class ExportMessages(Protocol):
+    @abstractmethod
+    def stream_chat_messages(self, params: GetMessagesDM) -> AsyncIterator[List[MessageDM]]: ...
+
+
+class ArchiveUnavailableError(OSError):
+    """The archive directory can't be read, so archived history is unknown."""
+
+
+class ArchivedMessages(Protocol):
+    @abstractmethod
+    async def get_archived_messages(self, params: GetMessagesDM) -> List[MessageDM]: ...
+
+    @abstractmethod
+    async def get_archived_after_seq(self, params: SyncMessagesDM) -> List[MessageDM]: ...
+
+    @abstractmethod
+    def stream_archived_messages(self, params: GetMessagesDM) -> AsyncIterator[List[MessageDM]]: ...
+
+
+class RecentMessages(Protocol):
+    @abstractmethod
+    async def get_recent(self, chat_uuid: str, limit: int) -> Optional[RecentMessagesDM]: ...
+
+    @abstractmethod
+    async def fill_recent(self, chat_uuid: str, messages: List[MessageDM], complete: bool) -> None: ...
+
+    @abstractmethod
+    async def add_recent(self, messages: Sequence[MessageDM]) -> None: ...
+
+    @abstractmethod
+    async def replace_recent(self, message: MessageDM) -> None: ...
+
+    @abstractmethod
+    async def remove_recent(self, message: MessageDM) -> None: ...
+
+
 class EditMessage(Protocol):
     @abstractmethod
     async def edit_message(self, params: EditMessageDM) -> MessageDM: ...
@@ -30,7 +86,73 @@ class EditMessage(Protocol):
 
 class DeleteMessage(Protocol):
     @abstractmethod
-    async def delete_message(self, params: DeleteMessageDM) -> None: ...
+    async def delete_message(self, params: DeleteMessageDM) -> MessageDM: ...
+
+
+class ChatDirectory(Protocol):
+    @abstractmethod
+    async def get_chat(self, chat_uuid: str) -> Optional[ChatDM]: ...
+
+    @abstractmethod
+    async def get_member(self, chat_uuid: str, user_uuid: str) -> Optional[ChatMemberDM]: ...
+
+    @abstractmethod
+    async def get_member_uuids(self, chat_uuid: str) -> List[str]: ...
+
+    @abstractmethod
+    async def get_user_groups(self, user_uuid: str) -> List[ChatDM]: ...
+
+    @abstractmethod
+    async def create_group(self, params: CreateGroupDM) -> ChatDM: ...
+
+    @abstractmethod
+    async def add_members(self, chat_uuid: str, user_uuids: Sequence[str]) -> ChatDM: ...
+
+    @abstractmethod
+    async def remove_member(self, chat_uuid: str, user_uuid: str) -> ChatDM: ...
+
+
+class ChatMembers(Protocol):
+    @abstractmethod
+    async def get_chat(self, chat_uuid: str) -> Optional[ChatDM]: ...
+
+    @abstractmethod
+    async def get_members(self, chat_uuid: str) -> List[str]: ...
+
+    @abstractmethod
+    async def is_member(self, chat_uuid: str, user_uuid: str) -> bool: ...
+
+    @abstractmethod
+    async def invalidate(self, chat_uuid: str) -> None: ...
+
+    @abstractmethod
+    async def remove(self, chat_uuid: str, user_uuid: str) -> None: ...
+
+
+class NotifyUsers(Protocol):
+    @abstractmethod
+    async def notify(self, user_uuids: Sequence[str], event: MessageEventDM) -> None: ...
+
+
+class NotifyChat(Protocol):
+    @abstractmethod
+    async def notify_chat(self, chat_uuid: str, event: MessageEventDM) -> None: ...
+
+    @abstractmethod
+    async def kick(self, chat_uuid: str, user_uuid: str) -> None: ...
+
+
+class DeliverMessages(Protocol):
+    @abstractmethod
+    async def deliver(self, event: MessageEventDM) -> None: ...
+
+
+class MessageInbox(Protocol):
+    @abstractmethod
+    async def append(self, user_uuids: Sequence[str], event: MessageEventDM) -> Dict[str, str]: ...
+
+    @abstractmethod
+    async def read(self, user_uuid: str, cursor: Optional[str], limit: int) -> InboxPageDM: ...
 
 
 class UUIDGenerator(Protocol):
@@ -42,4 +164,7 @@ class DBSession(Protocol):
     async def commit(self) -> None: ...
 
     @abstractmethod
-    async def flush(self) -> None: ...
\ No newline at end of file
+    async def flush(self) -> None: ...
+
+    @abstractmethod
+    async def rollback(self) -> None: ...
@@ -1,10 +1,24 @@
 from os import environ as env
+from typing import Literal
 
 from pydantic import Field, BaseModel
 
 
+class AppConfig(BaseModel):
+    log_level: str = Field(default='INFO', alias='CHATS_LOG_LEVEL')
+    host: str = Field(default='0.0.0.0', alias='CHATS_HOST')
+    port: int = Field(default=8000, alias='CHATS_PORT')
+    ws_compress_threshold: int = Field(default=1024, alias='CHATS_WS_COMPRESS_THRESHOLD')
+    ws_per_message_deflate: bool = Field(default=False, alias='CHATS_WS_PER_MESSAGE_DEFLATE')
+
+
 class AuthConfig(BaseModel):
     url: str = Field(alias='AUTH_URL') 
+    http2: bool = Field(default=True, alias='CHATS_AUTH_HTTP2')
+    timeout: float = Field(default=5.0, alias='CHATS_AUTH_TIMEOUT')
+    max_connections: int = Field(default=100, alias='CHATS_AUTH_MAX_CONNECTIONS')
+    max_keepalive_connections: int = Field(default=20, alias='CHATS_AUTH_MAX_KEEPALIVE')
+    keepalive_expiry: float = Field(default=30.0, alias='CHATS_AUTH_KEEPALIVE_EXPIRY')
 
 
 class PostgresConfig(BaseModel):
@@ -30,8 +44,77 @@ class RedisConfig(BaseModel):
     REDIS_CONFIRM_TIME:int = Field(alias='REDIS_CONFIRM_TIME')
 
 
+class SendQueueConfig(BaseModel):
+    max_frames: int = Field(default=256, alias='CHATS_WS_QUEUE_SIZE')
+    policy: Literal['drop_oldest', 'coalesce', 'disconnect'] = Field(
+        default='coalesce',
+        alias='CHATS_WS_SLOW_CONSUMER_POLICY'
+    )
+    send_timeout: float = Field(default=10.0, alias='CHATS_WS_SEND_TIMEOUT')
+
+
+class FanoutConfig(BaseModel):
+    heartbeat_interval: float = Field(default=5.0, alias='CHATS_FANOUT_HEARTBEAT_INTERVAL')
+    node_ttl: int = Field(default=15, alias='CHATS_FANOUT_NODE_TTL')
+    flush_interval: float = Field(default=0.005, alias='CHATS_FANOUT_FLUSH_INTERVAL')
+    max_batch_size: int = Field(default=500, alias='CHATS_FANOUT_BATCH_SIZE')
+
+
+class WriterConfig(BaseModel):
+    max_batch_size: int = Field(default=200, alias='CHATS_WRITER_BATCH_SIZE')
+    max_batch_wait: float = Field(default=0.005, alias='CHATS_WRITER_BATCH_WAIT')
+    max_pending: int = Field(default=5000, alias='CHATS_WRITER_MAX_PENDING')
+
+
+class RecentCacheConfig(BaseModel):
+    size: int = Field(default=100, alias='CHATS_RECENT_SIZE')
+    ttl: int = Field(default=3600, alias='CHATS_RECENT_TTL')
+
+
+class ArchiveConfig(BaseModel):
+    # The directory the events service archives dropped partitions into,
+    # mounted on every chats node; it must exist even while still empty.
+    directory: str = Field(default='/var/lib/nedviga/archive', alias='MESSAGES_ARCHIVE_DIR')
+
+
+class ExportConfig(BaseModel):
+    batch_size: int = Field(default=1000, alias='CHATS_EXPORT_BATCH_SIZE')
+
+
+class InboxConfig(BaseModel):
+    max_length: int = Field(default=1000, alias='CHATS_INBOX_MAX_LENGTH')
+    ttl: int = Field(default=604800, alias='CHATS_INBOX_TTL')
+    resync_limit: int = Field(default=500, alias='CHATS_INBOX_RESYNC_LIMIT')
+
+
+class PresenceConfig(BaseModel):
+    heartbeat_interval: float = Field(default=20.0, alias='CHATS_PRESENCE_HEARTBEAT_INTERVAL')
+    online_ttl: int = Field(default=60, alias='CHATS_PRESENCE_ONLINE_TTL')
+    retention: int = Field(default=2592000, alias='CHATS_PRESENCE_RETENTION')
+    typing_tick: float = Field(default=0.5, alias='CHATS_TYPING_TICK')
+    typing_refresh: float = Field(default=3.0, alias='CHATS_TYPING_REFRESH')
+    max_subscriptions: int = Field(default=100, alias='CHATS_PRESENCE_MAX_SUBSCRIPTIONS')
+    stats_interval: float = Field(default=60.0, alias='CHATS_PRESENCE_STATS_INTERVAL')
+
+
+class GroupsConfig(BaseModel):
+    fanout_write_limit: int = Field(default=500, alias='CHATS_GROUP_FANOUT_WRITE_LIMIT')
+    max_members: int = Field(default=50000, alias='CHATS_GROUP_MAX_MEMBERS')
+    cache_ttl: int = Field(default=300, alias='CHATS_MEMBERS_CACHE_TTL')
+
+
 class Config(BaseModel):
+    app: AppConfig = Field(default_factory=lambda: AppConfig(**env))
     auth: AuthConfig = Field(default_factory=lambda: AuthConfig(**env))
     postgres: PostgresConfig = Field(default_factory=lambda: PostgresConfig(**env))
     rabbitmq: RabbitMQConfig = Field(default_factory=lambda: RabbitMQConfig(**env))
-    redis: RedisConfig = Field(default_factory=lambda: RedisConfig(**env))
\ No newline at end of file
+    redis: RedisConfig = Field(default_factory=lambda: RedisConfig(**env))
+    send_queue: SendQueueConfig = Field(default_factory=lambda: SendQueueConfig(**env))
+    fanout: FanoutConfig = Field(default_factory=lambda: FanoutConfig(**env))
+    writer: WriterConfig = Field(default_factory=lambda: WriterConfig(**env))
+    recent: RecentCacheConfig = Field(default_factory=lambda: RecentCacheConfig(**env))
+    archive: ArchiveConfig = Field(default_factory=lambda: ArchiveConfig(**env))
+    export: ExportConfig = Field(default_factory=lambda: ExportConfig(**env))
+    inbox: InboxConfig = Field(default_factory=lambda: InboxConfig(**env))
+    presence: PresenceConfig = Field(default_factory=lambda: PresenceConfig(**env))
+    groups: GroupsConfig = Field(default_factory=lambda: GroupsConfig(**env))
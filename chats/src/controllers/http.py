@@ -1,80 +1,717 @@
-from typing import Annotated, Literal, Dict, Any
+import asyncio
+import csv
+import io
+import zlib
+from logging import Logger
+from typing import Annotated, Any, AsyncIterator, Dict, List, Literal, Optional, Union
+from uuid import UUID
 
+from dishka import AsyncContainer
 from dishka.integrations.base import FromDishka as Depends
 from dishka.integrations.litestar import inject
-from litestar import Controller, websocket, WebSocket
-from litestar.exceptions import HTTPException
-from litestar.params import Body
+from litestar import Controller, MediaType, Request, WebSocket, delete, get, post, websocket
+from litestar.connection import ASGIConnection
+from litestar.exceptions import HTTPException, WebSocketDisconnect
+from litestar.params import Parameter
+from litestar.response import Stream
+from litestar.status_codes import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_401_UNAUTHORIZED,
+    HTTP_403_FORBIDDEN,
+    HTTP_404_NOT_FOUND,
+    HTTP_503_SERVICE_UNAVAILABLE
+)
+from pydantic import ValidationError
 
-from chats.src.application.dto import SendMessageDTO
-from chats.src.application.interfaces import SendMessage
+from chats.src.application.dto import (
+    AddMembersDTO,
+    CreateGroupDTO,
+    DeleteMessageDTO,
+    EditMessageDTO,
+    ExportMessagesDTO,
+    GetMessagesDTO,
+    RemoveMemberDTO,
+    ResyncInboxDTO,
+    SearchMessagesDTO,
+    SendMessageDTO,
+    SyncMessagesDTO
+)
+from chats.src.application.interactors import (
+    AddMembersInteractor,
+    AuthenticateInteractor,
+    AuthorizeChatInteractor,
+    CreateGroupInteractor,
+    DeleteMessageInteractor,
+    EditMessageInteractor,
+    ExportMessagesInteractor,
+    GetGroupsInteractor,
+    GetMessagesInteractor,
+    RemoveMemberInteractor,
+    ResyncInboxInteractor,
+    SearchMessagesInteractor,
+    SendMessageInteractor,
+    SyncMessagesInteractor
+)
+from chats.src.application.interfaces import ArchiveUnavailableError
+from chats.src.config import Config
+from chats.src.controllers.schemas import (
+    AddMembersRequest,
+    AuthFrame,
+    CreateGroupRequest,
+    DeleteFrame,
+    EditFrame,
+    FoundMessageSchema,
+    GroupSchema,
+    MessageSchema,
+    MessagesPageResponse,
+    ResyncFrame,
+    SearchResponse,
+    SendFrame,
+    SubscribeFrame,
+    SyncResponse,
+    TypingFrame,
+    UnsubscribeFrame,
+    incoming_frame
+)
+from chats.src.domain.entities import ChatDM, MessageDM, UserDM
+from chats.src.infrasructure.fanout import MessageFanout
+from chats.src.infrasructure.hub import ClientConnection, ConnectionHub, token_fingerprint
+from chats.src.infrasructure.metrics import SocketMetrics
+from chats.src.infrasructure.presence import PresenceService
+from chats.src.infrasructure.protocol import EncodedFrame, FrameCodecs, encode_json
+
+
+def _get_token(connection: ASGIConnection) -> Optional[str]:
+    if token := connection.query_params.get("token"):
+        return token
+    authorization = connection.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    return None
+
+
+EXPORT_COLUMNS = [
+    "uuid", "chat_uuid", "sender_type", "sender_uuid",
+    "recipient_type", "recipient_uuid",
+    "message", "timestamp", "is_edited", "edited_at", "seq",
+]
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _ndjson_chunk(messages: List[MessageDM]) -> str:
+    return "".join(encode_json(message.to_dict()) + "\n" for message in messages)
+
+
+def _csv_chunk(messages: List[MessageDM]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for message in messages:
+        writer.writerow([
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in (getattr(message, column) for column in EXPORT_COLUMNS)
+        ])
+    return buffer.getvalue()
+
+
+def _group(chat: ChatDM) -> GroupSchema:
+    return GroupSchema(
+        uuid=chat.uuid,
+        title=chat.title,
+        member_count=chat.member_count,
+        last_seq=chat.last_seq
+    )
 
 
 class ChatController(Controller):
+    """
+    One long-lived socket per client. The client authenticates once when
+    connecting (`?token=` or `Authorization: Bearer`) and then sends JSON
+    frames `{"type": "send" | "edit" | "delete", "id": ..., ...}`. Every
+    frame is answered with `{"type": "ack", "id": ..., "message": {...}}` or
+    `{"type": "error", "id": ..., "detail": ...}`, while messages addressed
+    to the user are pushed as `message`, `edited` and `deleted` frames, or
+    as `{"type": "batch", "frames": [...]}` when several arrive at once.
+    Before the token expires the client may send `{"type": "auth", "token":
+    ...}` with a fresh one; otherwise the socket is closed at expiry, or as
+    soon as the token is revoked. While the auth service is unreachable the
+    handshake closes with 1013 and a refresh gets an `error` frame, leaving
+    the session its current expiry.
+
+    Frames are JSON text unless the client offers the `nedviga.bin.v1`
+    subprotocol, in which case both directions use the binary codec of
+    `infrasructure/protocol.py`; `nedviga.json.v1` or no offer keeps JSON.
+
+    Every pushed event carries a `cursor` from the user's inbox. A client
+    reconnecting with `?cursor=` (or sending `{"type": "resync", "cursor":
+    ...}`) gets the events it missed as `{"type": "resync", "frames": [...],
+    "cursor": ..., "complete": ..., "gap": ...}`; it repeats the resync from
+    the returned cursor until `complete`, and pages chat history instead
+    when `gap` says the inbox no longer reaches back that far. Events pushed
+    while a resync is in flight may arrive twice and are deduplicated by
+    cursor.
+
+    `{"type": "subscribe", "chat_uuid": ..., "users": [...]}` follows a
+    chat: the ack carries the online state of the listed users, and
+    `{"type": "presence", "chat_uuid": ..., "users": {uuid: "online" |
+    "offline" | "typing"}}` frames report changes until `unsubscribe` or
+    disconnect. `{"type": "typing", "chat_uuid": ..., "active": ...}` is
+    only acknowledged when it carries an id.
+
+    Outgoing frames wait in a bounded per-socket queue, and whatever has
+    accumulated is written as one `batch` frame. A client that falls behind
+    loses its oldest pushes, announced by `{"type": "dropped", "count":
+    ...}` after which it resyncs, or is disconnected, depending on
+    CHATS_WS_SLOW_CONSUMER_POLICY.
+
+    Every message carries `seq`, numbered per chat without reuse. A client
+    that sees a chat's `seq` jump past the last one it holds fetches the
+    difference from `GET /chat/{chat_uuid}/sync?after_seq=`.
+
+    Groups are managed under `/chat/groups`; their messages are sent
+    without a recipient and stored once for all members. Members of small
+    groups receive them like direct messages. In groups larger than
+    CHATS_GROUP_FANOUT_WRITE_LIMIT only sockets subscribed to the chat get
+    them pushed, and the rest sync from the `last_seq` listed by
+    `GET /chat/groups`. Sockets of a member who leaves or is removed get
+    `{"type": "unsubscribed", "chat_uuid": ...}` and nothing more from that
+    chat.
+    """
+
     path = "/chat"
 
-    @websocket(path="/send/{user_type}/{user_id}")
+    @websocket(path="/ws")
+    async def session_handler(self, socket: WebSocket) -> None:
+        container: AsyncContainer = socket.app.state.dishka_container
+        hub = await container.get(ConnectionHub)
+        fanout = await container.get(MessageFanout)
+        presence = await container.get(PresenceService)
+        metrics = await container.get(SocketMetrics)
+        config = await container.get(Config)
+        logger = await container.get(Logger)
+        protocol, codec = (await container.get(FrameCodecs)).negotiate(
+            socket.scope.get("subprotocols") or []
+        )
+        await socket.accept(subprotocols=protocol)
+        token = _get_token(socket)
+        try:
+            user = await self._authenticate(container, token)
+        except ConnectionError as e:
+            logger.warning(f"Сессия не открыта, авторизация недоступна: {e.__cause__ or e}")
+            await socket.close(code=1013, reason="Сервис авторизации недоступен, повторите позже.")
+            return
+        if user is None:
+            await socket.close(code=4001, reason="Токен недействителен или истёк.")
+            return
+        connection = ClientConnection(
+            user, socket, token_fingerprint(token), codec, config.send_queue, metrics
+        )
+        hub.register(connection)
+        try:
+            await fanout.attach(user.uuid)
+            await presence.touch(user.uuid)
+            if (cursor := socket.query_params.get("cursor")) is not None:
+                await connection.send_frame(
+                    await self._resync(container, user, None, cursor, logger)
+                )
+            while True:
+                # The token was verified once at the handshake; the session
+                # lives until its exp unless the client sends a fresh one.
+                try:
+                    data = await asyncio.wait_for(
+                        socket.receive_data(codec.mode),
+                        connection.seconds_left()
+                    )
+                except asyncio.TimeoutError:
+                    data = None
+                if data is None or connection.seconds_left() == 0:
+                    await socket.close(code=4001, reason="Токен истёк.")
+                    break
+                frame = await self._dispatch(container, hub, presence, connection, data, logger)
+                if frame is not None:
+                    await connection.send_frame(frame)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            hub.unregister(connection)
+            await connection.stop()
+            await presence.drop(connection)
+            await fanout.detach(user.uuid)
+
+    @get(
+        path="/{chat_uuid:uuid}/messages",
+        operation_id="chat_messages",
+        summary="Chat History",
+        description="Возвращает страницу сообщений чата, от новых к старым. \
+            Следующие страницы запрашиваются по курсорам before и after из ответа."
+    )
     @inject
-    async def send_message_handler(
+    async def get_messages_handler(
         self,
-        socket: WebSocket,
-        token: Annotated[str, Body(description="Токен доступа, используемый для аутентификации и авторизации запросов.")],
-        recipient_uuid: Annotated[str, Body(description="Уникальный идентификатор получателя сообщения в чате, используется для указания, кому адресовано сообщение.")],
-        chat_uuid: Annotated[str, Body(description="Уникальный идентификатор чата, UUID")],
-        content: Annotated[str, Body(description="Текст сообщения, которое нужно отправить")],
-        interactor: Depends[SendMessage]
-    ) -> None:
-        await socket.accept()
+        request: Request,
+        chat_uuid: UUID,
+        authenticate: Depends[AuthenticateInteractor],
+        interactor: Depends[GetMessagesInteractor],
+        limit: Annotated[int, Parameter(ge=1, le=200, description="Количество сообщений на странице")] = 50,
+        before: Annotated[Optional[str], Parameter(description="Курсор: сообщения старше указанного")] = None,
+        after: Annotated[Optional[str], Parameter(description="Курсор: сообщения новее указанного")] = None,
+    ) -> MessagesPageResponse:
+        user = await self._authenticate_request(request, authenticate)
         try:
-            message_dto = SendMessageDTO(
-                token=token, 
-                recipient_uuid=recipient_uuid, 
-                chat_uuid=chat_uuid
-            )
-            response = await interactor(message_dto)
-            await socket.send_text(f"Сообщение отправлено: {response}")
+            page = await interactor(GetMessagesDTO(
+                user_uuid=user.uuid,
+                chat_uuid=str(chat_uuid),
+                limit=limit,
+                before=before,
+                after=after
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=str(e))
+        except PermissionError as e:
+            raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail=str(e))
+        except ArchiveUnavailableError as e:
+            raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+        return MessagesPageResponse(
+            messages=[MessageSchema(**message.to_dict()) for message in page.messages],
+            before=page.before,
+            after=page.after
+        )
+
+    @get(
+        path="/{chat_uuid:uuid}/sync",
+        operation_id="chat_sync",
+        summary="Chat Sync",
+        description="Возвращает сообщения чата с номерами больше after_seq, по возрастанию. \
+            Клиент продолжает с next_seq, пока complete не станет true; номера \
+            до next_seq, которых нет в ответе, принадлежали удалённым сообщениям."
+    )
+    @inject
+    async def sync_messages_handler(
+        self,
+        request: Request,
+        chat_uuid: UUID,
+        authenticate: Depends[AuthenticateInteractor],
+        interactor: Depends[SyncMessagesInteractor],
+        after_seq: Annotated[int, Parameter(ge=0, description="Последний известный клиенту номер")] = 0,
+        limit: Annotated[int, Parameter(ge=1, le=500, description="Количество сообщений")] = 200,
+    ) -> SyncResponse:
+        user = await self._authenticate_request(request, authenticate)
+        try:
+            page = await interactor(SyncMessagesDTO(
+                user_uuid=user.uuid,
+                chat_uuid=str(chat_uuid),
+                after_seq=after_seq,
+                limit=limit
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=str(e))
+        except PermissionError as e:
+            raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail=str(e))
+        except ArchiveUnavailableError as e:
+            raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+        return SyncResponse(
+            messages=[MessageSchema(**message.to_dict()) for message in page.messages],
+            next_seq=page.next_seq,
+            last_seq=page.last_seq,
+            complete=page.complete
+        )
+
+    @get(
+        path="/{chat_uuid:uuid}/export",
+        operation_id="chat_export",
+        summary="Chat Export",
+        description="Выгружает всю историю чата, от старых сообщений к новым, в NDJSON \
+            или CSV. Ответ передаётся потоком по мере чтения, при gzip=true сжатым."
+    )
+    @inject
+    async def export_messages_handler(
+        self,
+        request: Request,
+        chat_uuid: UUID,
+        authenticate: Depends[AuthenticateInteractor],
+        authorize: Depends[AuthorizeChatInteractor],
+        format: Annotated[
+            Literal["ndjson", "csv"], Parameter(description="Формат выгрузки")
+        ] = "ndjson",
+        gzip: Annotated[bool, Parameter(description="Сжать выгрузку gzip")] = False,
+    ) -> Stream:
+        user = await self._authenticate_request(request, authenticate)
+        try:
+            # Refused before the headers go out; the stream checks again.
+            await authorize(str(chat_uuid), user.uuid)
+        except PermissionError as e:
+            raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail=str(e))
+        container: AsyncContainer = request.app.state.dishka_container
+        logger = await container.get(Logger)
+        filename = f"chat-{chat_uuid}.{format}" + (".gz" if gzip else "")
+        return Stream(
+            self._export(
+                container,
+                ExportMessagesDTO(user_uuid=user.uuid, chat_uuid=str(chat_uuid)),
+                format,
+                gzip,
+                logger
+            ),
+            media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    async def _export(
+        self,
+        container: AsyncContainer,
+        dto: ExportMessagesDTO,
+        format: str,
+        gzip: bool,
+        logger: Logger
+    ) -> AsyncIterator[bytes]:
+        # The stream outlives the handler, so it holds its own request
+        # scope, and with it the session, until the last row is sent.
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if gzip else None
+        chunk = _csv_chunk if format == "csv" else _ndjson_chunk
+        if format == "csv":
+            header = ",".join(EXPORT_COLUMNS) + "\r\n"
+            yield compressor.compress(header.encode()) if compressor else header.encode()
+        try:
+            async with container() as request_container:
+                interactor = await request_container.get(ExportMessagesInteractor)
+                async for messages in interactor(dto):
+                    data = chunk(messages).encode()
+                    if compressor is None:
+                        yield data
+                    elif data := compressor.compress(data):
+                        yield data
         except Exception as e:
-            print(f"Ошибка отправки сообщения: {e}")
-            await socket.close(code=4001, reason="Ошибка при отправке сообщения.")
+            # Headers are already sent; the client sees a truncated file.
+            logger.error(f"Ошибка выгрузки чата {dto.chat_uuid}: {e}")
+            raise
+        if compressor is not None:
+            yield compressor.flush()
 
+    @get(
+        path="/search",
+        operation_id="chat_search",
+        summary="Message Search",
+        description="Полнотекстовый поиск по сообщениям пользователя, во всех его чатах \
+            или в одном чате. Результаты упорядочены по релевантности, следующая \
+            страница запрашивается по курсору из ответа."
+    )
+    @inject
+    async def search_messages_handler(
+        self,
+        request: Request,
+        authenticate: Depends[AuthenticateInteractor],
+        interactor: Depends[SearchMessagesInteractor],
+        q: Annotated[str, Parameter(min_length=1, max_length=256, description="Поисковый запрос")],
+        chat_uuid: Annotated[Optional[UUID], Parameter(description="Искать только в этом чате")] = None,
+        limit: Annotated[int, Parameter(ge=1, le=100, description="Количество результатов на странице")] = 20,
+        cursor: Annotated[Optional[str], Parameter(description="Курсор следующей страницы")] = None,
+    ) -> SearchResponse:
+        user = await self._authenticate_request(request, authenticate)
+        try:
+            page = await interactor(SearchMessagesDTO(
+                user_uuid=user.uuid,
+                query=q,
+                limit=limit,
+                chat_uuid=str(chat_uuid) if chat_uuid else None,
+                cursor=cursor
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=str(e))
+        return SearchResponse(
+            results=[
+                FoundMessageSchema(message=MessageSchema(**found.message.to_dict()), rank=found.rank)
+                for found in page.results
+            ],
+            cursor=page.cursor
+        )
 
-    @websocket(path="/edit/{user_type}/{user_id}")
+    @get(
+        path="/groups",
+        operation_id="chat_groups",
+        summary="User Groups",
+        description="Возвращает группы пользователя с числом участников и последним \
+            номером сообщения, по которому клиент решает, какие группы синхронизировать."
+    )
     @inject
-    async def edit_message_handler(
+    async def get_groups_handler(
         self,
-        socket: WebSocket,
-        user_type: Annotated[str, Literal["user", "admin"], Body(description="Тип пользователя, например: user или admin")],
-        user_id: Annotated[str, Body(description="Уникальный идентификатор пользователя, UUID")],
-        message_id: Annotated[str, Body(description="Уникальный идентификатор сообщения, UUID")],
-        chat_id: Annotated[str, Body(description="Уникальный идентификатор чата, UUID")],
-        new_content: Annotated[str, Body(description="Новый текст сообщения")]
-    ) -> None:
-        await socket.accept()
-        async with SessionLocal() as session:
-            try:
-                # Редактирование сообщения
-                await edit_message(session, message_id, chat_id, new_content)
-                await socket.send_text(f"Сообщение {message_id} обновлено.")
-            except Exception as e:
-                print(f"Ошибка редактирования сообщения: {e}")
-                await socket.close(code=4002, reason="Ошибка при редактировании сообщения.")
-
-    @websocket(path="/delete/{user_type}/{user_id}")
+        request: Request,
+        authenticate: Depends[AuthenticateInteractor],
+        interactor: Depends[GetGroupsInteractor],
+    ) -> List[GroupSchema]:
+        user = await self._authenticate_request(request, authenticate)
+        return [_group(chat) for chat in await interactor(user.uuid)]
+
+    @post(
+        path="/groups",
+        operation_id="chat_group_create",
+        summary="Create Group",
+        description="Создаёт группу; создатель становится её владельцем."
+    )
+    @inject
+    async def create_group_handler(
+        self,
+        request: Request,
+        data: CreateGroupRequest,
+        authenticate: Depends[AuthenticateInteractor],
+        interactor: Depends[CreateGroupInteractor],
+    ) -> GroupSchema:
+        user = await self._authenticate_request(request, authenticate)
+        try:
+            chat = await interactor(CreateGroupDTO(
+                user_uuid=user.uuid,
+                title=data.title,
+                member_uuids=[str(member) for member in data.members]
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=str(e))
+        return _group(chat)
+
+    @post(
+        path="/groups/{chat_uuid:uuid}/members",
+        operation_id="chat_group_add_members",
+        summary="Add Group Members",
+        description="Добавляет участников в группу. Доступно только владельцу."
+    )
     @inject
-    async def delete_message_handler(
+    async def add_members_handler(
         self,
-        socket: WebSocket,
-        user_type: Annotated[str, Literal["user", "admin"], Body(description="Тип пользователя, например: user или admin")],
-        user_id: Annotated[str, Body(description="Уникальный идентификатор пользователя, UUID")],
-        message_id: Annotated[str, Body(description="Уникальный идентификатор сообщения, UUID")],
-        chat_id: Annotated[str, Body(description="Уникальный идентификатор чата, UUID")]
+        request: Request,
+        chat_uuid: UUID,
+        data: AddMembersRequest,
+        authenticate: Depends[AuthenticateInteractor],
+        interactor: Depends[AddMembersInteractor],
+    ) -> GroupSchema:
+        user = await self._authenticate_request(request, authenticate)
+        try:
+            chat = await interactor(AddMembersDTO(
+                user_uuid=user.uuid,
+                chat_uuid=str(chat_uuid),
+                member_uuids=[str(member) for member in data.members]
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=str(e))
+        except PermissionError as e:
+            raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=str(e))
+        return _group(chat)
+
+    @delete(
+        path="/groups/{chat_uuid:uuid}/members/{member_uuid:uuid}",
+        operation_id="chat_group_remove_member",
+        summary="Remove Group Member",
+        description="Удаляет участника из группы. Владелец удаляет любого участника, \
+            остальные могут только выйти сами."
+    )
+    @inject
+    async def remove_member_handler(
+        self,
+        request: Request,
+        chat_uuid: UUID,
+        member_uuid: UUID,
+        authenticate: Depends[AuthenticateInteractor],
+        interactor: Depends[RemoveMemberInteractor],
     ) -> None:
-        await socket.accept()
-        async with SessionLocal() as session:
+        user = await self._authenticate_request(request, authenticate)
+        try:
+            await interactor(RemoveMemberDTO(
+                user_uuid=user.uuid,
+                chat_uuid=str(chat_uuid),
+                member_uuid=str(member_uuid)
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=str(e))
+        except PermissionError as e:
+            raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=str(e))
+
+    async def _authenticate_request(
+        self,
+        request: Request,
+        authenticate: AuthenticateInteractor
+    ) -> UserDM:
+        token = _get_token(request)
+        try:
+            user = await authenticate(token) if token else None
+        except (ValueError, KeyError):
+            user = None
+        except ConnectionError as e:
+            raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+        if user is None:
+            raise HTTPException(
+                status_code=HTTP_401_UNAUTHORIZED,
+                detail="Токен недействителен или истёк.",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return user
+
+    async def _authenticate(self, container: AsyncContainer, token: Optional[str]) -> Optional[UserDM]:
+        # None for a rejected token; ConnectionError while auth is down.
+        if not token:
+            return None
+        try:
+            async with container() as request_container:
+                interactor = await request_container.get(AuthenticateInteractor)
+                return await interactor(token)
+        except (ValueError, KeyError):
+            return None
+
+    async def _dispatch(
+        self,
+        container: AsyncContainer,
+        hub: ConnectionHub,
+        presence: PresenceService,
+        connection: ClientConnection,
+        data: EncodedFrame,
+        logger: Logger
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            if isinstance(data, str):
+                frame = incoming_frame.validate_json(data)
+            else:
+                frame = incoming_frame.validate_python(connection.codec.decode(data))
+        except ValidationError as e:
+            return {"type": "error", "id": None, "detail": f"Некорректный кадр: {e.errors()[0]['msg']}"}
+        except ValueError as e:
+            return {"type": "error", "id": None, "detail": f"Некорректный кадр: {e}"}
+        if isinstance(frame, AuthFrame):
             try:
-                # Удаление сообщения
-                await delete_message(session, message_id, chat_id)
-                await socket.send_text(f"Сообщение {message_id} удалено.")
-            except Exception as e:
-                print(f"Ошибка удаления сообщения: {e}")
-                await socket.close(code=4003, reason="Ошибка при удалении сообщения.")
+                user = await self._authenticate(container, frame.token)
+            except ConnectionError as e:
+                # The session keeps its current exp; the client may retry.
+                return {"type": "error", "id": frame.id, "detail": f"{e} Повторите позже."}
+            if user is None or user.uuid != connection.user.uuid:
+                return {"type": "error", "id": frame.id, "detail": "Токен недействителен или истёк."}
+            hub.reauthenticate(connection, user, token_fingerprint(frame.token))
+            return {"type": "ack", "id": frame.id, "expires_at": user.expires_at}
+        if isinstance(frame, ResyncFrame):
+            return await self._resync(container, connection.user, frame.id, frame.cursor, logger)
+        if isinstance(frame, (SubscribeFrame, UnsubscribeFrame, TypingFrame)):
+            return await self._presence(container, presence, connection, frame, logger)
+        try:
+            message_dm = await self._handle(container, connection.user, frame)
+        except (PermissionError, ValueError) as e:
+            return {"type": "error", "id": frame.id, "detail": str(e)}
+        except Exception as e:
+            logger.error(f"Ошибка обработки кадра {frame.type}: {e}")
+            return {"type": "error", "id": frame.id, "detail": "Ошибка при обработке сообщения."}
+        return {"type": "ack", "id": frame.id, "message": message_dm.to_dict()}
+
+    async def _presence(
+        self,
+        container: AsyncContainer,
+        presence: PresenceService,
+        connection: ClientConnection,
+        frame: Union[SubscribeFrame, UnsubscribeFrame, TypingFrame],
+        logger: Logger
+    ) -> Optional[Dict[str, Any]]:
+        chat_uuid = str(frame.chat_uuid)
+        try:
+            if isinstance(frame, TypingFrame):
+                presence.typing(connection, chat_uuid, frame.active)
+                return {"type": "ack", "id": frame.id} if frame.id is not None else None
+            if isinstance(frame, UnsubscribeFrame):
+                await presence.unsubscribe(connection, chat_uuid)
+                return {"type": "ack", "id": frame.id, "chat_uuid": chat_uuid}
+            # Following a group also delivers its messages, so it takes
+            # membership.
+            async with container() as request_container:
+                authorize = await request_container.get(AuthorizeChatInteractor)
+                await authorize(chat_uuid, connection.user.uuid)
+            await presence.subscribe(connection, chat_uuid)
+            users = await presence.get_presence([str(user_uuid) for user_uuid in frame.users])
+        except (ValueError, PermissionError) as e:
+            return {"type": "error", "id": frame.id, "detail": str(e)}
+        except Exception as e:
+            logger.error(f"Ошибка обработки кадра {frame.type}: {e}")
+            return {"type": "error", "id": frame.id, "detail": "Ошибка при обработке запроса."}
+        return {
+            "type": "ack",
+            "id": frame.id,
+            "chat_uuid": chat_uuid,
+            "users": [user.to_dict() for user in users],
+        }
+
+    async def _resync(
+        self,
+        container: AsyncContainer,
+        user: UserDM,
+        frame_id: Optional[str],
+        cursor: Optional[str],
+        logger: Logger
+    ) -> Dict[str, Any]:
+        try:
+            async with container() as request_container:
+                interactor = await request_container.get(ResyncInboxInteractor)
+                page = await interactor(ResyncInboxDTO(user_uuid=user.uuid, cursor=cursor))
+        except ValueError as e:
+            return {"type": "error", "id": frame_id, "detail": str(e)}
+        except Exception as e:
+            logger.error(f"Ошибка синхронизации входящих {user.uuid}: {e}")
+            return {"type": "error", "id": frame_id, "detail": "Ошибка при синхронизации."}
+        return {
+            "type": "resync",
+            "id": frame_id,
+            "frames": [
+                {"type": entry.event.event, "message": entry.event.message.to_dict(), "cursor": entry.cursor}
+                for entry in page.entries
+            ],
+            "cursor": page.cursor,
+            "complete": page.complete,
+            "gap": page.gap,
+        }
+
+    async def _handle(
+        self,
+        container: AsyncContainer,
+        user: UserDM,
+        frame: Union[SendFrame, EditFrame, DeleteFrame]
+    ) -> MessageDM:
+        async with container() as request_container:
+            if isinstance(frame, SendFrame):
+                interactor = await request_container.get(SendMessageInteractor)
+                return await interactor(SendMessageDTO(
+                    sender_uuid=user.uuid,
+                    sender_type=user.user_type,
+                    recipient_uuid=str(frame.recipient_uuid) if frame.recipient_uuid else None,
+                    recipient_type=frame.recipient_type,
+                    chat_uuid=str(frame.chat_uuid),
+                    content=frame.content
+                ))
+            if isinstance(frame, EditFrame):
+                interactor = await request_container.get(EditMessageInteractor)
+                return await interactor(EditMessageDTO(
+                    user_uuid=user.uuid,
+                    message_uuid=str(frame.message_uuid),
+                    chat_uuid=str(frame.chat_uuid),
+                    content=frame.content
+                ))
+            interactor = await request_container.get(DeleteMessageInteractor)
+            return await interactor(DeleteMessageDTO(
+                user_uuid=user.uuid,
+                message_uuid=str(frame.message_uuid),
+                chat_uuid=str(frame.chat_uuid)
+            ))
+
+
+class MetricsController(Controller):
+    """Prometheus text exposition of the socket send queues."""
+
+    path = "/metrics"
+
+    @get(path="/", media_type=MediaType.TEXT, include_in_schema=False)
+    @inject
+    async def metrics_handler(
+        self,
+        hub: Depends[ConnectionHub],
+        metrics: Depends[SocketMetrics],
+    ) -> str:
+        lines = [
+            f"chats_ws_connections {hub.connections_count}",
+            f"chats_ws_queued_frames {hub.queued_frames}",
+        ]
+        for name, value in metrics.snapshot().items():
+            lines.append(f"chats_ws_{name} {value}")
+        return "\n".join(lines) + "\n"
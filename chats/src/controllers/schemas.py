@@ -0,0 +1,154 @@
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional, Union
+from uuid import UUID
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+
+class ClientFrame(BaseModel):
+    id: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        description="Идентификатор запроса на стороне клиента, возвращается в ack или error."
+    )
+
+
+class SendFrame(ClientFrame):
+    type: Literal["send"]
+    chat_uuid: UUID = Field(..., description="Уникальный идентификатор чата, UUID")
+    recipient_uuid: Optional[UUID] = Field(
+        default=None,
+        description="Уникальный идентификатор получателя сообщения, UUID; в группах не указывается"
+    )
+    recipient_type: Literal["user", "admin"] = Field(default="user", description="Тип получателя")
+    content: str = Field(..., min_length=1, max_length=4096, description="Текст сообщения")
+
+
+class EditFrame(ClientFrame):
+    type: Literal["edit"]
+    message_uuid: UUID = Field(..., description="Уникальный идентификатор сообщения, UUID")
+    chat_uuid: UUID = Field(..., description="Уникальный идентификатор чата, UUID")
+    content: str = Field(..., min_length=1, max_length=4096, description="Новый текст сообщения")
+
+
+class DeleteFrame(ClientFrame):
+    type: Literal["delete"]
+    message_uuid: UUID = Field(..., description="Уникальный идентификатор сообщения, UUID")
+    chat_uuid: UUID = Field(..., description="Уникальный идентификатор чата, UUID")
+
+
+class AuthFrame(ClientFrame):
+    type: Literal["auth"]
+    token: str = Field(..., description="Новый токен доступа того же пользователя")
+
+
+class ResyncFrame(ClientFrame):
+    type: Literal["resync"]
+    cursor: Optional[str] = Field(
+        default=None,
+        pattern=r"^\d{1,20}-\d{1,20}$",
+        description="Курсор последнего полученного события"
+    )
+
+
+class SubscribeFrame(ClientFrame):
+    type: Literal["subscribe"]
+    chat_uuid: UUID = Field(..., description="Уникальный идентификатор чата, UUID")
+    users: List[UUID] = Field(
+        default_factory=list,
+        max_length=50,
+        description="Участники чата, чей статус вернуть в ответе"
+    )
+
+
+class UnsubscribeFrame(ClientFrame):
+    type: Literal["unsubscribe"]
+    chat_uuid: UUID = Field(..., description="Уникальный идентификатор чата, UUID")
+
+
+class TypingFrame(ClientFrame):
+    type: Literal["typing"]
+    chat_uuid: UUID = Field(..., description="Уникальный идентификатор чата, UUID")
+    active: bool = Field(default=True, description="Пользователь печатает или перестал печатать")
+
+
+IncomingFrame = Annotated[
+    Union[
+        SendFrame, EditFrame, DeleteFrame, AuthFrame, ResyncFrame,
+        SubscribeFrame, UnsubscribeFrame, TypingFrame
+    ],
+    Field(discriminator="type")
+]
+incoming_frame = TypeAdapter(IncomingFrame)
+
+
+class MessageSchema(BaseModel):
+    uuid: UUID
+    chat_uuid: UUID
+    sender_type: str
+    sender_uuid: UUID
+    recipient_type: str
+    recipient_uuid: UUID
+    message: str
+    timestamp: datetime
+    is_edited: bool
+    edited_at: Optional[datetime] = None
+    seq: Optional[int] = Field(default=None, description="Порядковый номер сообщения в чате")
+
+
+class MessagesPageResponse(BaseModel):
+    messages: List[MessageSchema]
+    before: Optional[str] = Field(
+        default=None,
+        description="Курсор для загрузки более старых сообщений, отсутствует на последней странице."
+    )
+    after: Optional[str] = Field(
+        default=None,
+        description="Курсор для загрузки более новых сообщений."
+    )
+
+
+class SyncResponse(BaseModel):
+    messages: List[MessageSchema]
+    next_seq: int = Field(
+        ...,
+        description="Номер, до которого включительно клиент получил всё; пропущенные номера удалены."
+    )
+    last_seq: int = Field(..., description="Последний выданный в чате номер")
+    complete: bool = Field(..., description="Больше сообщений после next_seq нет")
+
+
+class FoundMessageSchema(BaseModel):
+    message: MessageSchema
+    rank: float = Field(..., description="Релевантность сообщения запросу")
+
+
+class SearchResponse(BaseModel):
+    results: List[FoundMessageSchema]
+    cursor: Optional[str] = Field(
+        default=None,
+        description="Курсор следующей страницы, отсутствует на последней странице."
+    )
+
+
+class CreateGroupRequest(BaseModel):
+    title: str = Field(..., min_length=1, max_length=100, description="Название группы")
+    members: List[UUID] = Field(
+        default_factory=list,
+        max_length=1000,
+        description="Участники группы помимо создателя"
+    )
+
+
+class AddMembersRequest(BaseModel):
+    members: List[UUID] = Field(..., min_length=1, max_length=1000, description="Новые участники группы")
+
+
+class GroupSchema(BaseModel):
+    uuid: UUID
+    title: Optional[str] = None
+    member_count: int = Field(..., description="Количество участников")
+    last_seq: Optional[int] = Field(
+        default=None,
+        description="Последний номер сообщения; новее сохранённого у клиента — повод для sync"
+    )
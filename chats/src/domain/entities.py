@@ -1,5 +1,5 @@
 from dataclasses import dataclass, asdict
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -8,8 +8,44 @@ class BaseDM:
         return asdict(self)
 
 
+@dataclass(slots=True)
+class UserDM(BaseDM):
+    uuid: str
+    user_type: str
+    expires_at: Optional[datetime] = None
+
+
+@dataclass(slots=True)
+class ChatDM(BaseDM):
+    uuid: str
+    kind: str
+    title: Optional[str]
+    member_count: int
+    last_seq: Optional[int] = None
+
+    @property
+    def is_group(self) -> bool:
+        return self.kind == "group"
+
+
+@dataclass(slots=True)
+class ChatMemberDM(BaseDM):
+    chat_uuid: str
+    user_uuid: str
+    role: str
+
+
+@dataclass(slots=True)
+class CreateGroupDM(BaseDM):
+    uuid: str
+    title: str
+    owner_uuid: str
+    member_uuids: List[str]
+
+
 @dataclass(slots=True)
 class SendMessageDM(BaseDM):
+    uuid: str
     chat_uuid: str
     user_type: str
     user_uuid: str
@@ -33,15 +69,31 @@ class DeleteMessageDM(BaseDM):
     chat_uuid: str
 
 
+@dataclass(slots=True)
+class MessageCursorDM(BaseDM):
+    timestamp: datetime
+    uuid: str
+
+
 @dataclass(slots=True)
 class GetMessagesDM(BaseDM):
     chat_uuid: str
+    user_uuid: Optional[str]
+    limit: int
+    before: Optional[MessageCursorDM] = None
+    after: Optional[MessageCursorDM] = None
+
+
+@dataclass(slots=True)
+class SyncMessagesDM(BaseDM):
+    chat_uuid: str
+    user_uuid: Optional[str]
+    after_seq: int
     limit: int
-    offset: int
 
 
 @dataclass(slots=True)
-class MessageDM:
+class MessageDM(BaseDM):
     uuid: str
     chat_uuid: str
     sender_type: str
@@ -52,3 +104,59 @@ class MessageDM:
     timestamp: datetime
     is_edited: bool
     edited_at: Optional[datetime]
+    seq: Optional[int] = None
+
+
+@dataclass(slots=True)
+class RecentMessagesDM(BaseDM):
+    messages: List[MessageDM]
+    complete: bool
+
+
+@dataclass(slots=True)
+class MessageEventDM(BaseDM):
+    event: str
+    message: MessageDM
+
+
+@dataclass(slots=True)
+class SearchCursorDM(BaseDM):
+    rank: float
+    timestamp: datetime
+    uuid: str
+
+
+@dataclass(slots=True)
+class SearchMessagesDM(BaseDM):
+    user_uuid: str
+    query: str
+    limit: int
+    chat_uuid: Optional[str] = None
+    after: Optional[SearchCursorDM] = None
+
+
+@dataclass(slots=True)
+class FoundMessageDM(BaseDM):
+    message: MessageDM
+    rank: float
+
+
+@dataclass(slots=True)
+class InboxEntryDM(BaseDM):
+    cursor: str
+    event: MessageEventDM
+
+
+@dataclass(slots=True)
+class InboxPageDM(BaseDM):
+    entries: List[InboxEntryDM]
+    cursor: Optional[str]
+    complete: bool
+    gap: bool
+
+
+@dataclass(slots=True)
+class PresenceDM(BaseDM):
+    user_uuid: str
+    online: bool
+    last_seen: Optional[datetime] = None
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+import struct
+import zlib
+from datetime import datetime
+from logging import Logger
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from chats.src.application.interfaces import ArchiveUnavailableError, ArchivedMessages
+from chats.src.config import ArchiveConfig
+from chats.src.domain.entities import GetMessagesDM, MessageDM, SyncMessagesDM
+
+
+# Written by the events service when it drops an old messages partition;
+# the layout is described in events/src/infrastructure/archive.py.
+MAGIC = b"NEDMSGA1"
+FOOTER = struct.Struct(">Q8s")
+ARCHIVE_SUFFIX = ".msga"
+
+
+class _ArchiveFile:
+    __slots__ = ("path", "columns", "header", "chats", "oldest", "newest")
+
+    def __init__(self, path: Path, columns: List[str], chats: Dict[str, List[Any]]) -> None:
+        self.path = path
+        self.columns = columns
+        self.header = struct.Struct(f">{len(columns)}I")
+        self.chats = chats
+        self.oldest = min((datetime.fromisoformat(c[3]) for c in chats.values()), default=None)
+        self.newest = max((datetime.fromisoformat(c[4]) for c in chats.values()), default=None)
+
+
+def _open_archive(path: Path) -> _ArchiveFile:
+    with open(path, "rb") as file:
+        file.seek(-FOOTER.size, os.SEEK_END)
+        length, magic = FOOTER.unpack(file.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path.name} is not a messages archive")
+        file.seek(-FOOTER.size - length, os.SEEK_END)
+        index = json.loads(zlib.decompress(file.read(length)))
+    return _ArchiveFile(path, index["columns"], index["chats"])
+
+
+def _seq_range(archive: _ArchiveFile, chat_uuid: str) -> Tuple[Optional[int], Optional[int]]:
+    # Indexes written before sequence numbers existed end at `newest`.
+    entry = archive.chats[chat_uuid]
+    return (entry[5], entry[6]) if len(entry) > 5 else (None, None)
+
+
+def _read_chat(archive: _ArchiveFile, chat_uuid: str) -> List[MessageDM]:
+    offset, length = archive.chats[chat_uuid][:2]
+    with open(archive.path, "rb") as file:
+        file.seek(offset)
+        data = file.read(length)
+    columns, position = {}, archive.header.size
+    for name, size in zip(archive.columns, archive.header.unpack_from(data)):
+        columns[name] = json.loads(zlib.decompress(data[position:position + size]))
+        position += size
+    timestamps = [datetime.fromisoformat(value) for value in columns["timestamp"]]
+    edited = [value and datetime.fromisoformat(value) for value in columns["edited_at"]]
+    # Archives written before sequence numbers existed have no seq column.
+    seqs = columns.get("seq") or [None] * len(timestamps)
+    return [
+        MessageDM(
+            uuid=columns["uuid"][i],
+            chat_uuid=chat_uuid,
+            sender_type=columns["sender_type"][i],
+            sender_uuid=columns["sender_uuid"][i],
+            recipient_type=columns["recipient_type"][i],
+            recipient_uuid=columns["recipient_uuid"][i],
+            message=columns["message"][i],
+            timestamp=timestamps[i],
+            is_edited=bool(columns["is_edited"][i]),
+            edited_at=edited[i],
+            seq=seqs[i]
+        )
+        for i in range(len(timestamps))
+    ]
+
+
+class MessageArchive(ArchivedMessages):
+    """
+    Serves history from the archives of dropped partitions. Indexes are
+    read once per file and kept while the directory is unchanged; a chat
+    block is read only when the file holds that chat and its time or seq
+    range can still contribute to the page. A missing or unreadable
+    directory raises ArchiveUnavailableError rather than reading as empty.
+    """
+
+    def __init__(self, config: ArchiveConfig, logger: Logger) -> None:
+        self._directory = Path(config.directory)
+        self._logger = logger
+        self._version: Optional[int] = None
+        self._files: List[_ArchiveFile] = []
+        self._lock = asyncio.Lock()
+
+    async def get_archived_messages(self, params: GetMessagesDM) -> List[MessageDM]:
+        files = [f for f in await self._archives() if params.chat_uuid in f.chats]
+        if not files:
+            return []
+        return await asyncio.to_thread(self._collect, files, params)
+
+    async def get_archived_after_seq(self, params: SyncMessagesDM) -> List[MessageDM]:
+        files = [f for f in await self._archives() if params.chat_uuid in f.chats]
+        if not files:
+            return []
+        return await asyncio.to_thread(self._collect_after_seq, files, params)
+
+    def _collect_after_seq(self, files: List[_ArchiveFile], params: SyncMessagesDM) -> List[MessageDM]:
+        messages: List[MessageDM] = []
+        for archive in sorted(files, key=lambda f: f.oldest):
+            _, max_seq = _seq_range(archive, params.chat_uuid)
+            if max_seq is None or max_seq <= params.after_seq:
+                continue
+            messages += [
+                m for m in _read_chat(archive, params.chat_uuid)
+                if m.seq is not None and m.seq > params.after_seq
+                and params.user_uuid in (None, m.sender_uuid, m.recipient_uuid)
+            ]
+            if len(messages) >= params.limit:
+                break
+        messages.sort(key=lambda m: m.seq)
+        return messages[:params.limit]
+
+    async def stream_archived_messages(self, params: GetMessagesDM) -> AsyncIterator[List[MessageDM]]:
+        # One chat block in memory at a time, files oldest first.
+        files = sorted(
+            (f for f in await self._archives() if params.chat_uuid in f.chats),
+            key=lambda f: f.oldest
+        )
+        for archive in files:
+            messages = await asyncio.to_thread(_read_chat, archive, params.chat_uuid)
+            messages = [m for m in messages if self._matches(m, params)]
+            messages.sort(key=lambda m: (m.timestamp, m.uuid))
+            for start in range(0, len(messages), params.limit):
+                yield messages[start:start + params.limit]
+
+    def _collect(self, files: List[_ArchiveFile], params: GetMessagesDM) -> List[MessageDM]:
+        older = params.after is None
+        files.sort(key=lambda f: f.newest if older else f.oldest, reverse=older)
+        messages: List[MessageDM] = []
+        for archive in files:
+            if len(messages) >= params.limit:
+                edge = messages[params.limit - 1].timestamp
+                if (archive.newest < edge) if older else (archive.oldest > edge):
+                    break
+            oldest, newest = archive.chats[params.chat_uuid][3:5]
+            if params.before is not None and datetime.fromisoformat(oldest) > params.before.timestamp:
+                continue
+            if params.after is not None and datetime.fromisoformat(newest) < params.after.timestamp:
+                continue
+            messages += [m for m in _read_chat(archive, params.chat_uuid) if self._matches(m, params)]
+            messages.sort(key=lambda m: (m.timestamp, m.uuid), reverse=older)
+        messages = messages[:params.limit]
+        if not older:
+            messages.reverse()
+        return messages
+
+    @staticmethod
+    def _matches(message: MessageDM, params: GetMessagesDM) -> bool:
+        if params.user_uuid is not None and params.user_uuid not in (
+            message.sender_uuid, message.recipient_uuid
+        ):
+            return False
+        key = (message.timestamp, message.uuid)
+        if params.before is not None:
+            return key < (params.before.timestamp, params.before.uuid)
+        if params.after is not None:
+            return key > (params.after.timestamp, params.after.uuid)
+        return True
+
+    async def _archives(self) -> List[_ArchiveFile]:
+        async with self._lock:
+            try:
+                version = (await asyncio.to_thread(os.stat, self._directory)).st_mtime_ns
+                if version != self._version:
+                    self._files = await asyncio.to_thread(self._load, {f.path: f for f in self._files})
+                    self._version = version
+            except OSError as e:
+                self._logger.error(f"Messages archive directory {self._directory} is unavailable: {e}")
+                raise ArchiveUnavailableError("Архив сообщений временно недоступен.") from e
+            return self._files
+
+    def _load(self, known: Dict[Path, _ArchiveFile]) -> List[_ArchiveFile]:
+        files = []
+        # iterdir, unlike glob, raises when the directory can't be listed.
+        for path in sorted(p for p in self._directory.iterdir() if p.suffix == ARCHIVE_SUFFIX):
+            if path in known:
+                files.append(known[path])
+                continue
+            try:
+                files.append(_open_archive(path))
+            except (OSError, ValueError) as e:
+                self._logger.error(f"Skipping unreadable messages archive {path.name}: {e}")
+        return files
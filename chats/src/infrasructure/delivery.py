@@ -0,0 +1,49 @@
+from chats.src.application.interfaces import (
+    ChatMembers, DeliverMessages, NotifyChat, NotifyUsers
+)
+from chats.src.config import GroupsConfig
+from chats.src.domain.entities import MessageEventDM
+
+
+class MessageDelivery(DeliverMessages):
+    """
+    Picks how an event reaches the members of its chat.
+
+    A message is stored once per chat; only its delivery depends on the
+    size of the group. Direct messages and groups of up to
+    `fanout_write_limit` members fan out on write: every recipient gets the
+    event in their inbox and on their sockets, as in a direct chat. Larger
+    groups fan out on read: the event is published once on the chat's
+    channel and reaches only the sockets that follow the chat, and other
+    members catch up from the chat's `last_seq` through the seq sync when
+    they open it.
+    """
+
+    def __init__(
+        self,
+        members: ChatMembers,
+        users: NotifyUsers,
+        chats: NotifyChat,
+        config: GroupsConfig,
+    ) -> None:
+        self._members = members
+        self._users = users
+        self._chats = chats
+        self._config = config
+
+    async def deliver(self, event: MessageEventDM) -> None:
+        message = event.message
+        if message.recipient_type != "group":
+            await self._users.notify([str(message.recipient_uuid)], event)
+            return
+        chat_uuid = str(message.chat_uuid)
+        chat = await self._members.get_chat(chat_uuid)
+        if chat is None:
+            return
+        if chat.member_count > self._config.fanout_write_limit:
+            await self._chats.notify_chat(chat_uuid, event)
+            return
+        sender_uuid = str(message.sender_uuid)
+        recipients = [u for u in await self._members.get_members(chat_uuid) if u != sender_uuid]
+        if recipients:
+            await self._users.notify(recipients, event)
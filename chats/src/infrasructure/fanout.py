@@ -0,0 +1,206 @@
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import suppress
+from logging import Logger
+from time import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+
+from chats.src.application.interfaces import MessageInbox, NotifyUsers
+from chats.src.config import FanoutConfig
+from chats.src.domain.entities import MessageEventDM
+from chats.src.infrasructure.hub import ConnectionHub
+from chats.src.infrasructure.protocol import Frame, encode_json
+
+
+NODE_KEY = "chats:node:{node_id}"
+NODE_CHANNEL = "chats:node:{node_id}:events"
+ROUTE_KEY = "chats:route:{user_uuid}"
+
+
+class MessageFanout(NotifyUsers):
+    """
+    Delivers events to the recipients' sockets on every chats node.
+
+    A node heartbeats `chats:node:<id>` with a TTL and adds its id to the
+    `chats:route:<user>` set of every user it holds, refreshing their TTLs
+    on each beat. Events for sockets of this node are written directly; the
+    rest are buffered for `flush_interval`, routed through those sets and
+    published as one message per live destination node on that node's own
+    channel, so a node only receives events for users it holds. Frames that
+    arrive in one message for the same user are coalesced into one write
+    per socket. Every event is first appended to the recipients' inboxes and
+    carries the recipient's inbox cursor, which the client sends back to
+    resync after a reconnect.
+    """
+
+    def __init__(
+        self,
+        hub: ConnectionHub,
+        inbox: MessageInbox,
+        redis_client: Redis,
+        config: FanoutConfig,
+        logger: Logger,
+    ) -> None:
+        self.node_id = uuid4().hex
+        self._hub = hub
+        self._inbox = inbox
+        self._redis = redis_client
+        self._config = config
+        self._logger = logger
+        self._held: Set[str] = set()
+        self._pending: List[Tuple[Sequence[str], Frame]] = []
+        self._ready = asyncio.Event()
+        self._pubsub: Optional[PubSub] = None
+        self._tasks: List[asyncio.Task] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def start(self) -> None:
+        await self._beat()
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(NODE_CHANNEL.format(node_id=self.node_id))
+        self._flusher = asyncio.create_task(self._flush_loop())
+        self._tasks = [
+            asyncio.create_task(self._heartbeat_loop()),
+            asyncio.create_task(self._listen()),
+        ]
+        self._logger.info(f"Chats node {self.node_id} joined the fan-out")
+
+    async def stop(self) -> None:
+        self._closed = True
+        self._ready.set()
+        if self._flusher is not None:
+            await self._flusher
+        for task in self._tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.delete(NODE_KEY.format(node_id=self.node_id))
+            for user_uuid in self._held:
+                pipe.srem(ROUTE_KEY.format(user_uuid=user_uuid), self.node_id)
+            await pipe.execute()
+
+    async def attach(self, user_uuid: str) -> None:
+        if user_uuid in self._held:
+            return
+        self._held.add(user_uuid)
+        route = ROUTE_KEY.format(user_uuid=user_uuid)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(route, self.node_id)
+            pipe.expire(route, self._config.node_ttl)
+            await pipe.execute()
+
+    async def detach(self, user_uuid: str) -> None:
+        if user_uuid not in self._held or self._hub.is_online(user_uuid):
+            return
+        self._held.discard(user_uuid)
+        await self._redis.srem(ROUTE_KEY.format(user_uuid=user_uuid), self.node_id)
+
+    async def notify(self, user_uuids: Sequence[str], event: MessageEventDM) -> None:
+        try:
+            cursors = await self._inbox.append(user_uuids, event)
+        except Exception as e:
+            # Live delivery does not depend on the inbox; the event is only
+            # missing from a later resync.
+            self._logger.error(f"Failed to record event in inboxes of {list(user_uuids)}: {e}")
+            cursors = {}
+        message = event.message.to_dict()
+        for user_uuid in set(user_uuids):
+            frame = {"type": event.event, "message": message, "cursor": cursors.get(user_uuid)}
+            await self._hub.send([user_uuid], frame)
+            if not self._closed:
+                self._pending.append(([user_uuid], frame))
+        self._ready.set()
+
+    async def _flush_loop(self) -> None:
+        while not (self._closed and not self._pending):
+            await self._ready.wait()
+            if not self._closed:
+                await asyncio.sleep(self._config.flush_interval)
+            batch = self._pending[:self._config.max_batch_size]
+            self._pending = self._pending[self._config.max_batch_size:]
+            if not self._pending:
+                self._ready.clear()
+            try:
+                await self._publish(batch)
+            except Exception as e:
+                self._logger.error(f"Fan-out of {len(batch)} events failed: {e}")
+
+    async def _publish(self, batch: List[Tuple[Sequence[str], Frame]]) -> None:
+        recipients = sorted({user_uuid for user_uuids, _ in batch for user_uuid in user_uuids})
+        if not recipients:
+            return
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for user_uuid in recipients:
+                pipe.smembers(ROUTE_KEY.format(user_uuid=user_uuid))
+            routes = await pipe.execute()
+        nodes_by_user = {
+            user_uuid: {node.decode() for node in nodes} - {self.node_id}
+            for user_uuid, nodes in zip(recipients, routes)
+        }
+        nodes = set().union(*nodes_by_user.values())
+        if not nodes:
+            return
+        alive = await self._alive(nodes)
+        events: Dict[str, List[Tuple[List[str], Frame]]] = defaultdict(list)
+        for user_uuids, frame in batch:
+            targets: Dict[str, List[str]] = defaultdict(list)
+            for user_uuid in set(user_uuids):
+                for node in nodes_by_user[user_uuid] & alive:
+                    targets[node].append(user_uuid)
+            for node, node_users in targets.items():
+                events[node].append((node_users, frame))
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for node, node_events in events.items():
+                pipe.publish(NODE_CHANNEL.format(node_id=node), encode_json(node_events))
+            for user_uuid, user_nodes in nodes_by_user.items():
+                if dead := user_nodes - alive:
+                    pipe.srem(ROUTE_KEY.format(user_uuid=user_uuid), *dead)
+            await pipe.execute()
+
+    async def _alive(self, nodes: Iterable[str]) -> Set[str]:
+        nodes = list(nodes)
+        beats = await self._redis.mget([NODE_KEY.format(node_id=node) for node in nodes])
+        return {node for node, beat in zip(nodes, beats) if beat is not None}
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message["type"] == "message":
+                        await self._deliver(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._logger.error(f"Fan-out subscription failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _deliver(self, events: List[Tuple[List[str], Frame]]) -> None:
+        frames: Dict[str, List[Frame]] = defaultdict(list)
+        for user_uuids, frame in events:
+            for user_uuid in user_uuids:
+                frames[user_uuid].append(frame)
+        await self._hub.send_coalesced(frames)
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._config.heartbeat_interval)
+            try:
+                await self._beat()
+            except Exception as e:
+                self._logger.error(f"Fan-out heartbeat failed: {e}")
+
+    async def _beat(self) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(NODE_KEY.format(node_id=self.node_id), int(time()), ex=self._config.node_ttl)
+            for user_uuid in self._held:
+                pipe.expire(ROUTE_KEY.format(user_uuid=user_uuid), self._config.node_ttl)
+            await pipe.execute()
@@ -1,6 +1,7 @@
+from base64 import urlsafe_b64decode
 from datetime import datetime, timezone
-from typing import List
-import uuid
+from typing import AsyncIterator, List, Optional, Sequence
+import json
 
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,84 +9,277 @@ from sqlalchemy import text
 
 from chats.src.config import AuthConfig
 from chats.src.application.interfaces import (
-    GetMessages, SendMessage,
+    GetMessages, StoreMessages,
     DeleteMessage, EditMessage,
-    AuthService
+    ExportMessages, SearchMessages, SyncMessages,
+    ChatDirectory, AuthService
 )
 from chats.src.domain.entities import (
-    DeleteMessageDM, EditMessageDM, GetMessagesDM, 
-    MessageDM, SendMessageDM
+    ChatDM, ChatMemberDM, CreateGroupDM,
+    DeleteMessageDM, EditMessageDM, FoundMessageDM, GetMessagesDM, 
+    MessageDM, SearchMessagesDM, SendMessageDM, SyncMessagesDM
 )
 
 
-class Gateways(
-    GetMessages, SendMessage, DeleteMessage, 
-    EditMessage, AuthService
-):
+MESSAGE_COLUMNS = """
+    uuid, chat_uuid, sender_type, sender_uuid,
+    recipient_type, recipient_uuid,
+    message, timestamp, is_edited, edited_at, seq
+"""
+
+CHAT_COLUMNS = "uuid, kind, title, member_count, last_seq"
+
 
-    def __init__(
-        self,
-        auth_config: AuthConfig,
-        session: AsyncSession,
-    ) -> None:
+def _token_expiry(token: str) -> Optional[float]:
+    # The auth service has already checked the signature; only the claims
+    # are read here.
+    try:
+        claims = token.split(".")[1]
+        return json.loads(urlsafe_b64decode(claims + "=" * (-len(claims) % 4))).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+class AuthGateway(AuthService):
+    def __init__(self, auth_config: AuthConfig, client: httpx.AsyncClient) -> None:
         self._auth_config = auth_config
-        self._session = session
+        self._client = client
 
     async def verify_token_with_auth_service(self, token: str) -> dict:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+        # An unreachable or failing auth service says nothing about the token.
+        try:
+            response = await self._client.post(
                 url=self._auth_config.url,
                 json={"token": token}
             )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise ValueError("Токен недействителен или истёк.")
+        except httpx.HTTPError as e:
+            raise ConnectionError("Сервис авторизации недоступен.") from e
+        if response.status_code >= 500:
+            raise ConnectionError("Сервис авторизации недоступен.")
+        if response.status_code == 200:
+            user_data = response.json()
+            user_data.setdefault("exp", _token_expiry(token))
+            return user_data
+        else:
+            raise ValueError("Токен недействителен или истёк.")
+
+
+def _chat(row) -> ChatDM:
+    return ChatDM(**{**row, "uuid": str(row["uuid"])})
+
+
+class Gateways(
+    GetMessages, StoreMessages, DeleteMessage, 
+    EditMessage, SearchMessages, ExportMessages, SyncMessages,
+    ChatDirectory
+):
 
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
 
-    async def handle_message(self, params: SendMessageDM) -> None:
-        message_uuid = str(uuid.uuid4())
-        sql = text("""
+    async def insert_messages(self, params: List[SendMessageDM]) -> List[MessageDM]:
+        # Every chat of the batch gets a contiguous range of sequence
+        # numbers from chats.last_seq. The chat rows stay locked until
+        # commit, so numbers of one chat follow commit order; they are
+        # locked in uuid order first so that concurrent batches sharing
+        # chats cannot deadlock. Within a chat, numbers and clock_timestamp()
+        # both advance in submission order.
+        chat_uuids = sorted({p.chat_uuid for p in params})
+        await self._session.execute(
+            text("""
+                SELECT uuid FROM chats
+                WHERE uuid = ANY(CAST(:chat_uuids AS uuid[]))
+                ORDER BY uuid
+                FOR UPDATE
+            """),
+            {"chat_uuids": chat_uuids}
+        )
+        sql = text(f"""
+            WITH batch AS (
+                SELECT *
+                FROM unnest(
+                    CAST(:uuids AS uuid[]), CAST(:chat_uuids AS uuid[]),
+                    CAST(:sender_types AS varchar[]), CAST(:sender_uuids AS uuid[]),
+                    CAST(:recipient_types AS varchar[]), CAST(:recipient_uuids AS uuid[]),
+                    CAST(:messages AS text[])
+                ) WITH ORDINALITY AS batch (
+                    uuid, chat_uuid, sender_type, sender_uuid,
+                    recipient_type, recipient_uuid, message, position
+                )
+            ),
+            counters AS (
+                UPDATE chats
+                SET last_seq = chats.last_seq + added.total
+                FROM (SELECT chat_uuid, count(*) AS total FROM batch GROUP BY chat_uuid) AS added
+                WHERE chats.uuid = added.chat_uuid
+                RETURNING chats.uuid AS chat_uuid, chats.last_seq - added.total AS first_seq
+            )
             INSERT INTO messages (
                 uuid, chat_uuid, sender_type, sender_uuid, 
                 recipient_type, recipient_uuid, 
-                message
-            ) VALUES (
-                :uuid, :chat_uuid, :sender_type, :sender_uuid, 
-                :recipient_type, :recipient_uuid, 
-                :message
+                message, timestamp, is_edited, seq
             )
+            SELECT
+                batch.uuid, batch.chat_uuid, batch.sender_type, batch.sender_uuid,
+                batch.recipient_type, batch.recipient_uuid,
+                batch.message, clock_timestamp(), FALSE,
+                counters.first_seq + row_number() OVER (
+                    PARTITION BY batch.chat_uuid ORDER BY batch.position
+                )
+            FROM batch
+            JOIN counters ON counters.chat_uuid = batch.chat_uuid
+            RETURNING {MESSAGE_COLUMNS}
         """)
-        await self._session.execute(sql, {
-            "uuid": message_uuid,
-            "chat_uuid": params.chat_uuid,
-            "sender_type": params.user_type,
-            "sender_uuid": params.user_uuid,
-            "recipient_type": params.recipient_type,
-            "recipient_uuid": params.recipient_uuid,
-            "message": params.message
+        result = await self._session.execute(sql, {
+            "uuids": [p.uuid for p in params],
+            "chat_uuids": [p.chat_uuid for p in params],
+            "sender_types": [p.user_type for p in params],
+            "sender_uuids": [p.user_uuid for p in params],
+            "recipient_types": [p.recipient_type for p in params],
+            "recipient_uuids": [p.recipient_uuid for p in params],
+            "messages": [p.message for p in params]
         })
+        messages = {str(row["uuid"]): MessageDM(**row) for row in result.mappings()}
+        if len(messages) < len(params):
+            raise LookupError("Чат не найден.")
+        return [messages[p.uuid] for p in params]
+
+    async def get_last_seq(self, chat_uuid: str) -> int:
+        query = text("SELECT last_seq FROM chats WHERE uuid = :chat_uuid")
+        result = await self._session.execute(query, {"chat_uuid": chat_uuid})
+        return result.scalar_one_or_none() or 0
 
+    async def get_messages_after_seq(self, params: SyncMessagesDM) -> List[MessageDM]:
+        participant = ""
+        query_params = {
+            "chat_uuid": params.chat_uuid,
+            "after_seq": params.after_seq,
+            "limit": params.limit,
+        }
+        if params.user_uuid is not None:
+            participant = "AND (sender_uuid = :user_uuid OR recipient_uuid = :user_uuid)"
+            query_params["user_uuid"] = params.user_uuid
+        query = text(f"""
+            SELECT {MESSAGE_COLUMNS}
+            FROM messages
+            WHERE chat_uuid = :chat_uuid AND seq > :after_seq
+                {participant}
+            ORDER BY seq
+            LIMIT :limit
+        """)
+        result = await self._session.execute(statement=query, params=query_params)
+        return [MessageDM(**row) for row in result.mappings()]
 
     async def get_chat_messages(self, params: GetMessagesDM) -> List[MessageDM]:
-        query = text("""
-            SELECT * 
+        # Served by ix_messages_chat_timestamp_uuid: the row comparison and
+        # the ordering follow the index, so a page costs the same at any depth.
+        cursor, order, participant = "", "DESC", ""
+        query_params = {
+            "chat_uuid": params.chat_uuid,
+            "limit": params.limit,
+        }
+        if params.user_uuid is not None:
+            participant = "AND (sender_uuid = :user_uuid OR recipient_uuid = :user_uuid)"
+            query_params["user_uuid"] = params.user_uuid
+        if params.before is not None:
+            cursor = "AND (timestamp, uuid) < (:cursor_timestamp, CAST(:cursor_uuid AS uuid))"
+            query_params.update(cursor_timestamp=params.before.timestamp, cursor_uuid=params.before.uuid)
+        elif params.after is not None:
+            cursor, order = "AND (timestamp, uuid) > (:cursor_timestamp, CAST(:cursor_uuid AS uuid))", "ASC"
+            query_params.update(cursor_timestamp=params.after.timestamp, cursor_uuid=params.after.uuid)
+        query = text(f"""
+            SELECT {MESSAGE_COLUMNS}
             FROM messages
             WHERE chat_uuid = :chat_uuid
-            ORDER BY timestamp DESC
-            LIMIT :limit OFFSET :offset
+                {participant}
+                {cursor}
+            ORDER BY timestamp {order}, uuid {order}
+            LIMIT :limit
         """)
-        result = await self._session.execute(
-            statement=query, 
-            params={
-                "chat_uuid": params.chat_uuid,
-                "limit": params.limit,
-                "offset": params.offset
-        })
-        return [MessageDM(**row) for row in result.mappings()]
+        result = await self._session.execute(statement=query, params=query_params)
+        messages = [MessageDM(**row) for row in result.mappings()]
+        if params.after is not None:
+            messages.reverse()
+        return messages
+
+    async def stream_chat_messages(self, params: GetMessagesDM) -> AsyncIterator[List[MessageDM]]:
+        # One query over a server-side cursor, fetched `limit` rows at a
+        # time, oldest first along ix_messages_chat_timestamp_uuid.
+        cursor, participant = "", ""
+        query_params = {"chat_uuid": params.chat_uuid}
+        if params.user_uuid is not None:
+            participant = "AND (sender_uuid = :user_uuid OR recipient_uuid = :user_uuid)"
+            query_params["user_uuid"] = params.user_uuid
+        if params.after is not None:
+            cursor = "AND (timestamp, uuid) > (:cursor_timestamp, CAST(:cursor_uuid AS uuid))"
+            query_params.update(cursor_timestamp=params.after.timestamp, cursor_uuid=params.after.uuid)
+        query = text(f"""
+            SELECT {MESSAGE_COLUMNS}
+            FROM messages
+            WHERE chat_uuid = :chat_uuid
+                {participant}
+                {cursor}
+            ORDER BY timestamp ASC, uuid ASC
+        """)
+        result = await self._session.stream(
+            query,
+            query_params,
+            execution_options={"yield_per": params.limit}
+        )
+        async for rows in result.mappings().partitions(params.limit):
+            yield [MessageDM(**row) for row in rows]
+
+    async def search_messages(self, params: SearchMessagesDM) -> List[FoundMessageDM]:
+        # Matches come from ix_messages_search_vector; the scope filters and
+        # the ranking apply to the matches only. The rank is the same real
+        # value on every page, so (rank, timestamp, uuid) is a stable key.
+        scope, cursor = "", ""
+        query_params = {
+            "query": params.query,
+            "user_uuid": params.user_uuid,
+            "limit": params.limit,
+        }
+        if params.chat_uuid is not None:
+            scope = "AND chat_uuid = :chat_uuid"
+            query_params["chat_uuid"] = params.chat_uuid
+        if params.after is not None:
+            cursor = """
+                WHERE (rank, timestamp, uuid)
+                    < (CAST(:cursor_rank AS real), :cursor_timestamp, CAST(:cursor_uuid AS uuid))
+            """
+            query_params.update(
+                cursor_rank=params.after.rank,
+                cursor_timestamp=params.after.timestamp,
+                cursor_uuid=params.after.uuid
+            )
+        query = text(f"""
+            SELECT {MESSAGE_COLUMNS}, rank
+            FROM (
+                SELECT {MESSAGE_COLUMNS}, ts_rank(search_vector, query) AS rank
+                FROM messages, websearch_to_tsquery('russian', :query) AS query
+                WHERE search_vector @@ query
+                    AND (
+                        sender_uuid = :user_uuid OR recipient_uuid = :user_uuid
+                        OR chat_uuid IN (
+                            SELECT chat_uuid FROM chat_members WHERE user_uuid = :user_uuid
+                        )
+                    )
+                    {scope}
+            ) AS found
+            {cursor}
+            ORDER BY rank DESC, timestamp DESC, uuid DESC
+            LIMIT :limit
+        """)
+        result = await self._session.execute(statement=query, params=query_params)
+        found = []
+        for row in result.mappings():
+            columns = dict(row)
+            rank = columns.pop("rank")
+            found.append(FoundMessageDM(message=MessageDM(**columns), rank=rank))
+        return found
 
     async def edit_message(self, params: EditMessageDM) -> MessageDM:
-        query = text("""
+        query = text(f"""
             UPDATE messages
             SET 
                 message = :new_content,
@@ -93,6 +287,7 @@ class Gateways(
                 edited_at = :edited_at
             WHERE 
                 uuid = :message_id AND chat_uuid = :chat_id AND sender_uuid = :user_id
+            RETURNING {MESSAGE_COLUMNS}
         """)
         result = await self._session.execute(query, {
             "new_content": params.new_content,
@@ -106,17 +301,106 @@ class Gateways(
         else:
             raise PermissionError("Вы можете редактировать только свои сообщения.")
 
-    async def delete_message(self, params: DeleteMessageDM) -> None:
-        query = text("""
+    async def delete_message(self, params: DeleteMessageDM) -> MessageDM:
+        query = text(f"""
             DELETE FROM messages
             WHERE uuid = :message_id AND chat_uuid = :chat_id AND sender_uuid = :user_id
+            RETURNING {MESSAGE_COLUMNS}
         """)
         result = await self._session.execute(query, {
             "message_id": params.message_uuid,
             "chat_id": params.chat_uuid,
             "user_id": params.user_uuid
         })
-        if result.fetchone():
-            await self._session.commit()
+        if row := result.mappings().first():
+            return MessageDM(**row)
         else:
-            raise PermissionError("Вы можете удалять только свои сообщения.")
\ No newline at end of file
+            raise PermissionError("Вы можете удалять только свои сообщения.")
+
+    async def get_chat(self, chat_uuid: str) -> Optional[ChatDM]:
+        query = text(f"SELECT {CHAT_COLUMNS} FROM chats WHERE uuid = :chat_uuid")
+        result = await self._session.execute(query, {"chat_uuid": chat_uuid})
+        if row := result.mappings().first():
+            return _chat(row)
+        return None
+
+    async def get_member(self, chat_uuid: str, user_uuid: str) -> Optional[ChatMemberDM]:
+        query = text("""
+            SELECT chat_uuid, user_uuid, role
+            FROM chat_members
+            WHERE chat_uuid = :chat_uuid AND user_uuid = :user_uuid
+        """)
+        result = await self._session.execute(query, {"chat_uuid": chat_uuid, "user_uuid": user_uuid})
+        if row := result.mappings().first():
+            return ChatMemberDM(chat_uuid=str(row["chat_uuid"]), user_uuid=str(row["user_uuid"]), role=row["role"])
+        return None
+
+    async def get_member_uuids(self, chat_uuid: str) -> List[str]:
+        query = text("SELECT user_uuid FROM chat_members WHERE chat_uuid = :chat_uuid")
+        result = await self._session.execute(query, {"chat_uuid": chat_uuid})
+        return [str(user_uuid) for user_uuid in result.scalars()]
+
+    async def get_user_groups(self, user_uuid: str) -> List[ChatDM]:
+        # ix_chat_members_user_chat finds the memberships of the user.
+        query = text(f"""
+            SELECT {", ".join(f"chats.{column}" for column in CHAT_COLUMNS.split(", "))}
+            FROM chat_members
+            JOIN chats ON chats.uuid = chat_members.chat_uuid
+            WHERE chat_members.user_uuid = :user_uuid AND chats.kind = 'group'
+            ORDER BY chat_members.joined_at DESC
+        """)
+        result = await self._session.execute(query, {"user_uuid": user_uuid})
+        return [_chat(row) for row in result.mappings()]
+
+    async def create_group(self, params: CreateGroupDM) -> ChatDM:
+        await self._session.execute(
+            text("""
+                WITH chat AS (
+                    INSERT INTO chats (uuid, created_at, kind, title, member_count)
+                    VALUES (:chat_uuid, now(), 'group', :title, 1)
+                    RETURNING uuid
+                )
+                INSERT INTO chat_members (chat_uuid, user_uuid, role)
+                SELECT uuid, :owner_uuid, 'owner' FROM chat
+            """),
+            {"chat_uuid": params.uuid, "title": params.title, "owner_uuid": params.owner_uuid}
+        )
+        return await self.add_members(params.uuid, params.member_uuids)
+
+    async def add_members(self, chat_uuid: str, user_uuids: Sequence[str]) -> ChatDM:
+        # member_count moves by the rows actually changed, under the lock of
+        # the UPDATE, so concurrent changes of one group add up.
+        query = text(f"""
+            WITH added AS (
+                INSERT INTO chat_members (chat_uuid, user_uuid, role)
+                SELECT CAST(:chat_uuid AS uuid), user_uuid, 'member'
+                FROM unnest(CAST(:user_uuids AS uuid[])) AS user_uuid
+                ON CONFLICT DO NOTHING
+                RETURNING user_uuid
+            )
+            UPDATE chats
+            SET member_count = member_count + (SELECT count(*) FROM added)
+            WHERE uuid = :chat_uuid
+            RETURNING {CHAT_COLUMNS}
+        """)
+        result = await self._session.execute(query, {"chat_uuid": chat_uuid, "user_uuids": list(user_uuids)})
+        if row := result.mappings().first():
+            return _chat(row)
+        raise LookupError("Чат не найден.")
+
+    async def remove_member(self, chat_uuid: str, user_uuid: str) -> ChatDM:
+        query = text(f"""
+            WITH removed AS (
+                DELETE FROM chat_members
+                WHERE chat_uuid = :chat_uuid AND user_uuid = :user_uuid
+                RETURNING user_uuid
+            )
+            UPDATE chats
+            SET member_count = member_count - (SELECT count(*) FROM removed)
+            WHERE uuid = :chat_uuid
+            RETURNING {CHAT_COLUMNS}
+        """)
+        result = await self._session.execute(query, {"chat_uuid": chat_uuid, "user_uuid": user_uuid})
+        if row := result.mappings().first():
+            return _chat(row)
+        raise LookupError("Чат не найден.")
@@ -0,0 +1,22 @@
+from importlib.util import find_spec
+from logging import Logger
+
+import httpx
+
+from chats.src.config import AuthConfig
+
+
+def new_http_client(auth_config: AuthConfig, logger: Logger) -> httpx.AsyncClient:
+    http2 = auth_config.http2
+    if http2 and find_spec("h2") is None:
+        logger.warning("h2 is not installed, the auth client falls back to HTTP/1.1")
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=auth_config.timeout,
+        limits=httpx.Limits(
+            max_connections=auth_config.max_connections,
+            max_keepalive_connections=auth_config.max_keepalive_connections,
+            keepalive_expiry=auth_config.keepalive_expiry,
+        ),
+    )
@@ -0,0 +1,313 @@
+import asyncio
+from collections import defaultdict, deque
+from contextlib import suppress
+from datetime import datetime, timezone
+from hashlib import sha256
+from logging import Logger
+from typing import Callable, Deque, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from litestar import WebSocket
+
+from chats.src.config import SendQueueConfig
+from chats.src.domain.entities import UserDM
+from chats.src.infrasructure.metrics import SocketMetrics
+from chats.src.infrasructure.protocol import EncodedFrame, Frame, FrameCodec
+
+
+def _discard(index: Dict[str, Set["ClientConnection"]], key: str, connection: "ClientConnection") -> None:
+    connections = index.get(key)
+    if connections is None:
+        return
+    connections.discard(connection)
+    if not connections:
+        del index[key]
+
+
+def token_fingerprint(token: str) -> str:
+    return sha256(token.encode()).hexdigest()
+
+
+class _Queued:
+    __slots__ = ("key", "frame", "data", "droppable")
+
+    def __init__(
+        self,
+        key: Optional[Tuple[str, str]],
+        frame: Optional[Frame],
+        data: EncodedFrame,
+        droppable: bool,
+    ) -> None:
+        self.key = key
+        self.frame = frame
+        self.data = data
+        self.droppable = droppable
+
+
+def _coalesce_key(frame: Optional[Frame]) -> Optional[Tuple[str, str]]:
+    # Only state that a later frame fully supersedes can be merged.
+    if frame is not None and frame.get("type") == "presence":
+        return "presence", frame["chat_uuid"]
+    return None
+
+
+class ClientConnection:
+    """
+    One authenticated socket with a bounded outbound queue drained by its
+    own writer task, which writes everything waiting as one frame or batch.
+
+    Pushes never wait. When the queue is full the slow-consumer policy
+    applies: `drop_oldest` drops the oldest queued push, `coalesce` also
+    merges presence frames of one chat while they wait, and `disconnect`
+    closes the socket. The client is told how many frames it lost with a
+    `{"type": "dropped", "count": ...}` frame and resyncs its inbox.
+    Replies to the client's own frames are never dropped; they wait for
+    room instead, which stops reading from a client that does not read.
+    """
+
+    def __init__(
+        self,
+        user: UserDM,
+        socket: WebSocket,
+        fingerprint: str,
+        codec: FrameCodec,
+        config: SendQueueConfig,
+        metrics: SocketMetrics,
+    ) -> None:
+        self.user = user
+        self.socket = socket
+        self.fingerprint = fingerprint
+        self.codec = codec
+        self.closed = False
+        self.high_water = 0
+        self._config = config
+        self._metrics = metrics
+        self._queue: Deque[_Queued] = deque()
+        self._keyed: Dict[Tuple[str, str], _Queued] = {}
+        self._dropped = 0
+        self._ready = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._on_failure: Optional[Callable[["ClientConnection", str], None]] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._closer: Optional[asyncio.Task] = None
+
+    def seconds_left(self) -> Optional[float]:
+        if self.user.expires_at is None:
+            return None
+        return max(0.0, (self.user.expires_at - datetime.now(timezone.utc)).total_seconds())
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def start(self, on_failure: Callable[["ClientConnection", str], None]) -> None:
+        self._on_failure = on_failure
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self) -> None:
+        self.closed = True
+        self._room.set()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._writer
+
+    async def close(self, code: int, reason: str) -> None:
+        await self.stop()
+        with suppress(Exception):
+            await self.socket.close(code=code, reason=reason)
+
+    def push(self, data: EncodedFrame, frame: Optional[Frame] = None) -> None:
+        if self.closed:
+            return
+        key = _coalesce_key(frame) if self._config.policy == "coalesce" else None
+        if key is not None and (queued := self._keyed.get(key)) is not None:
+            queued.frame = {**queued.frame, "users": {**queued.frame["users"], **frame["users"]}}
+            queued.data = self.codec.encode(queued.frame)
+            self._metrics.frames_coalesced_total += 1
+            return
+        if len(self._queue) >= self._config.max_frames:
+            if self._config.policy == "disconnect":
+                self._metrics.slow_disconnects_total += 1
+                self._fail("Клиент не успевает принимать сообщения.", 1008)
+                return
+            self._dropped += 1
+            self._metrics.frames_dropped_total += 1
+            if not self._drop_oldest():
+                return
+        self._append(_Queued(key, frame, data, True))
+
+    async def send_frame(self, frame: Frame) -> None:
+        while not self.closed and len(self._queue) >= self._config.max_frames:
+            self._room.clear()
+            await self._room.wait()
+        if not self.closed:
+            self._append(_Queued(None, frame, self.codec.encode(frame), False))
+
+    def _append(self, queued: _Queued) -> None:
+        self._queue.append(queued)
+        if queued.key is not None:
+            self._keyed[queued.key] = queued
+        depth = len(self._queue)
+        if depth > self.high_water:
+            self.high_water = depth
+        self._metrics.record_depth(depth)
+        self._ready.set()
+
+    def _drop_oldest(self) -> bool:
+        for index, queued in enumerate(self._queue):
+            if queued.droppable:
+                del self._queue[index]
+                if queued.key is not None:
+                    del self._keyed[queued.key]
+                return True
+        # Only replies are waiting; the new push is the one dropped.
+        return False
+
+    async def _write_loop(self) -> None:
+        while True:
+            await self._ready.wait()
+            if self.closed:
+                return
+            parts = [queued.data for queued in self._queue]
+            self._queue.clear()
+            self._keyed.clear()
+            self._ready.clear()
+            self._room.set()
+            if self._dropped:
+                parts.insert(0, self.codec.encode({"type": "dropped", "count": self._dropped}))
+                self._dropped = 0
+            if not parts:
+                continue
+            data = parts[0] if len(parts) == 1 else self.codec.batch(parts)
+            try:
+                await asyncio.wait_for(self._send(data), self._config.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                self._metrics.slow_disconnects_total += 1
+                self._fail("Клиент не успевает принимать сообщения.", 1008)
+                return
+            except Exception as e:
+                self._metrics.write_failures_total += 1
+                self._fail(str(e), 1011)
+                return
+            self._metrics.writes_total += 1
+
+    async def _send(self, data: EncodedFrame) -> None:
+        if isinstance(data, bytes):
+            await self.socket.send_bytes(data)
+        else:
+            await self.socket.send_text(data)
+
+    def _fail(self, reason: str, code: int) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        self._keyed.clear()
+        self._ready.clear()
+        self._room.set()
+        if self._on_failure is not None:
+            self._on_failure(self, reason)
+        self._closer = asyncio.create_task(self.close(code, reason))
+
+
+class ConnectionHub:
+    """
+    Maps user UUIDs to the sockets they hold open on this node. An event is
+    encoded once per frame codec in use and queued on every socket of every
+    recipient without waiting for any of them; a socket whose writer fails
+    or falls too far behind is dropped from the hub.
+    """
+
+    def __init__(self, logger: Logger) -> None:
+        self._logger = logger
+        self._connections: Dict[str, Set[ClientConnection]] = defaultdict(set)
+        self._by_token: Dict[str, Set[ClientConnection]] = defaultdict(set)
+
+    def register(self, connection: ClientConnection) -> None:
+        self._connections[connection.user.uuid].add(connection)
+        self._by_token[connection.fingerprint].add(connection)
+        connection.start(self._drop)
+
+    def unregister(self, connection: ClientConnection) -> None:
+        _discard(self._connections, connection.user.uuid, connection)
+        _discard(self._by_token, connection.fingerprint, connection)
+
+    def reauthenticate(self, connection: ClientConnection, user: UserDM, fingerprint: str) -> None:
+        _discard(self._by_token, connection.fingerprint, connection)
+        connection.user = user
+        connection.fingerprint = fingerprint
+        self._by_token[fingerprint].add(connection)
+
+    async def revoke(self, fingerprint: str) -> None:
+        connections = list(self._by_token.get(fingerprint, ()))
+        for connection in connections:
+            self.unregister(connection)
+        await asyncio.gather(
+            *(c.close(code=4001, reason="Токен отозван.") for c in connections),
+            return_exceptions=True
+        )
+
+    def is_online(self, user_uuid: str) -> bool:
+        return user_uuid in self._connections
+
+    @property
+    def users(self) -> List[str]:
+        return list(self._connections)
+
+    @property
+    def connections_count(self) -> int:
+        return sum(len(connections) for connections in self._connections.values())
+
+    @property
+    def queued_frames(self) -> int:
+        return sum(c.queued for connections in self._connections.values() for c in connections)
+
+    async def send(self, user_uuids: Sequence[str], frame: Frame) -> None:
+        await self.broadcast(
+            [c for user_uuid in set(user_uuids) for c in self._connections.get(user_uuid, ())],
+            frame
+        )
+
+    async def broadcast(self, connections: Iterable[ClientConnection], frame: Frame) -> int:
+        """Queues one frame on the given sockets, encoded once per codec;
+        returns the number of sockets."""
+        encoded: Dict[FrameCodec, EncodedFrame] = {}
+        count = 0
+        for connection in connections:
+            codec = connection.codec
+            if codec not in encoded:
+                encoded[codec] = codec.encode(frame)
+            connection.push(encoded[codec], frame)
+            count += 1
+        return count
+
+    async def send_coalesced(self, frames: Mapping[str, List[Frame]]) -> None:
+        """Queues every user's frames on each of their sockets; the socket's
+        writer sends what is waiting as one `batch` frame. A frame shared by
+        several users is encoded once per codec."""
+        encoded: Dict[Tuple[FrameCodec, int], EncodedFrame] = {}
+        for user_uuid, user_frames in frames.items():
+            for connection in self._connections.get(user_uuid, ()):
+                codec = connection.codec
+                for frame in user_frames:
+                    key = (codec, id(frame))
+                    if key not in encoded:
+                        encoded[key] = codec.encode(frame)
+                    connection.push(encoded[key], frame)
+
+    def _drop(self, connection: ClientConnection, reason: str) -> None:
+        self._logger.info(f"Dropping socket of user {connection.user.uuid}: {reason}")
+        self.unregister(connection)
+
+    async def close(self) -> None:
+        connections = [c for group in self._connections.values() for c in group]
+        self._connections.clear()
+        self._by_token.clear()
+        await asyncio.gather(
+            *(c.close(code=1001, reason="Сервер остановлен.") for c in connections),
+            return_exceptions=True
+        )
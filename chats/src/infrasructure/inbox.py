@@ -0,0 +1,98 @@
+from logging import Logger
+from time import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from redis.asyncio import Redis
+
+from chats.src.application.interfaces import MessageInbox
+from chats.src.config import InboxConfig
+from chats.src.domain.entities import InboxEntryDM, InboxPageDM, MessageEventDM
+from chats.src.infrasructure.recent import decode_message, encode_message
+
+
+INBOX_KEY = "chats:inbox:{user_uuid}"
+
+# Besides the entries after the cursor, returns the id of the newest entry
+# the stream has trimmed, if it trimmed any (Redis 7).
+READ_SCRIPT = """
+local entries = redis.call('XRANGE', KEYS[1], '(' .. ARGV[1], '+', 'COUNT', ARGV[2])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {entries, false}
+end
+local info = redis.call('XINFO', 'STREAM', KEYS[1])
+for i = 1, #info, 2 do
+    if info[i] == 'max-deleted-entry-id' then
+        return {entries, info[i + 1]}
+    end
+end
+return {entries, false}
+"""
+
+
+def parse_cursor(cursor: str) -> Tuple[int, int]:
+    milliseconds, _, sequence = cursor.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+def _text(value: bytes) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisInbox(MessageInbox):
+    """
+    One Redis stream per user, `chats:inbox:<user>`, holding every event
+    addressed to them whether or not they were online. Entry ids are the
+    cursors clients keep; streams are trimmed to about `max_length` entries
+    and expire `ttl` seconds after the last event. A cursor older than what
+    is left is reported as a gap, and the client falls back to paging chat
+    history.
+    """
+
+    def __init__(self, redis_client: Redis, config: InboxConfig, logger: Logger) -> None:
+        self._redis = redis_client
+        self._config = config
+        self._logger = logger
+        self._read = redis_client.register_script(READ_SCRIPT)
+
+    async def append(self, user_uuids: Sequence[str], event: MessageEventDM) -> Dict[str, str]:
+        user_uuids = list(dict.fromkeys(user_uuids))
+        fields = {"e": event.event, "m": encode_message(event.message)}
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for user_uuid in user_uuids:
+                key = INBOX_KEY.format(user_uuid=user_uuid)
+                pipe.xadd(key, fields, maxlen=self._config.max_length, approximate=True)
+                pipe.expire(key, self._config.ttl)
+            results = await pipe.execute()
+        return {user_uuid: _text(entry_id) for user_uuid, entry_id in zip(user_uuids, results[::2])}
+
+    async def read(self, user_uuid: str, cursor: Optional[str], limit: int) -> InboxPageDM:
+        key = INBOX_KEY.format(user_uuid=user_uuid)
+        if cursor is None:
+            # Nothing to catch up on yet; the client starts from the tail.
+            tail = await self._redis.xrevrange(key, count=1)
+            return InboxPageDM(
+                entries=[],
+                cursor=_text(tail[0][0]) if tail else None,
+                complete=True,
+                gap=False
+            )
+        entries, trimmed = await self._read(keys=[key], args=[cursor, limit + 1])
+        if trimmed is not None:
+            gap = parse_cursor(cursor) < parse_cursor(_text(trimmed))
+        else:
+            # A stream that expired as a whole only held events older than
+            # its ttl; a cursor that recent cannot have missed any.
+            gap = not entries and parse_cursor(cursor)[0] < (time() - self._config.ttl) * 1000
+        page = []
+        for entry_id, values in entries[:limit]:
+            fields = dict(zip(values[::2], values[1::2]))
+            page.append(InboxEntryDM(
+                cursor=_text(entry_id),
+                event=MessageEventDM(event=_text(fields[b"e"]), message=decode_message(fields[b"m"]))
+            ))
+        return InboxPageDM(
+            entries=page,
+            cursor=page[-1].cursor if page else cursor,
+            complete=len(entries) <= limit,
+            gap=gap
+        )
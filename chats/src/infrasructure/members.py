@@ -0,0 +1,103 @@
+from typing import List, Optional
+
+from redis.asyncio import Redis
+
+from chats.src.application.interfaces import ChatDirectory, ChatMembers
+from chats.src.config import GroupsConfig
+from chats.src.domain.entities import ChatDM
+
+
+CHAT_INFO_KEY = "chats:chat:{chat_uuid}:info"
+CHAT_MEMBERS_KEY = "chats:chat:{chat_uuid}:members"
+
+# Members are written in chunks so that a large group does not block
+# Redis with one huge SADD.
+FILL_CHUNK = 5000
+
+
+def _text(value: bytes) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class MembershipCache(ChatMembers):
+    """
+    Read-through cache of chats and group members in front of Postgres.
+
+    `chats:chat:<uuid>:info` holds the kind, title and member count of a
+    chat, `chats:chat:<uuid>:members` the set of member uuids of a group;
+    both expire after `cache_ttl`. Once a membership change is committed,
+    added members drop both keys with `invalidate`, and a fill racing with
+    it may miss them until the TTL. A removed member is taken out of the
+    cached set with `remove` instead, so the set is not refilled from
+    before the change; only a fill already under way at that moment can
+    put the member back.
+    """
+
+    def __init__(self, directory: ChatDirectory, redis_client: Redis, config: GroupsConfig) -> None:
+        self._directory = directory
+        self._redis = redis_client
+        self._config = config
+
+    async def get_chat(self, chat_uuid: str) -> Optional[ChatDM]:
+        key = CHAT_INFO_KEY.format(chat_uuid=chat_uuid)
+        if cached := await self._redis.hgetall(key):
+            fields = {_text(name): _text(value) for name, value in cached.items()}
+            return ChatDM(
+                uuid=chat_uuid,
+                kind=fields["kind"],
+                title=fields["title"] or None,
+                member_count=int(fields["member_count"])
+            )
+        chat = await self._directory.get_chat(chat_uuid)
+        if chat is None:
+            return None
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "kind": chat.kind,
+                "title": chat.title or "",
+                "member_count": chat.member_count,
+            })
+            pipe.expire(key, self._config.cache_ttl)
+            await pipe.execute()
+        return chat
+
+    async def get_members(self, chat_uuid: str) -> List[str]:
+        key = CHAT_MEMBERS_KEY.format(chat_uuid=chat_uuid)
+        if cached := await self._redis.smembers(key):
+            return [_text(user_uuid) for user_uuid in cached]
+        return await self._fill(chat_uuid)
+
+    async def is_member(self, chat_uuid: str, user_uuid: str) -> bool:
+        key = CHAT_MEMBERS_KEY.format(chat_uuid=chat_uuid)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.exists(key)
+            pipe.sismember(key, user_uuid)
+            exists, member = await pipe.execute()
+        if exists:
+            return bool(member)
+        return user_uuid in await self._fill(chat_uuid)
+
+    async def invalidate(self, chat_uuid: str) -> None:
+        await self._redis.delete(
+            CHAT_INFO_KEY.format(chat_uuid=chat_uuid),
+            CHAT_MEMBERS_KEY.format(chat_uuid=chat_uuid)
+        )
+
+    async def remove(self, chat_uuid: str, user_uuid: str) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.srem(CHAT_MEMBERS_KEY.format(chat_uuid=chat_uuid), user_uuid)
+            # Only the member count changed; it is read again on next use.
+            pipe.delete(CHAT_INFO_KEY.format(chat_uuid=chat_uuid))
+            await pipe.execute()
+
+    async def _fill(self, chat_uuid: str) -> List[str]:
+        members = await self._directory.get_member_uuids(chat_uuid)
+        if not members:
+            return members
+        key = CHAT_MEMBERS_KEY.format(chat_uuid=chat_uuid)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for start in range(0, len(members), FILL_CHUNK):
+                pipe.sadd(key, *members[start:start + FILL_CHUNK])
+            pipe.expire(key, self._config.cache_ttl)
+            await pipe.execute()
+        return members
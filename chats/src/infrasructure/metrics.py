@@ -0,0 +1,25 @@
+class SocketMetrics:
+    def __init__(self) -> None:
+        self.frames_queued_total = 0
+        self.frames_coalesced_total = 0
+        self.frames_dropped_total = 0
+        self.writes_total = 0
+        self.write_failures_total = 0
+        self.slow_disconnects_total = 0
+        self.queue_high_water = 0
+
+    def record_depth(self, depth: int) -> None:
+        self.frames_queued_total += 1
+        if depth > self.queue_high_water:
+            self.queue_high_water = depth
+
+    def snapshot(self) -> dict:
+        return {
+            "frames_queued_total": self.frames_queued_total,
+            "frames_coalesced_total": self.frames_coalesced_total,
+            "frames_dropped_total": self.frames_dropped_total,
+            "writes_total": self.writes_total,
+            "write_failures_total": self.write_failures_total,
+            "slow_disconnects_total": self.slow_disconnects_total,
+            "queue_high_water": self.queue_high_water,
+        }
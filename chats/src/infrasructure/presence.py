@@ -0,0 +1,268 @@
+import asyncio
+import json
+from collections import Counter, defaultdict
+from contextlib import suppress
+from datetime import datetime, timezone
+from logging import Logger
+from time import monotonic, time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+
+from chats.src.application.interfaces import NotifyChat
+from chats.src.config import PresenceConfig
+from chats.src.domain.entities import MessageEventDM, PresenceDM
+from chats.src.infrasructure.hub import ClientConnection, ConnectionHub
+from chats.src.infrasructure.protocol import encode_json
+
+
+PRESENCE_KEY = "chats:presence"
+CHAT_CHANNEL = "chats:chat:{chat_uuid}:presence"
+CHANNEL_PREFIX, _, CHANNEL_SUFFIX = CHAT_CHANNEL.partition("{chat_uuid}")
+
+ONLINE, OFFLINE, TYPING = "online", "offline", "typing"
+KICK, UNSUBSCRIBED = "kick", "unsubscribed"
+
+
+class PresenceService(NotifyChat):
+    """
+    Online state and typing indicators.
+
+    Each node writes the last-seen time of every user it holds into the
+    `chats:presence` sorted set with one ZADD per heartbeat, so the write
+    rate follows the number of nodes rather than sockets; a user counts as
+    online while their score is younger than `online_ttl`.
+
+    Sockets subscribe to the chats they display. Typing updates and the
+    arrival and departure of subscribers are collected per chat and
+    published once per `typing_tick` as a single `presence` frame on
+    `chats:chat:<uuid>:presence`; a node listens on that channel only while
+    one of its sockets follows the chat. A user who keeps typing is
+    republished at most once per `typing_refresh`, and clients keep showing
+    the indicator until a later frame says otherwise.
+
+    Messages of groups too large to fan out per member travel the same
+    channel, published at once rather than on the tick, so they reach
+    exactly the sockets that follow the chat. So does a `kick` once a
+    member leaves a group: every node unsubscribes that user's sockets
+    from the chat and tells them with an `unsubscribed` frame.
+    """
+
+    def __init__(
+        self,
+        hub: ConnectionHub,
+        redis_client: Redis,
+        config: PresenceConfig,
+        logger: Logger,
+    ) -> None:
+        self._hub = hub
+        self._redis = redis_client
+        self._config = config
+        self._logger = logger
+        self._subscribers: Dict[str, Set[ClientConnection]] = defaultdict(set)
+        self._subscriptions: Dict[ClientConnection, Set[str]] = defaultdict(set)
+        self._changes: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self._typing: Dict[Tuple[str, str], float] = {}
+        self._lock = asyncio.Lock()
+        self._pubsub: Optional[PubSub] = None
+        self._tasks: List[asyncio.Task] = []
+        self.stats: Counter = Counter()
+
+    async def start(self) -> None:
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._tasks = [
+            asyncio.create_task(self._tick_loop()),
+            asyncio.create_task(self._heartbeat_loop()),
+            asyncio.create_task(self._listen()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        for connection in list(self._subscriptions):
+            await self.drop(connection)
+        with suppress(Exception):
+            await self._publish()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+
+    async def touch(self, user_uuid: str) -> None:
+        await self._redis.zadd(PRESENCE_KEY, {user_uuid: time()})
+
+    async def get_presence(self, user_uuids: Sequence[str]) -> List[PresenceDM]:
+        if not user_uuids:
+            return []
+        scores = await self._redis.zmscore(PRESENCE_KEY, list(user_uuids))
+        online_since = time() - self._config.online_ttl
+        return [
+            PresenceDM(
+                user_uuid=user_uuid,
+                online=score is not None and score >= online_since,
+                last_seen=datetime.fromtimestamp(score, timezone.utc) if score is not None else None
+            )
+            for user_uuid, score in zip(user_uuids, scores)
+        ]
+
+    async def subscribe(self, connection: ClientConnection, chat_uuid: str) -> None:
+        chats = self._subscriptions[connection]
+        if chat_uuid in chats:
+            return
+        if len(chats) >= self._config.max_subscriptions:
+            raise ValueError("Слишком много подписок.")
+        user_uuid = connection.user.uuid
+        joined = not self._follows(chat_uuid, user_uuid)
+        chats.add(chat_uuid)
+        async with self._lock:
+            first = chat_uuid not in self._subscribers
+            self._subscribers[chat_uuid].add(connection)
+            if first:
+                await self._pubsub.subscribe(CHAT_CHANNEL.format(chat_uuid=chat_uuid))
+        if joined:
+            self._changes[chat_uuid][user_uuid] = ONLINE
+
+    async def unsubscribe(self, connection: ClientConnection, chat_uuid: str) -> None:
+        chats = self._subscriptions.get(connection)
+        if not chats or chat_uuid not in chats:
+            return
+        chats.discard(chat_uuid)
+        if not chats:
+            del self._subscriptions[connection]
+        user_uuid = connection.user.uuid
+        async with self._lock:
+            subscribers = self._subscribers[chat_uuid]
+            subscribers.discard(connection)
+            if not subscribers:
+                del self._subscribers[chat_uuid]
+                await self._pubsub.unsubscribe(CHAT_CHANNEL.format(chat_uuid=chat_uuid))
+        if not self._follows(chat_uuid, user_uuid):
+            self._changes[chat_uuid][user_uuid] = OFFLINE
+            self._typing.pop((chat_uuid, user_uuid), None)
+
+    async def drop(self, connection: ClientConnection) -> None:
+        for chat_uuid in list(self._subscriptions.get(connection, ())):
+            try:
+                await self.unsubscribe(connection, chat_uuid)
+            except Exception as e:
+                self._logger.error(f"Failed to unsubscribe from chat {chat_uuid}: {e}")
+
+    def typing(self, connection: ClientConnection, chat_uuid: str, active: bool) -> None:
+        if chat_uuid not in self._subscriptions.get(connection, ()):
+            raise ValueError("Нет подписки на чат.")
+        self.stats["typing_received"] += 1
+        key = (chat_uuid, connection.user.uuid)
+        if active:
+            sent = self._typing.get(key)
+            if sent is not None and monotonic() - sent < self._config.typing_refresh:
+                return
+            self._typing[key] = monotonic()
+        elif self._typing.pop(key, None) is None:
+            return
+        self._changes[chat_uuid][connection.user.uuid] = TYPING if active else ONLINE
+
+    async def notify_chat(self, chat_uuid: str, event: MessageEventDM) -> None:
+        frame = {"type": event.event, "message": event.message.to_dict()}
+        await self._redis.publish(CHAT_CHANNEL.format(chat_uuid=chat_uuid), encode_json(frame))
+        self.stats["messages_published"] += 1
+
+    async def kick(self, chat_uuid: str, user_uuid: str) -> None:
+        frame = {"type": KICK, "chat_uuid": chat_uuid, "user_uuid": user_uuid}
+        await self._redis.publish(CHAT_CHANNEL.format(chat_uuid=chat_uuid), encode_json(frame))
+
+    def _follows(self, chat_uuid: str, user_uuid: str) -> bool:
+        return any(c.user.uuid == user_uuid for c in self._subscribers.get(chat_uuid, ()))
+
+    async def _tick_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._config.typing_tick)
+            try:
+                await self._publish()
+            except Exception as e:
+                self._logger.error(f"Presence publish failed: {e}")
+
+    async def _publish(self) -> None:
+        if not self._changes:
+            return
+        changes, self._changes = self._changes, defaultdict(dict)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for chat_uuid, users in changes.items():
+                frame = {"type": "presence", "chat_uuid": chat_uuid, "users": users}
+                pipe.publish(CHAT_CHANNEL.format(chat_uuid=chat_uuid), encode_json(frame))
+            await pipe.execute()
+        self.stats["events_published"] += len(changes)
+        self.stats["updates_published"] += sum(len(users) for users in changes.values())
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                # Polls instead of listen(): the set of channels changes as
+                # sockets subscribe, and may be empty, in which case the
+                # connection is not set up yet and get_message would raise.
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(self._config.typing_tick)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is None or message["type"] != "message":
+                    continue
+                channel = message["channel"].decode()
+                chat_uuid = channel[len(CHANNEL_PREFIX):-len(CHANNEL_SUFFIX)]
+                connections = list(self._subscribers.get(chat_uuid, ()))
+                if not connections:
+                    continue
+                frame = json.loads(message["data"])
+                if frame["type"] == KICK:
+                    await self._unsubscribe_user(chat_uuid, frame["user_uuid"], connections)
+                    continue
+                self.stats["events_received"] += 1
+                self.stats["frames_delivered"] += await self._hub.broadcast(connections, frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._logger.error(f"Presence subscription failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _unsubscribe_user(
+        self,
+        chat_uuid: str,
+        user_uuid: str,
+        connections: List[ClientConnection],
+    ) -> None:
+        kicked = [c for c in connections if c.user.uuid == user_uuid]
+        for connection in kicked:
+            await self.unsubscribe(connection, chat_uuid)
+        if kicked:
+            self.stats["sockets_kicked"] += len(kicked)
+            await self._hub.broadcast(kicked, {"type": UNSUBSCRIBED, "chat_uuid": chat_uuid})
+
+    async def _heartbeat_loop(self) -> None:
+        reported = monotonic()
+        while True:
+            await asyncio.sleep(self._config.heartbeat_interval)
+            try:
+                await self._beat()
+            except Exception as e:
+                self._logger.error(f"Presence heartbeat failed: {e}")
+            if monotonic() - reported >= self._config.stats_interval:
+                self._report(monotonic() - reported)
+                reported = monotonic()
+
+    async def _beat(self) -> None:
+        users = self._hub.users
+        now = time()
+        async with self._redis.pipeline(transaction=False) as pipe:
+            if users:
+                pipe.zadd(PRESENCE_KEY, dict.fromkeys(users, now))
+            pipe.zremrangebyscore(PRESENCE_KEY, "-inf", now - self._config.retention)
+            await pipe.execute()
+        self.stats["heartbeat_writes"] += 1
+        self.stats["heartbeat_users"] += len(users)
+
+    def _report(self, elapsed: float) -> None:
+        stats, self.stats = self.stats, Counter()
+        rates = ", ".join(f"{name} {count / elapsed:.1f}/s" for name, count in sorted(stats.items()))
+        self._logger.info(
+            f"Presence: {len(self._subscribers)} chats followed by "
+            f"{len(self._subscriptions)} sockets; {rates or 'idle'}"
+        )
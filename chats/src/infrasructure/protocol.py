@@ -0,0 +1,319 @@
+import json
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+
+JSON_PROTOCOL = "nedviga.json.v1"
+BINARY_PROTOCOL = "nedviga.bin.v1"
+
+Frame = Dict[str, Any]
+EncodedFrame = Union[str, bytes]
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_json(frame: Frame) -> str:
+    return json.dumps(frame, default=_json_default, ensure_ascii=False)
+
+
+class JsonFrameCodec:
+    """The text protocol, and the fallback for clients that offer no
+    subprotocol: one JSON object per frame."""
+
+    protocol = JSON_PROTOCOL
+    mode = "text"
+
+    def encode(self, frame: Frame) -> str:
+        return encode_json(frame)
+
+    def batch(self, frames: Sequence[EncodedFrame]) -> str:
+        return '{"type": "batch", "frames": [' + ", ".join(frames) + "]}"
+
+    def decode(self, data: EncodedFrame) -> Frame:
+        return json.loads(data)
+
+
+VERSION = 1
+HEADER = struct.Struct(">BBB")
+DEFLATED = 0x01
+NO_ID = 0xFF
+MESSAGE = struct.Struct(">16s16s16s16sqqqB")
+EDITED = 0x01
+NO_TIME = -(1 << 63)
+MESSAGE_KEY = struct.Struct(">16s16s")
+SEND = struct.Struct(">16s16sB")
+LENGTH8 = struct.Struct(">B")
+LENGTH16 = struct.Struct(">H")
+LENGTH32 = struct.Struct(">I")
+MAX_INFLATED = 1 << 20
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+KIND_SEND, KIND_EDIT, KIND_DELETE, KIND_AUTH = 1, 2, 3, 4
+KIND_ACK, KIND_ERROR, KIND_BATCH, KIND_JSON = 16, 17, 18, 255
+# Server pushes that carry one message and the recipient's inbox cursor.
+MESSAGE_KINDS = {"message": 32, "edited": 33, "deleted": 34}
+MESSAGE_TYPES = {kind: name for name, kind in MESSAGE_KINDS.items()}
+RECIPIENT_TYPES = ("user", "admin")
+
+
+class BinaryFormatError(ValueError):
+    pass
+
+
+def _uuid_bytes(value: Any) -> bytes:
+    return value.bytes if isinstance(value, UUID) else UUID(value).bytes
+
+
+def _micros(value: Any) -> int:
+    if value is None:
+        return NO_TIME
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return (value - EPOCH) // MICROSECOND
+    return (value - EPOCH_UTC) // MICROSECOND
+
+
+def _uuid(value: bytes) -> str:
+    h = value.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _time(value: int) -> Optional[datetime]:
+    return None if value == NO_TIME else EPOCH + timedelta(microseconds=value)
+
+
+class _Reader:
+    __slots__ = ("data", "position")
+
+    def __init__(self, data: bytes, position: int = 0) -> None:
+        self.data = data
+        self.position = position
+
+    def unpack(self, layout: struct.Struct) -> Tuple[Any, ...]:
+        if self.position + layout.size > len(self.data):
+            raise BinaryFormatError("Кадр обрезан.")
+        values = layout.unpack_from(self.data, self.position)
+        self.position += layout.size
+        return values
+
+    def take(self, length: int) -> bytes:
+        if self.position + length > len(self.data):
+            raise BinaryFormatError("Кадр обрезан.")
+        chunk = self.data[self.position:self.position + length]
+        self.position += length
+        return chunk
+
+    def text(self, layout: struct.Struct) -> str:
+        return self.take(self.unpack(layout)[0]).decode()
+
+
+def _text(value: str, layout: struct.Struct) -> bytes:
+    data = value.encode()
+    return layout.pack(len(data)) + data
+
+
+def _encode_message(message: Frame) -> bytes:
+    return b"".join((
+        MESSAGE.pack(
+            _uuid_bytes(message["uuid"]),
+            _uuid_bytes(message["chat_uuid"]),
+            _uuid_bytes(message["sender_uuid"]),
+            _uuid_bytes(message["recipient_uuid"]),
+            _micros(message["timestamp"]),
+            _micros(message.get("edited_at")),
+            message.get("seq") or 0,
+            EDITED if message.get("is_edited") else 0,
+        ),
+        _text(message["sender_type"], LENGTH8),
+        _text(message["recipient_type"], LENGTH8),
+        _text(message["message"], LENGTH32),
+    ))
+
+
+def _decode_message(reader: _Reader) -> Frame:
+    uuid, chat_uuid, sender_uuid, recipient_uuid, timestamp, edited_at, seq, flags = reader.unpack(MESSAGE)
+    return {
+        "uuid": _uuid(uuid),
+        "chat_uuid": _uuid(chat_uuid),
+        "sender_type": reader.text(LENGTH8),
+        "sender_uuid": _uuid(sender_uuid),
+        "recipient_type": reader.text(LENGTH8),
+        "recipient_uuid": _uuid(recipient_uuid),
+        "message": reader.text(LENGTH32),
+        "timestamp": _time(timestamp),
+        "is_edited": bool(flags & EDITED),
+        "edited_at": _time(edited_at),
+        "seq": seq or None,
+    }
+
+
+class BinaryFrameCodec:
+    """
+    `nedviga.bin.v1`: a three-byte header (version, kind, flags), the
+    frame id as a length-prefixed string (0xFF when absent) and a body laid
+    out per kind. UUIDs travel as 16 raw bytes and times as microseconds
+    since the epoch. Frame types without a fixed layout use the JSON kind,
+    whose body is the frame as JSON, so new frame types need no protocol
+    bump. When id and body exceed `compress_threshold` bytes they are raw
+    deflated and the DEFLATED flag is set; smaller frames are sent as is,
+    since deflate only adds bytes and CPU to them.
+    """
+
+    protocol = BINARY_PROTOCOL
+    mode = "binary"
+
+    def __init__(self, compress_threshold: int) -> None:
+        self._compress_threshold = compress_threshold
+
+    def encode(self, frame: Frame) -> bytes:
+        kind, body = self._body(frame)
+        frame_id = frame.get("id")
+        head = LENGTH8.pack(NO_ID) if frame_id is None else _text(str(frame_id), LENGTH8)
+        return self._pack(kind, head + body)
+
+    def batch(self, frames: Sequence[EncodedFrame]) -> bytes:
+        body = LENGTH16.pack(len(frames)) + b"".join(
+            LENGTH32.pack(len(frame)) + frame for frame in frames
+        )
+        return self._pack(KIND_BATCH, LENGTH8.pack(NO_ID) + body)
+
+    def decode(self, data: EncodedFrame) -> Frame:
+        if isinstance(data, str):
+            raise BinaryFormatError("Ожидался бинарный кадр.")
+        reader = _Reader(data)
+        version, kind, flags = reader.unpack(HEADER)
+        if version != VERSION:
+            raise BinaryFormatError(f"Неподдерживаемая версия протокола: {version}.")
+        if flags & DEFLATED:
+            inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            try:
+                payload = inflater.decompress(data[HEADER.size:], MAX_INFLATED)
+            except zlib.error:
+                raise BinaryFormatError("Кадр повреждён.")
+            if inflater.unconsumed_tail:
+                raise BinaryFormatError("Кадр слишком велик.")
+            reader = _Reader(payload)
+        id_length = reader.unpack(LENGTH8)[0]
+        frame_id = None if id_length == NO_ID else reader.take(id_length).decode()
+        frame = self._decode_body(kind, reader)
+        if kind != KIND_BATCH:
+            frame["id"] = frame_id
+        return frame
+
+    def _pack(self, kind: int, payload: bytes) -> bytes:
+        if len(payload) > self._compress_threshold:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+            payload = compressor.compress(payload) + compressor.flush()
+            return HEADER.pack(VERSION, kind, DEFLATED) + payload
+        return HEADER.pack(VERSION, kind, 0) + payload
+
+    def _body(self, frame: Frame) -> Tuple[int, bytes]:
+        frame_type = frame.get("type")
+        keys = frame.keys() - {"id"}
+        if frame_type in MESSAGE_KINDS and {"type", "message"} <= keys <= {"type", "message", "cursor"}:
+            body = _encode_message(frame["message"]) + _text(frame.get("cursor") or "", LENGTH8)
+            return MESSAGE_KINDS[frame_type], body
+        if frame_type == "ack" and keys == {"type", "message"}:
+            return KIND_ACK, _encode_message(frame["message"])
+        if frame_type == "error" and keys == {"type", "detail"}:
+            return KIND_ERROR, _text(frame["detail"], LENGTH16)
+        if frame_type == "send" and frame.get("recipient_type", "user") in RECIPIENT_TYPES:
+            # Group messages have no recipient; the server ignores it there.
+            return KIND_SEND, SEND.pack(
+                _uuid_bytes(frame["chat_uuid"]),
+                _uuid_bytes(frame.get("recipient_uuid") or frame["chat_uuid"]),
+                RECIPIENT_TYPES.index(frame.get("recipient_type", "user")),
+            ) + _text(frame["content"], LENGTH32)
+        if frame_type == "edit":
+            return KIND_EDIT, MESSAGE_KEY.pack(
+                _uuid_bytes(frame["message_uuid"]),
+                _uuid_bytes(frame["chat_uuid"]),
+            ) + _text(frame["content"], LENGTH32)
+        if frame_type == "delete":
+            return KIND_DELETE, MESSAGE_KEY.pack(
+                _uuid_bytes(frame["message_uuid"]),
+                _uuid_bytes(frame["chat_uuid"]),
+            )
+        if frame_type == "auth":
+            return KIND_AUTH, _text(frame["token"], LENGTH16)
+        return KIND_JSON, encode_json({k: v for k, v in frame.items() if k != "id"}).encode()
+
+    def _decode_body(self, kind: int, reader: _Reader) -> Frame:
+        if kind in MESSAGE_TYPES:
+            message = _decode_message(reader)
+            return {"type": MESSAGE_TYPES[kind], "message": message, "cursor": reader.text(LENGTH8) or None}
+        if kind == KIND_ACK:
+            return {"type": "ack", "message": _decode_message(reader)}
+        if kind == KIND_ERROR:
+            return {"type": "error", "detail": reader.text(LENGTH16)}
+        if kind == KIND_SEND:
+            chat_uuid, recipient_uuid, recipient_type = reader.unpack(SEND)
+            if recipient_type >= len(RECIPIENT_TYPES):
+                raise BinaryFormatError("Неизвестный тип получателя.")
+            return {
+                "type": "send",
+                "chat_uuid": _uuid(chat_uuid),
+                "recipient_uuid": _uuid(recipient_uuid),
+                "recipient_type": RECIPIENT_TYPES[recipient_type],
+                "content": reader.text(LENGTH32),
+            }
+        if kind in (KIND_EDIT, KIND_DELETE):
+            message_uuid, chat_uuid = reader.unpack(MESSAGE_KEY)
+            frame = {
+                "type": "edit" if kind == KIND_EDIT else "delete",
+                "message_uuid": _uuid(message_uuid),
+                "chat_uuid": _uuid(chat_uuid),
+            }
+            if kind == KIND_EDIT:
+                frame["content"] = reader.text(LENGTH32)
+            return frame
+        if kind == KIND_AUTH:
+            return {"type": "auth", "token": reader.text(LENGTH16)}
+        if kind == KIND_BATCH:
+            count = reader.unpack(LENGTH16)[0]
+            frames = [self.decode(reader.take(reader.unpack(LENGTH32)[0])) for _ in range(count)]
+            return {"type": "batch", "frames": frames}
+        if kind == KIND_JSON:
+            try:
+                frame = json.loads(reader.take(len(reader.data) - reader.position))
+            except ValueError:
+                raise BinaryFormatError("Кадр повреждён.")
+            if not isinstance(frame, dict):
+                raise BinaryFormatError("Кадр повреждён.")
+            return frame
+        raise BinaryFormatError(f"Неизвестный тип кадра: {kind}.")
+
+
+FrameCodec = Union[JsonFrameCodec, BinaryFrameCodec]
+
+
+class FrameCodecs:
+    """Picks the codec of a socket from the subprotocols the client offers,
+    in the client's order of preference; no offer means JSON."""
+
+    def __init__(self, compress_threshold: int) -> None:
+        self.json = JsonFrameCodec()
+        self._codecs: Dict[str, FrameCodec] = {
+            BINARY_PROTOCOL: BinaryFrameCodec(compress_threshold),
+            JSON_PROTOCOL: self.json,
+        }
+
+    @property
+    def codecs(self) -> List[FrameCodec]:
+        return list(self._codecs.values())
+
+    def negotiate(self, offered: Sequence[str]) -> Tuple[Optional[str], Optional[FrameCodec]]:
+        for protocol in offered:
+            if codec := self._codecs.get(protocol):
+                return protocol, codec
+        return None, self.json
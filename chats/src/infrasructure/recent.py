@@ -0,0 +1,187 @@
+import json
+from calendar import timegm
+from collections import defaultdict
+from contextlib import suppress
+from datetime import datetime
+from logging import Logger
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+
+from chats.src.application.interfaces import RecentMessages
+from chats.src.config import RecentCacheConfig
+from chats.src.domain.entities import MessageDM, RecentMessagesDM
+
+
+RECENT_KEY = "chats:recent:{chat_uuid}"
+# "1" when the window holds the whole chat, "0" when older messages exist
+RECENT_MARKER_KEY = "chats:recent:{chat_uuid}:complete"
+
+READ_SCRIPT = """
+local complete = redis.call('GET', KEYS[2])
+if not complete then
+    return false
+end
+return {complete, redis.call('ZREVRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)}
+"""
+
+# Members newer than the loaded page were written through meanwhile and
+# are kept; everything up to its newest message is replaced by the page.
+FILL_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[4])
+for i = 5, #ARGV, 2 do
+    redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[3]) - 1)
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[1])
+"""
+
+APPEND_SCRIPT = """
+for i = 3, #ARGV, 2 do
+    redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+if redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[2]) - 1) > 0 then
+    if redis.call('EXISTS', KEYS[2]) == 1 then
+        redis.call('SET', KEYS[2], '0', 'KEEPTTL')
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+"""
+
+# Members start with '["<uuid>"', so a message is found among the members
+# sharing its score by the uuid at that position.
+PATCH_SCRIPT = """
+for _, member in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], ARGV[2], ARGV[2])) do
+    if string.sub(member, 3, 38) == ARGV[1] then
+        redis.call('ZREM', KEYS[1], member)
+        if ARGV[3] then
+            redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+        end
+    end
+end
+"""
+
+
+def _score(timestamp: datetime) -> str:
+    return repr(timegm(timestamp.utctimetuple()) + timestamp.microsecond / 1_000_000)
+
+
+def encode_message(message: MessageDM) -> str:
+    return json.dumps([
+        str(message.uuid), str(message.chat_uuid),
+        message.sender_type, str(message.sender_uuid),
+        message.recipient_type, str(message.recipient_uuid),
+        message.message, message.timestamp.isoformat(), message.is_edited,
+        message.edited_at.isoformat() if message.edited_at else None,
+        message.seq,
+    ], ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_message(member: bytes) -> MessageDM:
+    fields = json.loads(member)
+    return MessageDM(
+        uuid=fields[0],
+        chat_uuid=fields[1],
+        sender_type=fields[2],
+        sender_uuid=fields[3],
+        recipient_type=fields[4],
+        recipient_uuid=fields[5],
+        message=fields[6],
+        timestamp=datetime.fromisoformat(fields[7]),
+        is_edited=fields[8],
+        edited_at=datetime.fromisoformat(fields[9]) if fields[9] else None,
+        seq=fields[10] if len(fields) > 10 else None,
+    )
+
+
+def _keys(chat_uuid: str) -> List[str]:
+    return [
+        RECENT_KEY.format(chat_uuid=chat_uuid),
+        RECENT_MARKER_KEY.format(chat_uuid=chat_uuid),
+    ]
+
+
+class RecentMessagesCache(RecentMessages):
+    """
+    Write-through window of the latest `size` messages of every chat that
+    has been read recently, as a Redis sorted set of compact JSON members
+    scored by timestamp. A window is only read once it has been loaded from
+    Postgres; new, edited and deleted messages patch it from then on. Redis
+    errors never fail a request: reads fall back to Postgres and a failed
+    write drops the window.
+    """
+
+    def __init__(self, redis_client: Redis, config: RecentCacheConfig, logger: Logger) -> None:
+        self._redis = redis_client
+        self._config = config
+        self._logger = logger
+        self._read = redis_client.register_script(READ_SCRIPT)
+        self._fill = redis_client.register_script(FILL_SCRIPT)
+        self._append = redis_client.register_script(APPEND_SCRIPT)
+        self._patch = redis_client.register_script(PATCH_SCRIPT)
+
+    async def get_recent(self, chat_uuid: str, limit: int) -> Optional[RecentMessagesDM]:
+        try:
+            cached = await self._read(keys=_keys(chat_uuid), args=[limit])
+        except Exception as e:
+            self._logger.warning(f"Recent messages of chat {chat_uuid} are unavailable: {e}")
+            return None
+        if not cached:
+            return None
+        complete, members = cached
+        return RecentMessagesDM(
+            messages=[decode_message(member) for member in members],
+            complete=complete == b"1"
+        )
+
+    async def fill_recent(self, chat_uuid: str, messages: List[MessageDM], complete: bool) -> None:
+        args: List[str] = [
+            str(self._config.ttl),
+            "1" if complete else "0",
+            str(self._config.size),
+            _score(messages[0].timestamp) if messages else "-inf",
+        ]
+        for message in messages:
+            args += [_score(message.timestamp), encode_message(message)]
+        try:
+            await self._fill(keys=_keys(chat_uuid), args=args)
+        except Exception as e:
+            self._logger.warning(f"Failed to load recent messages of chat {chat_uuid}: {e}")
+
+    async def add_recent(self, messages: Sequence[MessageDM]) -> None:
+        by_chat: Dict[str, List[MessageDM]] = defaultdict(list)
+        for message in messages:
+            by_chat[str(message.chat_uuid)].append(message)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for chat_uuid, chat_messages in by_chat.items():
+                args: List[str] = [str(self._config.ttl), str(self._config.size)]
+                for message in chat_messages:
+                    args += [_score(message.timestamp), encode_message(message)]
+                await self._append(keys=_keys(chat_uuid), args=args, client=pipe)
+            await self._execute(pipe, by_chat)
+
+    async def replace_recent(self, message: MessageDM) -> None:
+        await self._patch_recent(message, [encode_message(message)])
+
+    async def remove_recent(self, message: MessageDM) -> None:
+        await self._patch_recent(message, [])
+
+    async def _patch_recent(self, message: MessageDM, member: List[str]) -> None:
+        chat_uuid = str(message.chat_uuid)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            await self._patch(
+                keys=_keys(chat_uuid),
+                args=[str(message.uuid), _score(message.timestamp), *member],
+                client=pipe
+            )
+            await self._execute(pipe, [chat_uuid])
+
+    async def _execute(self, pipe: Pipeline, chat_uuids: Iterable[str]) -> None:
+        try:
+            await pipe.execute()
+        except Exception as e:
+            self._logger.warning(f"Dropping recent messages of chats {list(chat_uuids)}: {e}")
+            with suppress(Exception):
+                await self._redis.delete(*(key for chat_uuid in chat_uuids for key in _keys(chat_uuid)))
@@ -0,0 +1,50 @@
+import asyncio
+from contextlib import suppress
+from logging import Logger
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+
+from chats.src.infrasructure.hub import ConnectionHub
+
+
+# Published by the auth service with the sha256 of every revoked access token
+REVOCATION_CHANNEL = "auth:revoked"
+
+
+class RevocationWatcher:
+    """Closes the sockets opened with an access token as soon as the auth
+    service announces its revocation."""
+
+    def __init__(self, hub: ConnectionHub, redis_client: Redis, logger: Logger) -> None:
+        self._hub = hub
+        self._redis = redis_client
+        self._logger = logger
+        self._pubsub: Optional[PubSub] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(REVOCATION_CHANNEL)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message["type"] == "message":
+                        await self._hub.revoke(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._logger.error(f"Revocation subscription failed: {e}")
+                await asyncio.sleep(1)
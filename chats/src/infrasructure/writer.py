@@ -0,0 +1,14 @@
+from chats.src.application.interfaces import SendMessage
+from chats.src.domain.entities import MessageDM, SendMessageDM
+from common.src.infrastructure.batcher import Batcher
+
+
+class MessageWriter(SendMessage):
+    """Write-behind buffer for new messages: each call returns once the
+    group commit holding its row has completed."""
+
+    def __init__(self, batcher: Batcher[SendMessageDM, MessageDM]) -> None:
+        self._batcher = batcher
+
+    async def handle_message(self, params: SendMessageDM) -> MessageDM:
+        return await self._batcher.submit(params)
@@ -0,0 +1,280 @@
+from logging import Logger
+from typing import AsyncIterable, List, Union
+from uuid import uuid4
+
+from dishka import AnyOf, AsyncContainer, Provider, Scope, from_context, provide
+import httpx
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from chats.src.application import interfaces
+from chats.src.application.interactors import (
+    AddMembersInteractor,
+    AuthenticateInteractor,
+    AuthorizeChatInteractor,
+    CreateGroupInteractor,
+    DeleteMessageInteractor,
+    EditMessageInteractor,
+    ExportMessagesInteractor,
+    GetGroupsInteractor,
+    GetMessagesInteractor,
+    RemoveMemberInteractor,
+    ResyncInboxInteractor,
+    SearchMessagesInteractor,
+    SendMessageInteractor,
+    StoreMessagesInteractor,
+    SyncMessagesInteractor
+)
+from chats.src.config import (
+    ArchiveConfig,
+    AuthConfig,
+    Config,
+    ExportConfig,
+    GroupsConfig,
+    InboxConfig,
+    PresenceConfig,
+    RecentCacheConfig
+)
+from chats.src.domain.entities import MessageDM, SendMessageDM
+from chats.src.infrasructure.archive import MessageArchive
+from chats.src.infrasructure.cache import new_redis_client
+from chats.src.infrasructure.database import new_session_maker
+from chats.src.infrasructure.delivery import MessageDelivery
+from chats.src.infrasructure.fanout import MessageFanout
+from chats.src.infrasructure.gateways import AuthGateway, Gateways
+from chats.src.infrasructure.http import new_http_client
+from chats.src.infrasructure.hub import ConnectionHub
+from chats.src.infrasructure.inbox import RedisInbox
+from chats.src.infrasructure.members import MembershipCache
+from chats.src.infrasructure.metrics import SocketMetrics
+from chats.src.infrasructure.presence import PresenceService
+from chats.src.infrasructure.protocol import FrameCodecs
+from chats.src.infrasructure.recent import RecentMessagesCache
+from chats.src.infrasructure.revocations import RevocationWatcher
+from chats.src.infrasructure.writer import MessageWriter
+from common.src.infrastructure.batcher import Batcher
+
+
+class AppProvider(Provider):
+    config = from_context(provides=Config, scope=Scope.APP)
+
+    logger = from_context(provides=Logger, scope=Scope.APP)
+
+    @provide(scope=Scope.APP)
+    def get_auth_config(self, config: Config) -> AuthConfig:
+        return config.auth
+
+    @provide(scope=Scope.APP)
+    def get_recent_cache_config(self, config: Config) -> RecentCacheConfig:
+        return config.recent
+
+    @provide(scope=Scope.APP)
+    def get_archive_config(self, config: Config) -> ArchiveConfig:
+        return config.archive
+
+    @provide(scope=Scope.APP)
+    def get_export_config(self, config: Config) -> ExportConfig:
+        return config.export
+
+    @provide(scope=Scope.APP)
+    def get_inbox_config(self, config: Config) -> InboxConfig:
+        return config.inbox
+
+    @provide(scope=Scope.APP)
+    def get_presence_config(self, config: Config) -> PresenceConfig:
+        return config.presence
+
+    @provide(scope=Scope.APP)
+    def get_groups_config(self, config: Config) -> GroupsConfig:
+        return config.groups
+
+    @provide(scope=Scope.APP)
+    def get_message_archive(self, config: ArchiveConfig, logger: Logger) -> interfaces.ArchivedMessages:
+        return MessageArchive(config, logger)
+
+    @provide(scope=Scope.APP)
+    def get_frame_codecs(self, config: Config) -> FrameCodecs:
+        return FrameCodecs(config.app.ws_compress_threshold)
+
+    @provide(scope=Scope.APP)
+    def get_socket_metrics(self) -> SocketMetrics:
+        return SocketMetrics()
+
+    @provide(scope=Scope.APP)
+    def get_uuid_generator(self) -> interfaces.UUIDGenerator:
+        return uuid4
+
+    @provide(scope=Scope.APP)
+    def get_session_maker(self, config: Config) -> async_sessionmaker[AsyncSession]:
+        return new_session_maker(config.postgres)
+
+    @provide(scope=Scope.REQUEST)
+    async def get_session(
+        self, 
+        session_maker: async_sessionmaker[AsyncSession]
+    ) -> AsyncIterable[AnyOf[
+        AsyncSession,
+        interfaces.DBSession,
+    ]]:
+        async with session_maker() as session:
+            yield session
+
+    @provide(scope=Scope.APP)
+    async def get_redis_client(self, config: Config) -> AsyncIterable[Redis]:
+        redis_client = new_redis_client(config.redis)
+        yield redis_client
+        await redis_client.aclose()
+
+    @provide(scope=Scope.APP)
+    def get_recent_cache(
+        self,
+        redis_client: Redis,
+        config: RecentCacheConfig,
+        logger: Logger
+    ) -> interfaces.RecentMessages:
+        return RecentMessagesCache(redis_client, config, logger)
+
+    @provide(scope=Scope.APP)
+    def get_inbox(
+        self,
+        redis_client: Redis,
+        config: InboxConfig,
+        logger: Logger
+    ) -> interfaces.MessageInbox:
+        return RedisInbox(redis_client, config, logger)
+
+    @provide(scope=Scope.APP)
+    async def get_hub(self, logger: Logger) -> AsyncIterable[ConnectionHub]:
+        hub = ConnectionHub(logger)
+        yield hub
+        await hub.close()
+
+    @provide(scope=Scope.APP)
+    async def get_http_client(
+        self,
+        config: AuthConfig,
+        logger: Logger
+    ) -> AsyncIterable[httpx.AsyncClient]:
+        client = new_http_client(config, logger)
+        yield client
+        await client.aclose()
+
+    @provide(scope=Scope.APP)
+    async def get_revocation_watcher(
+        self,
+        hub: ConnectionHub,
+        redis_client: Redis,
+        logger: Logger
+    ) -> AsyncIterable[RevocationWatcher]:
+        watcher = RevocationWatcher(hub, redis_client, logger)
+        await watcher.start()
+        yield watcher
+        await watcher.stop()
+
+    @provide(scope=Scope.APP)
+    async def get_fanout(
+        self,
+        config: Config,
+        hub: ConnectionHub,
+        inbox: interfaces.MessageInbox,
+        redis_client: Redis,
+        logger: Logger
+    ) -> AsyncIterable[AnyOf[
+        MessageFanout,
+        interfaces.NotifyUsers,
+    ]]:
+        fanout = MessageFanout(hub, inbox, redis_client, config.fanout, logger)
+        await fanout.start()
+        yield fanout
+        await fanout.stop()
+
+    @provide(scope=Scope.APP)
+    async def get_presence(
+        self,
+        config: PresenceConfig,
+        hub: ConnectionHub,
+        redis_client: Redis,
+        logger: Logger
+    ) -> AsyncIterable[AnyOf[
+        PresenceService,
+        interfaces.NotifyChat,
+    ]]:
+        presence = PresenceService(hub, redis_client, config, logger)
+        await presence.start()
+        yield presence
+        await presence.stop()
+
+    @provide(scope=Scope.APP)
+    async def get_message_writer(
+        self,
+        config: Config,
+        container: AsyncContainer,
+    ) -> AsyncIterable[AnyOf[
+        MessageWriter,
+        interfaces.SendMessage,
+    ]]:
+        async def store_messages(batch: List[SendMessageDM]) -> List[Union[MessageDM, Exception]]:
+            async with container() as request_container:
+                interactor = await request_container.get(StoreMessagesInteractor)
+                return await interactor(batch)
+
+        batcher = Batcher(
+            flush=store_messages,
+            max_size=config.writer.max_batch_size,
+            max_wait=config.writer.max_batch_wait,
+            max_pending=config.writer.max_pending,
+        )
+        yield MessageWriter(batcher)
+        await batcher.close()
+
+    auth_gateway = provide(
+        AuthGateway,
+        scope=Scope.REQUEST,
+        provides=interfaces.AuthService
+    )
+
+    gateways = provide(
+        Gateways,
+        scope=Scope.REQUEST,
+        provides=AnyOf[
+            interfaces.StoreMessages,
+            interfaces.GetMessages,
+            interfaces.EditMessage,
+            interfaces.DeleteMessage,
+            interfaces.SearchMessages,
+            interfaces.ExportMessages,
+            interfaces.SyncMessages,
+            interfaces.ChatDirectory,
+        ]
+    )
+
+    @provide(scope=Scope.REQUEST)
+    def get_chat_members(
+        self,
+        directory: interfaces.ChatDirectory,
+        redis_client: Redis,
+        config: GroupsConfig
+    ) -> interfaces.ChatMembers:
+        return MembershipCache(directory, redis_client, config)
+
+    message_delivery = provide(
+        MessageDelivery,
+        scope=Scope.REQUEST,
+        provides=interfaces.DeliverMessages
+    )
+
+    authenticate_interactor = provide(AuthenticateInteractor, scope=Scope.REQUEST)
+    send_message_interactor = provide(SendMessageInteractor, scope=Scope.REQUEST)
+    store_messages_interactor = provide(StoreMessagesInteractor, scope=Scope.REQUEST)
+    edit_message_interactor = provide(EditMessageInteractor, scope=Scope.REQUEST)
+    delete_message_interactor = provide(DeleteMessageInteractor, scope=Scope.REQUEST)
+    get_messages_interactor = provide(GetMessagesInteractor, scope=Scope.REQUEST)
+    export_messages_interactor = provide(ExportMessagesInteractor, scope=Scope.REQUEST)
+    sync_messages_interactor = provide(SyncMessagesInteractor, scope=Scope.REQUEST)
+    search_messages_interactor = provide(SearchMessagesInteractor, scope=Scope.REQUEST)
+    resync_inbox_interactor = provide(ResyncInboxInteractor, scope=Scope.REQUEST)
+    authorize_chat_interactor = provide(AuthorizeChatInteractor, scope=Scope.REQUEST)
+    get_groups_interactor = provide(GetGroupsInteractor, scope=Scope.REQUEST)
+    create_group_interactor = provide(CreateGroupInteractor, scope=Scope.REQUEST)
+    add_members_interactor = provide(AddMembersInteractor, scope=Scope.REQUEST)
+    remove_member_interactor = provide(RemoveMemberInteractor, scope=Scope.REQUEST)
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from logging import Logger
+
+from dishka import make_async_container
+from dishka.integrations import litestar as litestar_integration
+from litestar import Litestar
+import uvicorn
+
+from chats.src.config import Config
+from chats.src.controllers.http import ChatController, MetricsController
+from chats.src.infrasructure.fanout import MessageFanout
+from chats.src.infrasructure.presence import PresenceService
+from chats.src.infrasructure.revocations import RevocationWatcher
+from chats.src.ioc import AppProvider
+
+
+config = Config()
+logging.basicConfig(level=config.app.log_level)
+logger = logging.getLogger("chats")
+container = make_async_container(AppProvider(), context={Config: config, Logger: logger})
+
+
+async def join_fanout() -> None:
+    # Registers the node and subscribes to its channel and to token
+    # revocations before the first socket connects.
+    await container.get(MessageFanout)
+    await container.get(RevocationWatcher)
+    await container.get(PresenceService)
+
+
+def get_litestar_app() -> Litestar:
+    litestar_app = Litestar(
+        route_handlers=[ChatController, MetricsController],
+        on_startup=[join_fanout],
+        on_shutdown=[container.close],
+    )
+    litestar_integration.setup_dishka(container, litestar_app)
+    return litestar_app
+
+app = get_litestar_app()
+
+
+async def main(config: Config):
+    server_config = uvicorn.Config(
+        app=app,
+        host=config.app.host,
+        port=config.app.port,
+        log_level=config.app.log_level.lower(),
+        ws_per_message_deflate=config.app.ws_per_message_deflate
+    )
+    server = uvicorn.Server(server_config)
+    await server.serve()
+
+if __name__ == "__main__":
+    asyncio.run(main(config))
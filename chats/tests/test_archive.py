@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from chats.src.application.dto import SyncMessagesDTO
+from chats.src.application.interactors import SyncMessagesInteractor
+from chats.src.application.interfaces import ArchiveUnavailableError
+from chats.src.config import ArchiveConfig
+from chats.src.domain.entities import MessageDM, SyncMessagesDM
+from chats.src.infrasructure import archive as reader
+from chats.src.infrasructure.archive import MessageArchive
+from events.src.config import MessagePartitionsConfig
+from events.src.infrastructure.archive import PartitionArchiveWriter
+
+
+CHAT = "5f1c2a3b-4d5e-4f60-8a7b-9c0d1e2f3a4b"
+USER = "9a8b7c6d-5e4f-4a3b-8c2d-1e0f9a8b7c6d"
+
+
+def _rows(first_seq: int, count: int, month: int):
+    started = datetime(2025, month, 1)
+    # Exported newest first, as the events service reads the partition.
+    for seq in range(first_seq + count - 1, first_seq - 1, -1):
+        yield {
+            "chat_uuid": CHAT,
+            "uuid": f"00000000-0000-4000-8000-{seq:012d}",
+            "sender_type": "user",
+            "sender_uuid": USER,
+            "recipient_type": "user",
+            "recipient_uuid": USER,
+            "message": f"сообщение {seq}",
+            "timestamp": started + timedelta(minutes=seq),
+            "is_edited": False,
+            "edited_at": None,
+            "seq": seq,
+        }
+
+
+async def _export(directory, name, rows) -> None:
+    async def stream():
+        for row in rows:
+            yield row
+
+    writer = PartitionArchiveWriter(MessagePartitionsConfig(MESSAGES_ARCHIVE_DIR=str(directory)))
+    await writer.export_partition(name, stream())
+
+
+def test_sync_reads_only_blocks_past_after_seq(tmp_path, monkeypatch):
+    reads = []
+    read_chat = reader._read_chat
+
+    def counting(archive, chat_uuid):
+        reads.append(archive.path.name)
+        return read_chat(archive, chat_uuid)
+
+    monkeypatch.setattr(reader, "_read_chat", counting)
+
+    async def scenario():
+        await _export(tmp_path, "messages_p202501", _rows(1, 10, 1))
+        await _export(tmp_path, "messages_p202502", _rows(11, 10, 2))
+        archive = MessageArchive(ArchiveConfig(MESSAGES_ARCHIVE_DIR=str(tmp_path)), logging.getLogger("test"))
+        after = lambda seq: archive.get_archived_after_seq(
+            SyncMessagesDM(chat_uuid=CHAT, user_uuid=None, after_seq=seq, limit=5)
+        )
+        return await after(20), await after(12), await after(0)
+
+    beyond, middle, start = asyncio.run(scenario())
+    assert beyond == []
+    assert [m.seq for m in middle] == [13, 14, 15, 16, 17]
+    assert [m.seq for m in start] == [1, 2, 3, 4, 5]
+    assert reads == ["messages_p202502.msga", "messages_p202501.msga"]
+
+
+class _Gateway:
+    def __init__(self, messages) -> None:
+        self.messages = messages
+
+    async def get_last_seq(self, chat_uuid: str) -> int:
+        return self.messages[-1].seq
+
+    async def get_messages_after_seq(self, params):
+        return [m for m in self.messages if m.seq > params.after_seq][:params.limit]
+
+
+class _Members:
+    async def get_chat(self, chat_uuid: str):
+        return None
+
+
+def _message(row) -> MessageDM:
+    return MessageDM(**row)
+
+
+def test_missing_archive_directory_is_reported(tmp_path, caplog):
+    archive = MessageArchive(
+        ArchiveConfig(MESSAGES_ARCHIVE_DIR=str(tmp_path / "missing")), logging.getLogger("test")
+    )
+    params = SyncMessagesDM(chat_uuid=CHAT, user_uuid=None, after_seq=0, limit=5)
+    with pytest.raises(ArchiveUnavailableError):
+        asyncio.run(archive.get_archived_after_seq(params))
+    assert "missing" in caplog.text
+
+
+def test_sync_does_not_report_unreadable_archive_as_deletions(tmp_path):
+    gateway = _Gateway([_message(row) for row in reversed(list(_rows(11, 5, 3)))])
+    interactor = SyncMessagesInteractor(
+        gateway,
+        MessageArchive(ArchiveConfig(MESSAGES_ARCHIVE_DIR=str(tmp_path / "missing")), logging.getLogger("test")),
+        _Members()
+    )
+    dto = SyncMessagesDTO(user_uuid=USER, chat_uuid=CHAT, after_seq=0, limit=5)
+    with pytest.raises(ArchiveUnavailableError):
+        asyncio.run(interactor(dto))
+
+    async def archived():
+        await _export(tmp_path / "missing", "messages_p202501", _rows(1, 10, 1))
+        return await interactor(dto)
+
+    page = asyncio.run(archived())
+    assert [m.seq for m in page.messages] == [1, 2, 3, 4, 5]
+    assert not page.complete
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from chats.src.application.interactors import AuthenticateInteractor
+from chats.src.config import AuthConfig, SendQueueConfig
+from chats.src.controllers.http import ChatController
+from chats.src.domain.entities import UserDM
+from chats.src.infrasructure.gateways import AuthGateway
+from chats.src.infrasructure.hub import ClientConnection, ConnectionHub
+from chats.src.infrasructure.metrics import SocketMetrics
+from chats.src.infrasructure.protocol import JsonFrameCodec
+
+
+USER = "9a8b7c6d-5e4f-4a3b-8c2d-1e0f9a8b7c6d"
+
+
+def _gateway(handler) -> AuthGateway:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AuthGateway(AuthConfig(AUTH_URL="http://auth/verify"), client)
+
+
+def _down(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("connection refused", request=request)
+
+
+def test_auth_outage_is_not_an_invalid_token():
+    verify = lambda handler: asyncio.run(_gateway(handler).verify_token_with_auth_service("t"))
+    with pytest.raises(ConnectionError):
+        verify(_down)
+    with pytest.raises(ConnectionError):
+        verify(lambda request: httpx.Response(503))
+    with pytest.raises(ValueError):
+        verify(lambda request: httpx.Response(401))
+
+
+class _Container:
+    def __init__(self, interactor: AuthenticateInteractor) -> None:
+        self._interactor = interactor
+
+    def __call__(self) -> "_Container":
+        return self
+
+    async def __aenter__(self) -> "_Container":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    async def get(self, dependency):
+        return self._interactor
+
+
+def test_refresh_during_auth_outage_keeps_the_session():
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+    user = UserDM(uuid=USER, user_type="user", expires_at=expires_at)
+    connection = ClientConnection(
+        user, None, "old", JsonFrameCodec(), SendQueueConfig(), SocketMetrics()
+    )
+    hub = ConnectionHub(logging.getLogger("test-auth"))
+    container = _Container(AuthenticateInteractor(_gateway(_down)))
+    controller = ChatController.__new__(ChatController)
+
+    frame = asyncio.run(controller._dispatch(
+        container, hub, None, connection,
+        json.dumps({"type": "auth", "id": "1", "token": "fresh"}),
+        logging.getLogger("test-auth")
+    ))
+    assert frame["type"] == "error" and frame["id"] == "1"
+    assert "недоступен" in frame["detail"]
+    assert (connection.user, connection.fingerprint) == (user, "old")
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import logging
+
+from chats.src.application.dto import RemoveMemberDTO
+from chats.src.application.interactors import RemoveMemberInteractor
+from chats.src.config import PresenceConfig, SendQueueConfig
+from chats.src.domain.entities import ChatDM, ChatMemberDM, UserDM
+from chats.src.infrasructure.hub import ClientConnection, ConnectionHub
+from chats.src.infrasructure.metrics import SocketMetrics
+from chats.src.infrasructure.presence import CHAT_CHANNEL, PresenceService
+from chats.src.infrasructure.protocol import JsonFrameCodec
+
+
+CHAT = "5f1c2a3b-4d5e-4f60-8a7b-9c0d1e2f3a4b"
+
+
+class _Socket:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send_text(self, data: str) -> None:
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        pass
+
+
+class _PubSub:
+    subscribed = True
+
+    def __init__(self) -> None:
+        self.messages = asyncio.Queue()
+        self.channels = set()
+
+    async def subscribe(self, channel: str) -> None:
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        self.channels.discard(channel)
+
+    async def get_message(self, timeout: float):
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def test_kick_unsubscribes_only_the_removed_user():
+    logger = logging.getLogger("test-groups")
+
+    async def scenario():
+        hub = ConnectionHub(logger)
+        presence = PresenceService(hub, None, PresenceConfig(CHATS_TYPING_TICK=0.01), logger)
+        presence._pubsub = pubsub = _PubSub()
+        sockets = {}
+        for user_uuid in ("removed", "stays"):
+            sockets[user_uuid] = _Socket()
+            connection = ClientConnection(
+                UserDM(uuid=user_uuid, user_type="user"), sockets[user_uuid], user_uuid,
+                JsonFrameCodec(), SendQueueConfig(), SocketMetrics()
+            )
+            connection.start(lambda c, reason: None)
+            await presence.subscribe(connection, CHAT)
+        listener = asyncio.create_task(presence._listen())
+        channel = CHAT_CHANNEL.format(chat_uuid=CHAT).encode()
+        for frame in (
+            {"type": "kick", "chat_uuid": CHAT, "user_uuid": "removed"},
+            {"type": "message", "message": {"text": "after"}},
+        ):
+            await pubsub.messages.put({"type": "message", "channel": channel, "data": json.dumps(frame)})
+        await asyncio.sleep(0.05)
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        return sockets, presence
+
+    sockets, presence = asyncio.run(scenario())
+    assert sockets["removed"].sent == [{"type": "unsubscribed", "chat_uuid": CHAT}]
+    assert sockets["stays"].sent == [{"type": "message", "message": {"text": "after"}}]
+    assert [c.user.uuid for c in presence._subscribers[CHAT]] == ["stays"]
+
+
+class _Directory:
+    async def get_chat(self, chat_uuid):
+        return ChatDM(uuid=chat_uuid, kind="group", title="Дом", member_count=3)
+
+    async def get_member(self, chat_uuid, user_uuid):
+        return ChatMemberDM(chat_uuid=chat_uuid, user_uuid=user_uuid, role="owner")
+
+    async def remove_member(self, chat_uuid, user_uuid):
+        return ChatDM(uuid=chat_uuid, kind="group", title="Дом", member_count=2)
+
+
+class _Recorder:
+    def __init__(self, calls) -> None:
+        self._calls = calls
+
+    def __getattr__(self, name):
+        async def record(*args):
+            self._calls.append((name, *args))
+        return record
+
+
+def test_removed_member_is_dropped_from_cache_and_sockets_after_commit():
+    calls = []
+    recorder = _Recorder(calls)
+    interactor = RemoveMemberInteractor(recorder, _Directory(), recorder, recorder)
+    chat = asyncio.run(interactor(RemoveMemberDTO(user_uuid="owner", chat_uuid=CHAT, member_uuid="member")))
+    assert chat.member_count == 2
+    assert calls == [("commit",), ("remove", CHAT, "member"), ("kick", CHAT, "member")]
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+from chats.src.config import SendQueueConfig
+from chats.src.domain.entities import UserDM
+from chats.src.infrasructure.hub import ClientConnection
+from chats.src.infrasructure.metrics import SocketMetrics
+from chats.src.infrasructure.protocol import JsonFrameCodec
+
+
+class _Socket:
+    def __init__(self) -> None:
+        self.sent = []
+        self.closed_with = None
+
+    async def send_text(self, data: str) -> None:
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.closed_with = code
+
+
+def _connection(socket: _Socket, **config) -> ClientConnection:
+    codec = JsonFrameCodec()
+    return ClientConnection(
+        UserDM(uuid="u1", user_type="user"), socket, "fp", codec,
+        SendQueueConfig(**config), SocketMetrics()
+    )
+
+
+def _push(connection: ClientConnection, index: int) -> None:
+    frame = {"type": "message", "index": index}
+    connection.push(connection.codec.encode(frame), frame)
+
+
+def test_waiting_frames_are_written_as_one_batch():
+    socket = _Socket()
+
+    async def scenario():
+        connection = _connection(socket)
+        connection.start(lambda c, reason: None)
+        for index in range(3):
+            _push(connection, index)
+        await asyncio.sleep(0.01)
+        await connection.stop()
+
+    asyncio.run(scenario())
+    assert len(socket.sent) == 1
+    assert socket.sent[0]["type"] == "batch"
+    assert [frame["index"] for frame in socket.sent[0]["frames"]] == [0, 1, 2]
+
+
+def test_disconnect_policy_writes_nothing_to_the_closing_socket():
+    socket = _Socket()
+    failures = []
+
+    async def scenario():
+        connection = _connection(socket, CHATS_WS_QUEUE_SIZE=4, CHATS_WS_SLOW_CONSUMER_POLICY="disconnect")
+        connection.start(lambda c, reason: failures.append(reason))
+        for index in range(5):
+            _push(connection, index)
+        await asyncio.sleep(0.01)
+        return connection
+
+    connection = asyncio.run(scenario())
+    assert connection.closed
+    assert len(failures) == 1
+    assert socket.sent == []
+    assert socket.closed_with == 1008
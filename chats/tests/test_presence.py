@@ -0,0 +1,43 @@
+import asyncio
+import logging
+
+from redis.asyncio import Redis
+
+from chats.src.config import PresenceConfig
+from chats.src.infrasructure.hub import ConnectionHub
+from chats.src.infrasructure.presence import PresenceService
+
+
+class _Errors(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(logging.ERROR)
+        self.records = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def test_listen_waits_for_a_subscription():
+    logger = logging.getLogger("test-presence")
+    errors = _Errors()
+    logger.addHandler(errors)
+
+    async def scenario():
+        # Nothing listens on this port: an unsubscribed pubsub must not
+        # try to read from it.
+        redis_client = Redis(host="127.0.0.1", port=1)
+        presence = PresenceService(
+            ConnectionHub(logger), redis_client, PresenceConfig(CHATS_TYPING_TICK=0.01), logger
+        )
+        presence._pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        listener = asyncio.create_task(presence._listen())
+        await asyncio.sleep(0.1)
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        await redis_client.aclose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        logger.removeHandler(errors)
+    assert errors.records == []
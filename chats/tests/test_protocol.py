@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+
+from chats.src.infrasructure.protocol import BinaryFormatError, BinaryFrameCodec
+
+
+MESSAGE = {
+    "uuid": "0b0e7d4c-3f0a-4a57-9c1e-6a9f7c2d1e01",
+    "chat_uuid": "5f1c2a3b-4d5e-4f60-8a7b-9c0d1e2f3a4b",
+    "sender_type": "user",
+    "sender_uuid": "9a8b7c6d-5e4f-4a3b-8c2d-1e0f9a8b7c6d",
+    "recipient_type": "admin",
+    "recipient_uuid": "1a2b3c4d-5e6f-4a7b-8c9d-0e1f2a3b4c5d",
+    "message": "Здравствуйте, квартира ещё сдаётся?",
+    "timestamp": datetime(2026, 10, 19, 12, 30, 5, 123456),
+    "is_edited": True,
+    "edited_at": datetime(2026, 10, 19, 12, 31),
+    "seq": 42,
+}
+
+
+@pytest.mark.parametrize("threshold", [0, 1 << 20])
+@pytest.mark.parametrize("frame", [
+    {"type": "message", "message": MESSAGE, "cursor": "1729340000000-0", "id": None},
+    {"type": "ack", "message": {**MESSAGE, "edited_at": None, "is_edited": False}, "id": "7"},
+    {"type": "error", "detail": "Вы не участник чата.", "id": "8"},
+    {
+        "type": "send", "chat_uuid": MESSAGE["chat_uuid"], "recipient_uuid": MESSAGE["recipient_uuid"],
+        "recipient_type": "user", "content": "привет", "id": "9",
+    },
+    {
+        "type": "edit", "message_uuid": MESSAGE["uuid"], "chat_uuid": MESSAGE["chat_uuid"],
+        "content": "исправлено", "id": "10",
+    },
+    {"type": "delete", "message_uuid": MESSAGE["uuid"], "chat_uuid": MESSAGE["chat_uuid"], "id": None},
+    {"type": "auth", "token": "header.payload.signature", "id": "11"},
+    {"type": "presence", "chat_uuid": MESSAGE["chat_uuid"], "users": {"u1": "typing"}, "id": None},
+])
+def test_frame_round_trip(frame, threshold):
+    codec = BinaryFrameCodec(compress_threshold=threshold)
+    assert codec.decode(codec.encode(frame)) == frame
+
+
+def test_batch_round_trip():
+    codec = BinaryFrameCodec(compress_threshold=64)
+    frames = [
+        {"type": "error", "detail": "первый", "id": None},
+        {"type": "message", "message": MESSAGE, "cursor": None, "id": None},
+    ]
+    decoded = codec.decode(codec.batch([codec.encode(frame) for frame in frames]))
+    assert decoded == {"type": "batch", "frames": frames}
+
+
+def test_group_send_without_recipient_uses_the_chat():
+    codec = BinaryFrameCodec(compress_threshold=1 << 20)
+    frame = {"type": "send", "chat_uuid": MESSAGE["chat_uuid"], "content": "всем", "id": None}
+    decoded = codec.decode(codec.encode(frame))
+    assert decoded["recipient_uuid"] == MESSAGE["chat_uuid"]
+
+
+@pytest.mark.parametrize("data", [b"", b"\x02\x11\x00", b"\x01\x11\x00\xff\x00\x10ab", b"\x01\x63\x00\xff"])
+def test_malformed_frames_are_rejected(data):
+    with pytest.raises(BinaryFormatError):
+        BinaryFrameCodec(compress_threshold=0).decode(data)
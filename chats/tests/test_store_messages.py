@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime
+from typing import List
+
+from chats.src.application.interactors import StoreMessagesInteractor
+from chats.src.domain.entities import MessageDM, SendMessageDM
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+class _Gateway:
+    """Fails every statement that contains a message with the text "bad"."""
+
+    def __init__(self) -> None:
+        self.statements: List[int] = []
+
+    async def insert_messages(self, batch: List[SendMessageDM]) -> List[MessageDM]:
+        self.statements.append(len(batch))
+        if any(params.message == "bad" for params in batch):
+            raise ValueError("bad row")
+        return [
+            MessageDM(
+                uuid=params.uuid,
+                chat_uuid=params.chat_uuid,
+                sender_type=params.user_type,
+                sender_uuid=params.user_uuid,
+                recipient_type=params.recipient_type,
+                recipient_uuid=params.recipient_uuid,
+                message=params.message,
+                timestamp=datetime(2026, 1, 1),
+                is_edited=False,
+                edited_at=None,
+            )
+            for params in batch
+        ]
+
+
+class _Cache:
+    def __init__(self) -> None:
+        self.added: List[MessageDM] = []
+
+    async def add_recent(self, messages: List[MessageDM]) -> None:
+        self.added += messages
+
+
+def _params(uuid: str, message: str) -> SendMessageDM:
+    return SendMessageDM(
+        uuid=uuid, chat_uuid="c1", user_type="user", user_uuid="u1",
+        recipient_type="user", recipient_uuid="u2", message=message
+    )
+
+
+def _store(batch: List[SendMessageDM]):
+    session, gateway, cache = _Session(), _Gateway(), _Cache()
+    outcomes = asyncio.run(StoreMessagesInteractor(session, gateway, cache)(batch))
+    return outcomes, session, gateway, cache
+
+
+def test_batch_is_inserted_in_one_statement():
+    outcomes, session, gateway, cache = _store([_params("m1", "a"), _params("m2", "b")])
+    assert [message.uuid for message in outcomes] == ["m1", "m2"]
+    assert gateway.statements == [2]
+    assert (session.commits, session.rollbacks) == (1, 0)
+    assert [message.uuid for message in cache.added] == ["m1", "m2"]
+
+
+def test_bad_row_is_rejected_alone():
+    outcomes, session, gateway, cache = _store(
+        [_params("m1", "a"), _params("m2", "bad"), _params("m3", "c")]
+    )
+    assert outcomes[0].uuid == "m1" and outcomes[2].uuid == "m3"
+    assert isinstance(outcomes[1], ValueError)
+    assert gateway.statements == [3, 1, 1, 1]
+    assert (session.commits, session.rollbacks) == (2, 2)
+    assert [message.uuid for message in cache.added] == ["m1", "m3"]
+
+
+def test_single_message_is_not_retried():
+    outcomes, session, gateway, _ = _store([_params("m1", "bad")])
+    assert isinstance(outcomes[0], ValueError)
+    assert gateway.statements == [1]
+    assert session.rollbacks == 1
@@ -0,0 +1,116 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from dishka import AsyncContainer
+from faststream.asgi import AsgiResponse
+from faststream.rabbit import RabbitBroker, RabbitQueue
+
+from common.src.infrastructure.consumers import ConsumerRegistry
+
+
+async def get_queue_lag(broker: RabbitBroker, queue: str) -> Optional[int]:
+    try:
+        queue_obj = await broker.declare_queue(RabbitQueue(queue, passive=True))
+        declare_ok = await queue_obj.declare()
+    except Exception:
+        return None
+    return declare_ok.message_count
+
+
+async def _read_json(receive: Any) -> Dict[str, Any]:
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return json.loads(body or b"{}")
+
+
+def _json_response(payload: Any, status_code: int = 200) -> AsgiResponse:
+    return AsgiResponse(
+        body=json.dumps(payload).encode(),
+        status_code=status_code,
+        headers={"content-type": "application/json"},
+    )
+
+
+class ConsumersAdmin:
+    """
+    GET returns settings and live stats of every limited subscriber.
+    POST {"queue": ..., "max_concurrency": ..., "throttle_threshold": ...}
+    changes them in place. Messages waiting for a slot are bounded only by
+    prefetch, the channel qos set at startup, which is reported here but
+    only changes with a restart; `throttle_threshold` is just the wait
+    depth past which arrivals count towards `throttled_total`.
+    """
+
+    def __init__(self, container: AsyncContainer, broker: RabbitBroker) -> None:
+        self._container = container
+        self._broker = broker
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        registry = await self._container.get(ConsumerRegistry)
+        if scope["method"] == "POST":
+            response = await self._update(registry, await _read_json(receive))
+        elif scope["method"] == "GET":
+            response = _json_response(await self._describe(registry))
+        else:
+            response = _json_response({"error": "Method not allowed"}, 405)
+        await response(scope, receive, send)
+
+    async def _describe(self, registry: ConsumerRegistry) -> List[Dict[str, Any]]:
+        consumers = []
+        for limiter in registry.values():
+            snapshot = limiter.snapshot()
+            snapshot["queue_lag"] = await get_queue_lag(self._broker, limiter.queue)
+            consumers.append(snapshot)
+        return consumers
+
+    async def _update(self, registry: ConsumerRegistry, data: Dict[str, Any]) -> AsgiResponse:
+        queue = data.get("queue")
+        if queue not in registry:
+            return _json_response({"error": f"Unknown consumer {queue}"}, 404)
+        try:
+            await registry[queue].resize(
+                max_concurrency=_optional_int(data.get("max_concurrency")),
+                throttle_threshold=_optional_int(data.get("throttle_threshold")),
+            )
+        except (TypeError, ValueError):
+            return _json_response({"error": "Limits must be integers"}, 400)
+        return _json_response(registry[queue].snapshot())
+
+
+class MetricsExporter:
+    """Prometheus text exposition of the subscriber limiters."""
+
+    def __init__(self, container: AsyncContainer, broker: RabbitBroker) -> None:
+        self._container = container
+        self._broker = broker
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        registry = await self._container.get(ConsumerRegistry)
+        lines = []
+        for limiter in registry.values():
+            labels = f'{{queue="{limiter.queue}"}}'
+            lag = await get_queue_lag(self._broker, limiter.queue)
+            if lag is not None:
+                lines.append(f"consumer_queue_lag{labels} {lag}")
+            for name, value in limiter.snapshot().items():
+                if name != "queue":
+                    lines.append(f"consumer_{name}{labels} {value}")
+        lines += await self._service_lines()
+        response = AsgiResponse(
+            body=("\n".join(lines) + "\n").encode(),
+            status_code=200,
+            headers={"content-type": "text/plain; version=0.0.4"},
+        )
+        await response(scope, receive, send)
+
+
+    async def _service_lines(self) -> List[str]:
+        return []
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    return None if value is None else int(value)
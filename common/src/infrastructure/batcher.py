@@ -0,0 +1,103 @@
+import asyncio
+from contextlib import nullcontext, suppress
+from typing import Awaitable, Callable, Generic, List, Optional, Set, Tuple, TypeVar, Union
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class Batcher(Generic[T, R]):
+    """
+    Collects items submitted by concurrent handlers and passes them to
+    `flush` in one call once `max_size` items are pending or `max_wait`
+    seconds have passed since the first of them arrived. `flush` returns one
+    result or exception per item and every submitter gets its own; if
+    `flush` itself raises, every item of the batch fails with that error.
+    When `max_pending` is set, at most that many items are buffered or being
+    flushed and further submitters wait for room.
+
+    Batches are flushed one at a time, in order, unless `max_flushes` lets
+    several run at once; the next batch is only cut once a flush slot is
+    free, so it takes whatever arrived in the meantime.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[T]], Awaitable[List[Union[R, Exception]]]],
+        max_size: int,
+        max_wait: float,
+        max_pending: Optional[int] = None,
+        max_flushes: int = 1,
+    ) -> None:
+        self._flush = flush
+        self._max_size = max_size
+        self._max_wait = max_wait
+        self._room = asyncio.Semaphore(max_pending) if max_pending else nullcontext()
+        self._slots = asyncio.Semaphore(max_flushes)
+        self._flushing: Set[asyncio.Task] = set()
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, item: T) -> R:
+        async with self._room:
+            if self._closed:
+                raise RuntimeError("Batcher is closed")
+            if self._task is None:
+                self._task = asyncio.create_task(self._run())
+            future = asyncio.get_running_loop().create_future()
+            self._pending.append((item, future))
+            self._ready.set()
+            if len(self._pending) >= self._max_size:
+                self._full.set()
+            return await future
+
+    async def close(self) -> None:
+        self._closed = True
+        self._ready.set()
+        self._full.set()
+        if self._task is not None:
+            await self._task
+
+    async def _run(self) -> None:
+        while not (self._closed and not self._pending):
+            await self._ready.wait()
+            if not self._closed:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._full.wait(), timeout=self._max_wait)
+            await self._slots.acquire()
+            batch = self._take()
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._drain(batch))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+        await asyncio.gather(*self._flushing)
+
+    def _take(self) -> List[Tuple[T, asyncio.Future]]:
+        batch = self._pending[:self._max_size]
+        self._pending = self._pending[self._max_size:]
+        if not self._pending:
+            self._ready.clear()
+        if len(self._pending) < self._max_size and not self._closed:
+            self._full.clear()
+        return batch
+
+    async def _drain(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            outcomes = await self._flush([item for item, _ in batch])
+        except Exception as e:
+            outcomes = [e] * len(batch)
+        finally:
+            self._slots.release()
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
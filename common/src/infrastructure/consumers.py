@@ -0,0 +1,119 @@
+import asyncio
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import AsyncIterator, Dict, Optional
+
+
+class ConsumerLimiter:
+    """
+    Caps how many handlers of one subscriber run at once. Handlers over the
+    cap wait for a slot while their message stays unacked, so once
+    `prefetch` messages are held the broker stops delivering: the channel
+    qos is what bounds the in-process queue. Arrivals finding more than
+    `throttle_threshold` handlers already waiting are counted as throttled,
+    the signal to add consumers; the threshold bounds nothing itself.
+    Nacking them instead would have the broker redeliver the same messages
+    at once, in a loop for as long as the limit holds.
+    """
+
+    def __init__(
+        self,
+        queue: str,
+        prefetch: int,
+        max_concurrency: int,
+        throttle_threshold: int,
+    ) -> None:
+        self.queue = queue
+        self.prefetch = prefetch
+        self.max_concurrency = max_concurrency
+        self.throttle_threshold = throttle_threshold
+        self.in_flight = 0
+        self.waiting = 0
+        self.processed_total = 0
+        self.failed_total = 0
+        self.throttled_total = 0
+        self.wait_seconds_total = 0.0
+        self.handle_seconds_total = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def saturation(self) -> float:
+        return self.in_flight / self.max_concurrency if self.max_concurrency else 1.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self._acquire()
+        started = monotonic()
+        try:
+            yield
+        except Exception:
+            self.failed_total += 1
+            raise
+        else:
+            self.processed_total += 1
+        finally:
+            self.handle_seconds_total += monotonic() - started
+            await self._release()
+
+    async def resize(
+        self,
+        max_concurrency: Optional[int] = None,
+        throttle_threshold: Optional[int] = None,
+    ) -> None:
+        async with self._condition:
+            if max_concurrency is not None:
+                self.max_concurrency = max(1, max_concurrency)
+            if throttle_threshold is not None:
+                self.throttle_threshold = max(0, throttle_threshold)
+            self._condition.notify_all()
+
+    def snapshot(self) -> dict:
+        return {
+            "queue": self.queue,
+            "prefetch": self.prefetch,
+            "max_concurrency": self.max_concurrency,
+            "throttle_threshold": self.throttle_threshold,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "saturation": self.saturation,
+            "processed_total": self.processed_total,
+            "failed_total": self.failed_total,
+            "throttled_total": self.throttled_total,
+            "wait_seconds_total": self.wait_seconds_total,
+            "handle_seconds_total": self.handle_seconds_total,
+        }
+
+    async def _acquire(self) -> None:
+        if self.in_flight >= self.max_concurrency and self.waiting >= self.throttle_threshold:
+            self.throttled_total += 1
+        self.waiting += 1
+        started = monotonic()
+        try:
+            async with self._condition:
+                await self._condition.wait_for(lambda: self.in_flight < self.max_concurrency)
+                self.in_flight += 1
+        finally:
+            self.waiting -= 1
+            self.wait_seconds_total += monotonic() - started
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+
+class ConsumerRegistry:
+    def __init__(self, limiters: Dict[str, ConsumerLimiter]) -> None:
+        self._limiters = limiters
+
+    def __getitem__(self, queue: str) -> ConsumerLimiter:
+        return self._limiters[queue]
+
+    def __contains__(self, queue: str) -> bool:
+        return queue in self._limiters
+
+    def limit(self, queue: str):
+        return self._limiters[queue].slot()
+
+    def values(self):
+        return self._limiters.values()
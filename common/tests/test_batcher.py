@@ -0,0 +1,152 @@
+import asyncio
+from typing import List, Union
+
+import pytest
+
+from common.src.infrastructure.batcher import Batcher
+
+
+def _run(batches: List[List[int]], max_size: int, max_wait: float, submit, **kwargs):
+    async def flush(items: List[int]) -> List[Union[int, Exception]]:
+        batches.append(items)
+        return [ValueError(item) if item < 0 else item * 10 for item in items]
+
+    async def scenario():
+        batcher = Batcher(flush=flush, max_size=max_size, max_wait=max_wait, **kwargs)
+        try:
+            return await submit(batcher)
+        finally:
+            await batcher.close()
+
+    return asyncio.run(scenario())
+
+
+def test_full_batch_is_flushed_without_waiting():
+    batches = []
+
+    async def submit(batcher):
+        started = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+        return results, asyncio.get_running_loop().time() - started
+
+    results, elapsed = _run(batches, max_size=3, max_wait=5.0, submit=submit)
+    assert results == [0, 10, 20]
+    assert batches == [[0, 1, 2]]
+    assert elapsed < 1.0
+
+
+def test_items_beyond_max_size_go_to_the_next_batch():
+    batches = []
+
+    async def submit(batcher):
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert _run(batches, max_size=2, max_wait=0.01, submit=submit) == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    batches = []
+
+    async def submit(batcher):
+        task = asyncio.create_task(batcher.submit(7))
+        await asyncio.sleep(0.01)
+        assert batches == []
+        return await asyncio.wait_for(task, timeout=1.0)
+
+    assert _run(batches, max_size=10, max_wait=0.05, submit=submit) == 70
+    assert batches == [[7]]
+
+
+def test_each_submitter_gets_its_own_outcome():
+    batches = []
+
+    async def submit(batcher):
+        return await asyncio.gather(*(batcher.submit(i) for i in (1, -2, 3)), return_exceptions=True)
+
+    ok, failed, other = _run(batches, max_size=3, max_wait=0.01, submit=submit)
+    assert (ok, other) == (10, 30)
+    assert isinstance(failed, ValueError)
+
+
+def test_failed_flush_fails_the_whole_batch():
+    async def scenario():
+        async def flush(items):
+            raise RuntimeError("down")
+
+        batcher = Batcher(flush=flush, max_size=2, max_wait=0.01)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        await batcher.close()
+        return results
+
+    assert [str(result) for result in asyncio.run(scenario())] == ["down", "down"]
+
+
+def test_max_pending_holds_back_submitters():
+    batches = []
+
+    async def submit(batcher):
+        return await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+
+    assert _run(batches, max_size=4, max_wait=0.01, submit=submit, max_pending=2) == [0, 10, 20, 30]
+    assert batches == [[0, 1], [2, 3]]
+
+
+def test_closed_batcher_rejects_items():
+    async def scenario():
+        async def flush(items):
+            return items
+
+        batcher = Batcher(flush=flush, max_size=2, max_wait=0.01)
+        await batcher.close()
+        with pytest.raises(RuntimeError):
+            await batcher.submit(1)
+
+    asyncio.run(scenario())
+
+
+def _overlap(max_flushes: int) -> int:
+    async def scenario():
+        running = peak = 0
+
+        async def flush(items):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            return items
+
+        batcher = Batcher(flush=flush, max_size=1, max_wait=0.01, max_flushes=max_flushes)
+        assert await asyncio.gather(*(batcher.submit(i) for i in range(4))) == [0, 1, 2, 3]
+        await batcher.close()
+        return peak
+
+    return asyncio.run(scenario())
+
+
+def test_batches_are_flushed_one_at_a_time_by_default():
+    assert _overlap(max_flushes=1) == 1
+
+
+def test_max_flushes_lets_batches_overlap_up_to_the_bound():
+    assert _overlap(max_flushes=3) == 3
+
+
+def test_close_waits_for_concurrent_flushes():
+    async def scenario():
+        done = []
+
+        async def flush(items):
+            await asyncio.sleep(0.05)
+            done.extend(items)
+            return items
+
+        batcher = Batcher(flush=flush, max_size=1, max_wait=0.01, max_flushes=2)
+        tasks = [asyncio.create_task(batcher.submit(i)) for i in range(2)]
+        await asyncio.sleep(0)
+        await batcher.close()
+        assert sorted(done) == [0, 1]
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == [0, 1]
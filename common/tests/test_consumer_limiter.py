@@ -0,0 +1,69 @@
+import asyncio
+
+from common.src.infrastructure.consumers import ConsumerLimiter
+
+
+def _limiter(max_concurrency: int = 1, throttle_threshold: int = 0) -> ConsumerLimiter:
+    return ConsumerLimiter(
+        queue="q", prefetch=10, max_concurrency=max_concurrency, throttle_threshold=throttle_threshold
+    )
+
+
+def test_full_limiter_waits_instead_of_rejecting():
+    async def scenario():
+        limiter = _limiter()
+        running = []
+
+        async def handler(i: int) -> None:
+            async with limiter.slot():
+                running.append(limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(handler(i) for i in range(5)))
+        return limiter, running
+
+    limiter, running = asyncio.run(scenario())
+    assert running == [1] * 5
+    assert limiter.processed_total == 5
+    assert limiter.throttled_total == 4
+    assert limiter.in_flight == limiter.waiting == 0
+
+
+def test_failed_handler_releases_its_slot():
+    async def scenario():
+        limiter = _limiter()
+        try:
+            async with limiter.slot():
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        async with limiter.slot():
+            pass
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert (limiter.failed_total, limiter.processed_total, limiter.in_flight) == (1, 1, 0)
+
+
+def test_resize_admits_waiting_handlers():
+    async def scenario():
+        limiter = _limiter(max_concurrency=1, throttle_threshold=10)
+        release = asyncio.Event()
+        peak = 0
+
+        async def handler() -> None:
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await release.wait()
+
+        tasks = [asyncio.create_task(handler()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert (limiter.in_flight, limiter.waiting) == (1, 2)
+        await limiter.resize(max_concurrency=3)
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(*tasks)
+        return peak
+
+    assert asyncio.run(scenario()) == 3
@@ -0,0 +1,38 @@
+"""users inactive created_at index
+
+Revision ID: 3f1c9a7d2b64
+Revises: 
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_inactive_created_at",
+            "users",
+            ["created_at", "uuid"],
+            postgresql_where=sa.text("is_active = false"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_inactive_created_at",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,37 @@
+"""messages chat timestamp index
+
+Revision ID: 8b2e5d41c7a9
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e5d41c7a9'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_messages_chat_timestamp_uuid",
+            "messages",
+            ["chat_uuid", sa.text("timestamp DESC"), sa.text("uuid DESC")],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_messages_chat_timestamp_uuid",
+            table_name="messages",
+            postgresql_concurrently=True,
+        )
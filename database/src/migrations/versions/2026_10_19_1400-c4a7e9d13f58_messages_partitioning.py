@@ -0,0 +1,112 @@
+"""messages partitioning
+
+Revision ID: c4a7e9d13f58
+Revises: 8b2e5d41c7a9
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e9d13f58'
+down_revision: Union[str, None] = '8b2e5d41c7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = """
+    uuid UUID NOT NULL,
+    chat_uuid UUID NOT NULL REFERENCES chats (uuid),
+    sender_type VARCHAR(10) NOT NULL,
+    sender_uuid UUID NOT NULL,
+    recipient_type VARCHAR(10) NOT NULL,
+    recipient_uuid UUID NOT NULL,
+    message TEXT NOT NULL,
+    timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    is_edited BOOLEAN,
+    edited_at TIMESTAMP WITHOUT TIME ZONE
+"""
+
+# The existing table becomes the first partition, covering everything up
+# to the next month (or past its newest row), so no rows are copied. The
+# CHECK constraint lets ATTACH skip its own validation scan. Monthly
+# partitions for the following months are created here; afterwards the
+# events service keeps them ahead of time.
+ATTACH_LEGACY = """
+DO $$
+DECLARE
+    bound TIMESTAMP;
+    starts_at TIMESTAMP;
+BEGIN
+    SELECT greatest(
+        date_trunc('month', localtimestamp) + interval '1 month',
+        date_trunc('month', max(timestamp)) + interval '1 month'
+    ) INTO bound FROM messages_legacy;
+    EXECUTE format(
+        'ALTER TABLE messages_legacy ADD CONSTRAINT messages_legacy_bound '
+        'CHECK (timestamp IS NOT NULL AND timestamp < %L) NOT VALID', bound
+    );
+    ALTER TABLE messages_legacy VALIDATE CONSTRAINT messages_legacy_bound;
+    EXECUTE format(
+        'ALTER TABLE messages ATTACH PARTITION messages_legacy '
+        'FOR VALUES FROM (MINVALUE) TO (%L)', bound
+    );
+    ALTER TABLE messages_legacy DROP CONSTRAINT messages_legacy_bound;
+    FOR month IN 0..2 LOOP
+        starts_at := bound + month * interval '1 month';
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+            'messages_p' || to_char(starts_at, 'YYYYMM'), starts_at, starts_at + interval '1 month'
+        );
+    END LOOP;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    op.execute("ALTER TABLE messages_legacy DROP CONSTRAINT messages_pkey")
+    op.execute("ALTER INDEX ix_messages_uuid RENAME TO ix_messages_legacy_uuid")
+    op.execute(
+        "ALTER INDEX ix_messages_chat_timestamp_uuid "
+        "RENAME TO ix_messages_legacy_chat_timestamp_uuid"
+    )
+    op.execute("UPDATE messages_legacy SET timestamp = localtimestamp WHERE timestamp IS NULL")
+    op.execute("ALTER TABLE messages_legacy ALTER COLUMN timestamp SET NOT NULL")
+    op.execute(
+        "ALTER TABLE messages_legacy "
+        "ADD CONSTRAINT messages_legacy_pkey PRIMARY KEY (uuid, timestamp)"
+    )
+    op.execute(f"""
+        CREATE TABLE messages (
+            {COLUMNS},
+            CONSTRAINT messages_pkey PRIMARY KEY (uuid, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    # Created before ATTACH, so the matching legacy indexes are adopted
+    # instead of being rebuilt.
+    op.execute("CREATE INDEX ix_messages_uuid ON messages (uuid)")
+    op.execute(
+        "CREATE INDEX ix_messages_chat_timestamp_uuid "
+        "ON messages (chat_uuid, timestamp DESC, uuid DESC)"
+    )
+    op.execute(ATTACH_LEGACY)
+
+
+def downgrade() -> None:
+    # Partitions that were already detached or archived are not restored.
+    op.execute(f"CREATE TABLE messages_plain ({COLUMNS})")
+    op.execute("INSERT INTO messages_plain SELECT * FROM messages")
+    op.execute("DROP TABLE messages")
+    op.execute("ALTER TABLE messages_plain RENAME TO messages")
+    op.execute("ALTER TABLE messages ALTER COLUMN timestamp DROP NOT NULL")
+    op.execute("ALTER TABLE messages ADD CONSTRAINT messages_pkey PRIMARY KEY (uuid)")
+    op.execute("CREATE INDEX ix_messages_uuid ON messages (uuid)")
+    op.execute(
+        "CREATE INDEX ix_messages_chat_timestamp_uuid "
+        "ON messages (chat_uuid, timestamp DESC, uuid DESC)"
+    )
@@ -0,0 +1,104 @@
+"""messages search vector
+
+Revision ID: 5d93b0e2a7c1
+Revises: c4a7e9d13f58
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d93b0e2a7c1'
+down_revision: Union[str, None] = 'c4a7e9d13f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# fastupdate queues new entries in a pending list that is merged into the
+# index in bulk (by vacuum or the events service), so batched inserts do
+# not pay for one posting-tree update per lexeme.
+INDEX_OPTIONS = "USING gin (search_vector) WITH (fastupdate = on, gin_pending_list_limit = 4096)"
+
+# Heap pages of a partition, and leftover rows, updated per backfill
+# transaction.
+BACKFILL_PAGES = 1000
+BACKFILL_ROWS = 5000
+
+
+def upgrade() -> None:
+    # A generated STORED column would rewrite every partition under an
+    # ACCESS EXCLUSIVE lock. A nullable column is added in the catalog
+    # only, a trigger fills it for new and edited rows, and existing rows
+    # are backfilled in short transactions before the index is built. The
+    # trigger is cloned onto partitions created later.
+    op.add_column("messages", sa.Column("search_vector", TSVECTOR(), nullable=True))
+    op.execute("""
+        CREATE FUNCTION messages_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('russian', NEW.message);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER messages_search_vector
+        BEFORE INSERT OR UPDATE OF message ON messages
+        FOR EACH ROW EXECUTE FUNCTION messages_search_vector()
+    """)
+    partitions = op.get_bind().execute(sa.text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = CAST('messages' AS regclass)
+    """)).scalars().all()
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            _backfill(partition)
+    # An index on a partitioned table cannot be built concurrently, so it
+    # is created invalid on the parent only, built on every partition
+    # without blocking writes and attached; it turns valid with the last one.
+    op.execute(f"CREATE INDEX ix_messages_search_vector ON ONLY messages {INDEX_OPTIONS}")
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{partition}_search_vector "
+                f"ON {partition} {INDEX_OPTIONS}"
+            )
+            op.execute(
+                f"ALTER INDEX ix_messages_search_vector "
+                f"ATTACH PARTITION ix_{partition}_search_vector"
+            )
+
+
+def _backfill(partition: str) -> None:
+    bind = op.get_bind()
+    pages = bind.execute(sa.text(
+        f"SELECT pg_relation_size(CAST('{partition}' AS regclass)) / current_setting('block_size')::int"
+    )).scalar_one()
+    # Walks the heap by TID range, one autocommitted UPDATE per chunk.
+    for start in range(0, pages, BACKFILL_PAGES):
+        bind.execute(sa.text(f"""
+            UPDATE {partition}
+            SET search_vector = to_tsvector('russian', message)
+            WHERE ctid >= '({start},0)'::tid AND ctid < '({start + BACKFILL_PAGES},0)'::tid
+              AND search_vector IS NULL
+        """))
+    # Rows that other updates moved behind the sweep.
+    while bind.execute(sa.text(f"""
+        UPDATE {partition}
+        SET search_vector = to_tsvector('russian', message)
+        WHERE ctid IN (SELECT ctid FROM {partition} WHERE search_vector IS NULL LIMIT {BACKFILL_ROWS})
+    """)).rowcount:
+        pass
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_messages_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS messages_search_vector ON messages")
+    op.execute("DROP FUNCTION IF EXISTS messages_search_vector()")
+    op.execute("ALTER TABLE messages DROP COLUMN search_vector")
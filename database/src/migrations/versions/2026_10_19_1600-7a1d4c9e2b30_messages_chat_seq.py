@@ -0,0 +1,125 @@
+"""messages chat seq
+
+Revision ID: 7a1d4c9e2b30
+Revises: 5d93b0e2a7c1
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import List, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1d4c9e2b30'
+down_revision: Union[str, None] = '5d93b0e2a7c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Chats numbered per backfill transaction within one partition.
+CHATS_PER_CHUNK = 500
+
+# Numbers the unnumbered messages of a range of chats in one partition,
+# continuing from chats.last_seq, which is bumped in the same statement.
+NUMBER_CHUNK = """
+    WITH numbered AS (
+        SELECT
+            uuid, timestamp, chat_uuid,
+            row_number() OVER (PARTITION BY chat_uuid ORDER BY timestamp, uuid) AS n
+        FROM {partition}
+        WHERE seq IS NULL AND chat_uuid > CAST(:after AS uuid) AND chat_uuid <= CAST(:last AS uuid)
+    ), counters AS (
+        UPDATE chats
+        SET last_seq = chats.last_seq + added.n
+        FROM (SELECT chat_uuid, count(*) AS n FROM numbered GROUP BY chat_uuid) AS added
+        WHERE chats.uuid = added.chat_uuid
+        RETURNING chats.uuid, chats.last_seq - added.n AS base
+    )
+    UPDATE {partition}
+    SET seq = counters.base + numbered.n
+    FROM numbered
+    JOIN counters ON counters.uuid = numbered.chat_uuid
+    WHERE {partition}.uuid = numbered.uuid AND {partition}.timestamp = numbered.timestamp
+"""
+
+
+def upgrade() -> None:
+    # chats.last_seq is the counter every insert bumps under the chat row
+    # lock; existing messages are numbered in their current order. Chats
+    # nodes of the previous release insert messages without a seq and have
+    # to be stopped before this revision runs.
+    op.add_column("chats", sa.Column("last_seq", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column("messages", sa.Column("seq", sa.BigInteger(), nullable=True))
+    bind = op.get_bind()
+    partitions = bind.execute(sa.text("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = CAST('messages' AS regclass)
+    """)).all()
+    # Partitions cover disjoint time ranges, so walking them oldest first
+    # numbers every chat in timestamp order across partitions.
+    partitions = [name for name, _ in sorted(partitions, key=lambda row: _lower_bound(row[1]))]
+    chunks = _chat_chunks()
+    # One short transaction per partition and chunk of chats instead of a
+    # single UPDATE that rewrites and locks every partition at once.
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            for after, last in chunks:
+                op.get_bind().execute(
+                    sa.text(NUMBER_CHUNK.format(partition=partition)),
+                    {"after": after, "last": last}
+                )
+        # SET NOT NULL would scan every partition under ACCESS EXCLUSIVE;
+        # a validated CHECK lets it skip the scan, and VALIDATE only takes
+        # a lock that lets writes through.
+        for partition in partitions:
+            op.execute(
+                f"ALTER TABLE {partition} ADD CONSTRAINT {partition}_seq_not_null "
+                f"CHECK (seq IS NOT NULL) NOT VALID"
+            )
+            op.execute(f"ALTER TABLE {partition} VALIDATE CONSTRAINT {partition}_seq_not_null")
+        op.alter_column("messages", "seq", nullable=False)
+        for partition in partitions:
+            op.execute(f"ALTER TABLE {partition} DROP CONSTRAINT {partition}_seq_not_null")
+    # Built like ix_messages_search_vector: invalid on the parent, then
+    # concurrently on every partition and attached.
+    op.execute("CREATE INDEX ix_messages_chat_seq ON ONLY messages (chat_uuid, seq)")
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{partition}_chat_seq "
+                f"ON {partition} (chat_uuid, seq)"
+            )
+            op.execute(f"ALTER INDEX ix_messages_chat_seq ATTACH PARTITION ix_{partition}_chat_seq")
+
+
+def _lower_bound(bound: str) -> str:
+    # FOR VALUES FROM (MINVALUE) TO (...), FOR VALUES FROM ('2026-11-01 00:00:00') TO (...) or DEFAULT
+    if bound == "DEFAULT":
+        return "\uffff"
+    lower = bound.partition("FROM (")[2].partition(")")[0]
+    return "" if lower == "MINVALUE" else lower.strip("'")
+
+
+def _chat_chunks() -> List[Tuple[str, str]]:
+    chunks = []
+    after = "00000000-0000-0000-0000-000000000000"
+    while True:
+        last = op.get_bind().execute(sa.text("""
+            SELECT max(uuid) FROM (
+                SELECT uuid FROM chats WHERE uuid > CAST(:after AS uuid) ORDER BY uuid LIMIT :limit
+            ) AS chunk
+        """), {"after": after, "limit": CHATS_PER_CHUNK}).scalar()
+        if last is None:
+            return chunks
+        chunks.append((after, str(last)))
+        after = str(last)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_messages_chat_seq")
+    op.drop_column("messages", "seq")
+    op.drop_column("chats", "last_seq")
@@ -0,0 +1,43 @@
+"""group chats
+
+Revision ID: b6e2f8a4d915
+Revises: 7a1d4c9e2b30
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2f8a4d915'
+down_revision: Union[str, None] = '7a1d4c9e2b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chats", sa.Column("kind", sa.String(10), nullable=False, server_default="direct"))
+    op.add_column("chats", sa.Column("title", sa.String(100), nullable=True))
+    op.add_column("chats", sa.Column("member_count", sa.Integer(), nullable=False, server_default="0"))
+    op.create_table(
+        "chat_members",
+        sa.Column("chat_uuid", sa.UUID(), sa.ForeignKey("chats.uuid", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_uuid", sa.UUID(), nullable=False),
+        sa.Column("role", sa.String(10), nullable=False, server_default="member"),
+        sa.Column("joined_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("chat_uuid", "user_uuid"),
+    )
+    # The primary key serves member lists of a chat; this one the chats
+    # of a user, for access checks and search scopes.
+    op.create_index("ix_chat_members_user_chat", "chat_members", ["user_uuid", "chat_uuid"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_members_user_chat", table_name="chat_members")
+    op.drop_table("chat_members")
+    op.drop_column("chats", "member_count")
+    op.drop_column("chats", "title")
+    op.drop_column("chats", "kind")
@@ -1,5 +1,6 @@
 from enum import Enum
 
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import (
     DeclarativeBase, 
     Mapped, 
@@ -22,7 +23,27 @@ class Chat(Base):
     __tablename__ = "chats"
     uuid: Mapped[str] = mapped_column(sa.UUID, primary_key=True, index=True)
     created_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime, default=sa.func.now())
+    last_seq: Mapped[int] = mapped_column(sa.BigInteger, nullable=False, server_default="0")
+    kind: Mapped[str] = mapped_column(sa.String(10), nullable=False, server_default="direct")
+    title: Mapped[str] = mapped_column(sa.String(100), nullable=True)
+    member_count: Mapped[int] = mapped_column(sa.Integer, nullable=False, server_default="0")
     messages: Mapped[list["Message"]] = relationship("Message", back_populates="chat")
+    members: Mapped[list["ChatMember"]] = relationship("ChatMember", back_populates="chat")
+
+
+class ChatMember(Base):
+    __tablename__ = "chat_members"
+    chat_uuid: Mapped[str] = mapped_column(
+        sa.UUID, sa.ForeignKey("chats.uuid", ondelete="CASCADE"), primary_key=True
+    )
+    user_uuid: Mapped[str] = mapped_column(sa.UUID, primary_key=True)
+    role: Mapped[str] = mapped_column(sa.String(10), nullable=False, server_default="member")
+    joined_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime, nullable=False, server_default=sa.func.now())
+    chat: Mapped["Chat"] = relationship("Chat", back_populates="members")
+
+    __table_args__ = (
+        sa.Index("ix_chat_members_user_chat", "user_uuid", "chat_uuid"),
+    )
 
 
 class Message(Base):
@@ -34,11 +55,31 @@ class Message(Base):
     recipient_type: Mapped[str] = mapped_column(sa.String(10), nullable=False)
     recipient_uuid: Mapped[str] = mapped_column(sa.UUID, nullable=False)
     message: Mapped[str] = mapped_column(sa.Text, nullable=False)
-    timestamp: Mapped[sa.DateTime] = mapped_column(sa.DateTime, default=sa.func.now())
+    timestamp: Mapped[sa.DateTime] = mapped_column(sa.DateTime, primary_key=True, default=sa.func.now())
     is_edited: Mapped[bool] = mapped_column(sa.Boolean, default=False)
     edited_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime, default=None)
+    seq: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    # to_tsvector('russian', message), set by the messages_search_vector trigger
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, nullable=True)
     chat: Mapped["Chat"] = relationship("Chat", back_populates="messages")
 
+    __table_args__ = (
+        sa.Index(
+            "ix_messages_chat_timestamp_uuid",
+            "chat_uuid",
+            sa.text("timestamp DESC"),
+            sa.text("uuid DESC"),
+        ),
+        sa.Index("ix_messages_chat_seq", "chat_uuid", "seq"),
+        sa.Index(
+            "ix_messages_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+            postgresql_with={"fastupdate": "on", "gin_pending_list_limit": 4096},
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
 
 class User(Base):
     __tablename__ = "users"
@@ -51,4 +92,13 @@ class User(Base):
     password: Mapped[str] = mapped_column(sa.String(200), nullable=False)
     is_active: Mapped[bool] = mapped_column(sa.Boolean, nullable=False)
     role: Mapped[Role] = mapped_column(sa.Boolean, nullable=False, default=Role.USER)
-    created_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime, default=sa.func.now())
\ No newline at end of file
+    created_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime, default=sa.func.now())
+
+    __table_args__ = (
+        sa.Index(
+            "ix_users_inactive_created_at",
+            "created_at",
+            "uuid",
+            postgresql_where=sa.text("is_active = false"),
+        ),
+    )
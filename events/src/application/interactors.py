@@ -1,6 +1,32 @@
-from events.src.application.interfaces import CheckUserStatus, DeleteUser, DBSession
+import asyncio
+from datetime import datetime, timezone
+from time import monotonic
+from typing import List
 
-class DeleteUserInteractor:
+from events.src.application.interfaces import (
+    ArchiveMessages,
+    CheckUserStatus,
+    DeleteUser,
+    DBSession,
+    MaintainSearchIndex,
+    ManagePartitions,
+    ScheduleDeletion,
+    SweepUsers
+)
+from events.src.config import (
+    DeleteSchedulerConfig,
+    MessagePartitionsConfig,
+    UserSweeperConfig
+)
+from events.src.domain.entities import PartitionMaintenanceDM, SweepStatsDM
+
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    month = moment.month - 1 + months
+    return moment.replace(year=moment.year + month // 12, month=month % 12 + 1, day=1)
+
+
+class DeleteUsersInteractor:
     def __init__(
         self,
         status_gateway: CheckUserStatus,
@@ -11,8 +37,133 @@ class DeleteUserInteractor:
         self._delete_gateway = delete_gateway
         self._session = session
 
-    async def __call__(self, user_uuid: str) -> None:
-        status = await self._status_gateway.is_task_cancelled(user_uuid=user_uuid)
-        if not status:
-            await self._delete_gateway.delete_user_by_uuid(user_uuid=user_uuid)
-            await self._session.commit()
\ No newline at end of file
+    async def __call__(self, user_uuids: List[str]) -> int:
+        user_uuids = list(dict.fromkeys(user_uuids))
+        cancelled = await self._status_gateway.get_cancelled_tasks(user_uuids=user_uuids)
+        rotten_uuids = [user_uuid for user_uuid in user_uuids if user_uuid not in cancelled]
+        if not rotten_uuids:
+            return 0
+        deleted = await self._delete_gateway.delete_inactive_users(user_uuids=rotten_uuids)
+        await self._session.commit()
+        return deleted
+
+
+class DeleteDueUsersInteractor:
+    def __init__(
+        self,
+        schedule_gateway: ScheduleDeletion,
+        delete_gateway: DeleteUser,
+        session: DBSession,
+        config: DeleteSchedulerConfig,
+    ) -> None:
+        self._schedule_gateway = schedule_gateway
+        self._delete_gateway = delete_gateway
+        self._session = session
+        self._config = config
+
+    async def __call__(self) -> int:
+        deleted = 0
+        while True:
+            now = datetime.now(timezone.utc).timestamp()
+            user_uuids = await self._schedule_gateway.claim_due_users(
+                due=now,
+                limit=self._config.batch_size
+            )
+            if not user_uuids:
+                return deleted
+            try:
+                deleted += await self._delete_gateway.delete_inactive_users(user_uuids=user_uuids)
+                await self._session.commit()
+            except Exception:
+                await self._schedule_gateway.reschedule_users(user_uuids=user_uuids, due=now)
+                raise
+            if len(user_uuids) < self._config.batch_size:
+                return deleted
+
+
+class SweepInactiveUsersInteractor:
+    def __init__(
+        self,
+        sweep_gateway: SweepUsers,
+        session: DBSession,
+        config: UserSweeperConfig,
+    ) -> None:
+        self._sweep_gateway = sweep_gateway
+        self._session = session
+        self._config = config
+
+    async def __call__(self) -> SweepStatsDM:
+        started = monotonic()
+        stats = SweepStatsDM(chunks=0, scanned=0, deleted=0, duration=0.0)
+        cursor = None
+        while True:
+            chunk = await self._sweep_gateway.delete_expired_users_chunk(
+                confirm_window=self._config.confirm_window,
+                after=cursor,
+                limit=self._config.chunk_size,
+                statement_timeout=self._config.statement_timeout
+            )
+            await self._session.commit()
+            stats.chunks += 1
+            stats.scanned += chunk.scanned
+            stats.deleted += chunk.deleted
+            if chunk.scanned < self._config.chunk_size or chunk.cursor is None:
+                break
+            cursor = chunk.cursor
+            await asyncio.sleep(self._config.chunk_pause)
+        stats.duration = monotonic() - started
+        return stats
+
+
+class MaintainMessagePartitionsInteractor:
+    def __init__(
+        self,
+        gateway: ManagePartitions,
+        archive: ArchiveMessages,
+        session: DBSession,
+        config: MessagePartitionsConfig,
+    ) -> None:
+        self._gateway = gateway
+        self._archive = archive
+        self._session = session
+        self._config = config
+
+    async def __call__(self) -> PartitionMaintenanceDM:
+        stats = PartitionMaintenanceDM(created=0, detached=0, archived=0, archived_rows=0)
+        this_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        partitions = await self._gateway.get_partitions()
+        # Message timestamps are naive local time, so are the bounds.
+        upper = max((p.upper for p in partitions if p.upper is not None), default=this_month)
+        horizon = _add_months(this_month, self._config.months_ahead + 1)
+        while upper < horizon:
+            await self._gateway.create_partition(lower=upper, upper=_add_months(upper, 1))
+            await self._session.commit()
+            upper = _add_months(upper, 1)
+            stats.created += 1
+        cutoff = _add_months(this_month, -self._config.retention_months)
+        for partition in partitions:
+            if partition.upper is not None and partition.upper <= cutoff:
+                await self._gateway.detach_partition(partition.name, self._config.lock_timeout)
+                await self._session.commit()
+                stats.detached += 1
+        # Detached tables left behind by an earlier failed run are picked
+        # up here as well; a table is dropped only once its archive exists.
+        for name in await self._gateway.get_detached_partitions():
+            stats.archived_rows += await self._archive.export_partition(
+                name, self._gateway.stream_partition(name)
+            )
+            await self._gateway.drop_partition(name)
+            await self._session.commit()
+            stats.archived += 1
+        return stats
+
+
+class FlushSearchIndexInteractor:
+    def __init__(self, gateway: MaintainSearchIndex, session: DBSession) -> None:
+        self._gateway = gateway
+        self._session = session
+
+    async def __call__(self) -> int:
+        pages = await self._gateway.clean_search_index()
+        await self._session.commit()
+        return pages
@@ -1,15 +1,67 @@
-from typing import Protocol, Optional
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol, Set
 from abc import abstractmethod
 
+from events.src.domain.entities import PartitionDM, SweepChunkDM, SweepCursorDM
+
 
 class DeleteUser(Protocol):
     @abstractmethod
-    async def delete_user_by_uuid(self, user_uuid: str) -> None: ...
+    async def delete_inactive_users(self, user_uuids: List[str]) -> int: ...
 
 
 class CheckUserStatus(Protocol):
     @abstractmethod
-    async def is_task_cancelled(self, user_uuid: str) -> Optional[bool]: ...
+    async def get_cancelled_tasks(self, user_uuids: List[str]) -> Set[str]: ...
+
+
+class ScheduleDeletion(Protocol):
+    @abstractmethod
+    async def claim_due_users(self, due: float, limit: int) -> List[str]: ...
+
+    @abstractmethod
+    async def reschedule_users(self, user_uuids: List[str], due: float) -> None: ...
+
+
+class SweepUsers(Protocol):
+    @abstractmethod
+    async def delete_expired_users_chunk(
+        self,
+        confirm_window: int,
+        after: Optional[SweepCursorDM],
+        limit: int,
+        statement_timeout: int,
+    ) -> SweepChunkDM: ...
+
+
+class ManagePartitions(Protocol):
+    @abstractmethod
+    async def get_partitions(self) -> List[PartitionDM]: ...
+
+    @abstractmethod
+    async def create_partition(self, lower: datetime, upper: datetime) -> PartitionDM: ...
+
+    @abstractmethod
+    async def detach_partition(self, name: str, lock_timeout: int) -> None: ...
+
+    @abstractmethod
+    async def get_detached_partitions(self) -> List[str]: ...
+
+    @abstractmethod
+    def stream_partition(self, name: str) -> AsyncIterator[Dict[str, Any]]: ...
+
+    @abstractmethod
+    async def drop_partition(self, name: str) -> None: ...
+
+
+class MaintainSearchIndex(Protocol):
+    @abstractmethod
+    async def clean_search_index(self) -> int: ...
+
+
+class ArchiveMessages(Protocol):
+    @abstractmethod
+    async def export_partition(self, name: str, rows: AsyncIterator[Dict[str, Any]]) -> int: ...
 
 
 class DBSession(Protocol):
@@ -17,4 +69,4 @@ class DBSession(Protocol):
     async def commit(self) -> None: ...
 
     @abstractmethod
-    async def flush(self) -> None: ...
\ No newline at end of file
+    async def flush(self) -> None: ...
@@ -2,6 +2,10 @@ from os import environ as env
 from pydantic import BaseModel, Field
 
 
+class AppConfig(BaseModel):
+    log_level: str = Field(default='INFO', alias='EVENTS_LOG_LEVEL')
+
+
 class RabbitMQConfig(BaseModel):
     host: str = Field(alias='RABBITMQ_HOST')
     port: int = Field(alias='RABBITMQ_PORT')
@@ -25,7 +29,57 @@ class RedisConfig(BaseModel):
     REDIS_MAX_CONNECTIONS:int = Field(alias='REDIS_MAX_CONNECTIONS')
 
 
+class DeleteConsumerConfig(BaseModel):
+    prefetch: int = Field(default=1000, alias='DELETE_CONSUMER_PREFETCH')
+    max_concurrency: int = Field(default=1000, alias='DELETE_CONSUMER_MAX_CONCURRENCY')
+    throttle_threshold: int = Field(default=1000, alias='DELETE_CONSUMER_THROTTLE_THRESHOLD')
+    max_batch_size: int = Field(default=500, alias='DELETE_CONSUMER_BATCH_SIZE')
+    max_batch_wait: float = Field(default=0.2, alias='DELETE_CONSUMER_BATCH_WAIT')
+
+
+class DeleteSchedulerConfig(BaseModel):
+    poll_interval: float = Field(default=1.0, alias='DELETE_SCHEDULER_POLL_INTERVAL')
+    batch_size: int = Field(default=500, alias='DELETE_SCHEDULER_BATCH_SIZE')
+
+
+class UserSweeperConfig(BaseModel):
+    interval: float = Field(default=300.0, alias='USER_SWEEPER_INTERVAL')
+    confirm_window: int = Field(default=1800, alias='USER_SWEEPER_CONFIRM_WINDOW')
+    chunk_size: int = Field(default=1000, alias='USER_SWEEPER_CHUNK_SIZE')
+    chunk_pause: float = Field(default=0.1, alias='USER_SWEEPER_CHUNK_PAUSE')
+    statement_timeout: int = Field(default=5000, alias='USER_SWEEPER_STATEMENT_TIMEOUT_MS')
+
+
+class MessagePartitionsConfig(BaseModel):
+    interval: float = Field(default=3600.0, alias='MESSAGE_PARTITIONS_INTERVAL')
+    months_ahead: int = Field(default=3, alias='MESSAGE_PARTITIONS_MONTHS_AHEAD')
+    retention_months: int = Field(default=12, alias='MESSAGE_PARTITIONS_RETENTION_MONTHS')
+    lock_timeout: int = Field(default=5000, alias='MESSAGE_PARTITIONS_LOCK_TIMEOUT_MS')
+    # Read by every chats node, so it has to be shared storage.
+    archive_dir: str = Field(default='/var/lib/nedviga/archive', alias='MESSAGES_ARCHIVE_DIR')
+
+
+class MessageSearchIndexConfig(BaseModel):
+    flush_interval: float = Field(default=60.0, alias='MESSAGE_SEARCH_INDEX_FLUSH_INTERVAL')
+
+
 class Config(BaseModel):
+    app: AppConfig = Field(default_factory=lambda: AppConfig(**env))
     rabbitmq: RabbitMQConfig = Field(default_factory=lambda: RabbitMQConfig(**env))
     postgres: PostgresConfig = Field(default_factory=lambda: PostgresConfig(**env))
-    redis: RedisConfig = Field(default_factory=lambda: RedisConfig(**env))
\ No newline at end of file
+    redis: RedisConfig = Field(default_factory=lambda: RedisConfig(**env))
+    delete_consumer: DeleteConsumerConfig = Field(
+        default_factory=lambda: DeleteConsumerConfig(**env)
+    )
+    delete_scheduler: DeleteSchedulerConfig = Field(
+        default_factory=lambda: DeleteSchedulerConfig(**env)
+    )
+    user_sweeper: UserSweeperConfig = Field(
+        default_factory=lambda: UserSweeperConfig(**env)
+    )
+    message_partitions: MessagePartitionsConfig = Field(
+        default_factory=lambda: MessagePartitionsConfig(**env)
+    )
+    message_search_index: MessageSearchIndexConfig = Field(
+        default_factory=lambda: MessageSearchIndexConfig(**env)
+    )
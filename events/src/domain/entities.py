@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass(slots=True)
+class SweepCursorDM:
+    created_at: datetime
+    uuid: str
+
+
+@dataclass(slots=True)
+class SweepChunkDM:
+    scanned: int
+    deleted: int
+    cursor: Optional[SweepCursorDM]
+
+
+@dataclass(slots=True)
+class SweepStatsDM:
+    chunks: int
+    scanned: int
+    deleted: int
+    duration: float
+
+
+@dataclass(slots=True)
+class PartitionDM:
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+
+
+@dataclass(slots=True)
+class PartitionMaintenanceDM:
+    created: int
+    detached: int
+    archived: int
+    archived_rows: int
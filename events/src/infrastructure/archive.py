@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import struct
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, List
+
+from events.src.application.interfaces import ArchiveMessages
+from events.src.config import MessagePartitionsConfig
+
+
+MAGIC = b"NEDMSGA1"
+FOOTER = struct.Struct(">Q8s")
+COLUMNS = (
+    "uuid", "sender_type", "sender_uuid", "recipient_type", "recipient_uuid",
+    "message", "timestamp", "is_edited", "edited_at", "seq",
+)
+BLOCK_HEADER = struct.Struct(f">{len(COLUMNS)}I")
+ARCHIVE_SUFFIX = ".msga"
+
+
+def _value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode_block(rows: List[Dict[str, Any]]) -> bytes:
+    columns = [
+        zlib.compress(json.dumps([_value(row[name]) for row in rows]).encode(), 6)
+        for name in COLUMNS
+    ]
+    return BLOCK_HEADER.pack(*(len(column) for column in columns)) + b"".join(columns)
+
+
+class PartitionArchiveWriter(ArchiveMessages):
+    """
+    Writes a detached partition to `<archive_dir>/<partition>.msga`.
+
+    Rows come ordered by chat, newest first, and each chat becomes one
+    block of separately zlib-compressed JSON columns. A compressed index
+    of chat -> [offset, length, rows, oldest, newest, min_seq, max_seq] and
+    its length close the file, so a reader seeks straight to one chat and
+    can tell from the index alone whether a block can hold a wanted time
+    or seq. The file is written
+    under a temporary name and renamed once fsynced, so readers never see
+    a partial archive.
+    """
+
+    def __init__(self, config: MessagePartitionsConfig) -> None:
+        self._directory = Path(config.archive_dir)
+
+    async def export_partition(self, name: str, rows: AsyncIterator[Dict[str, Any]]) -> int:
+        await asyncio.to_thread(self._directory.mkdir, parents=True, exist_ok=True)
+        path = self._directory / f"{name}{ARCHIVE_SUFFIX}"
+        temporary = path.with_suffix(".tmp")
+        file = await asyncio.to_thread(open, temporary, "wb")
+        index: Dict[str, List[Any]] = {}
+        total = 0
+        try:
+            await asyncio.to_thread(file.write, MAGIC)
+            chat, block = None, []
+            async for row in rows:
+                if row["chat_uuid"] != chat and block:
+                    await asyncio.to_thread(self._write_block, file, index, chat, block)
+                    block = []
+                chat = row["chat_uuid"]
+                block.append(row)
+                total += 1
+            if block:
+                await asyncio.to_thread(self._write_block, file, index, chat, block)
+            await asyncio.to_thread(self._finish, file, index)
+        except BaseException:
+            await asyncio.to_thread(file.close)
+            temporary.unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(self._publish, temporary, path)
+        return total
+
+    def _write_block(
+        self,
+        file: BinaryIO,
+        index: Dict[str, List[Any]],
+        chat: str,
+        rows: List[Dict[str, Any]],
+    ) -> None:
+        data = _encode_block(rows)
+        seqs = [row["seq"] for row in rows if row["seq"] is not None]
+        index[chat] = [
+            file.tell(), len(data), len(rows),
+            _value(rows[-1]["timestamp"]), _value(rows[0]["timestamp"]),
+            min(seqs, default=None), max(seqs, default=None),
+        ]
+        file.write(data)
+
+    def _finish(self, file: BinaryIO, index: Dict[str, List[Any]]) -> None:
+        data = zlib.compress(json.dumps({"columns": COLUMNS, "chats": index}).encode(), 6)
+        file.write(data)
+        file.write(FOOTER.pack(len(data), MAGIC))
+        file.flush()
+        os.fsync(file.fileno())
+        file.close()
+
+    def _publish(self, temporary: Path, path: Path) -> None:
+        os.replace(temporary, path)
+        directory_fd = os.open(self._directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
@@ -4,7 +4,7 @@ from faststream.security import SASLPlaintext
 from events.src.config import RabbitMQConfig
 
 
-def new_broker(rabbitmq_config: RabbitMQConfig) -> RabbitBroker:
+def new_broker(rabbitmq_config: RabbitMQConfig, prefetch: int) -> RabbitBroker:
     return RabbitBroker(
         host=rabbitmq_config.host,
         port=rabbitmq_config.port,
@@ -13,4 +13,5 @@ def new_broker(rabbitmq_config: RabbitMQConfig) -> RabbitBroker:
             password=rabbitmq_config.password,
         ),
         virtualhost=rabbitmq_config.vhost,
+        max_consumers=prefetch,
     )
\ No newline at end of file
@@ -1,13 +1,23 @@
-from typing import Optional
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
 
-from sqlalchemy import Result
+from sqlalchemy import Result, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from redis.asyncio import Redis
 
-from events.src.application.interfaces import DeleteUser
+from events.src.application.interfaces import (
+    CheckUserStatus,
+    DeleteUser,
+    MaintainSearchIndex,
+    ManagePartitions,
+    ScheduleDeletion,
+    SweepUsers
+)
+from events.src.domain.entities import PartitionDM, SweepChunkDM, SweepCursorDM
 
 
-class CrudsGateway(DeleteUser):
+class CrudsGateway(DeleteUser, CheckUserStatus):
     def __init__(
         self, 
         session: AsyncSession,
@@ -16,18 +26,207 @@ class CrudsGateway(DeleteUser):
         self._session = session
         self._redis_client = redis_client
 
-    async def delete_user_by_uuid(self, user_uuid: str) -> None:
-        user_exists_query = "SELECT uuid FROM users WHERE uuid = :uuid"
-        user_exists: Result = await self._session.execute(
-            statement=user_exists_query,
-            params={"uuid": user_uuid}
+    async def delete_inactive_users(self, user_uuids: List[str]) -> int:
+        delete_query = text("""
+            DELETE FROM users
+            WHERE uuid = ANY(CAST(:uuids AS uuid[])) AND is_active = false
+        """)
+        result: Result = await self._session.execute(
+            statement=delete_query,
+            params={"uuids": user_uuids}
         )
-        user = user_exists.fetchone()
-        if not user:
-            return
-        delete_query = "DELETE FROM users WHERE uuid = :uuid"
-        await self._session.execute(delete_query, {"uuid": user_uuid})
-
-    async def is_task_cancelled(self, user_uuid: str) -> bool:
-        cancelled = await self._redis_client.get(f"task:{user_uuid}:cancelled")
-        return cancelled is not None
\ No newline at end of file
+        return result.rowcount
+
+    async def get_cancelled_tasks(self, user_uuids: List[str]) -> Set[str]:
+        flags = await self._redis_client.mget(
+            [f"task:{user_uuid}:cancelled" for user_uuid in user_uuids]
+        )
+        return {
+            user_uuid for user_uuid, flag in zip(user_uuids, flags)
+            if flag is not None
+        }
+
+
+DELETION_SCHEDULE_KEY = "schedule:delete_rotten_user"
+
+CLAIM_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+class ScheduleGateway(ScheduleDeletion):
+    def __init__(self, redis_client: Redis) -> None:
+        self._redis_client = redis_client
+        self._claim_due = redis_client.register_script(CLAIM_DUE_SCRIPT)
+
+    async def claim_due_users(self, due: float, limit: int) -> List[str]:
+        user_uuids = await self._claim_due(
+            keys=[DELETION_SCHEDULE_KEY],
+            args=[due, limit]
+        )
+        return [user_uuid.decode() for user_uuid in user_uuids]
+
+    async def reschedule_users(self, user_uuids: List[str], due: float) -> None:
+        await self._redis_client.zadd(
+            DELETION_SCHEDULE_KEY,
+            {user_uuid: due for user_uuid in user_uuids}
+        )
+
+
+SWEEP_CHUNK_QUERY = """
+    WITH candidates AS (
+        SELECT uuid, created_at
+        FROM users
+        WHERE is_active = false
+            AND created_at < LOCALTIMESTAMP - make_interval(secs => :confirm_window)
+            {after_cursor}
+        ORDER BY created_at, uuid
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    ), deleted AS (
+        DELETE FROM users
+        USING candidates
+        WHERE users.uuid = candidates.uuid
+        RETURNING users.uuid
+    ), last_candidate AS (
+        SELECT created_at, uuid
+        FROM candidates
+        ORDER BY created_at DESC, uuid DESC
+        LIMIT 1
+    )
+    SELECT
+        (SELECT count(*) FROM candidates) AS scanned,
+        (SELECT count(*) FROM deleted) AS deleted,
+        (SELECT created_at FROM last_candidate) AS last_created_at,
+        (SELECT uuid::text FROM last_candidate) AS last_uuid
+"""
+
+
+class SweepGateway(SweepUsers):
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+        self._first_chunk_query = text(SWEEP_CHUNK_QUERY.format(after_cursor=""))
+        self._next_chunk_query = text(SWEEP_CHUNK_QUERY.format(
+            after_cursor="AND (created_at, uuid) > (:last_created_at, CAST(:last_uuid AS uuid))"
+        ))
+
+    async def delete_expired_users_chunk(
+        self,
+        confirm_window: int,
+        after: Optional[SweepCursorDM],
+        limit: int,
+        statement_timeout: int,
+    ) -> SweepChunkDM:
+        await self._session.execute(
+            text("SELECT set_config('statement_timeout', :timeout, true)"),
+            {"timeout": str(statement_timeout)}
+        )
+        params = {"confirm_window": confirm_window, "limit": limit}
+        query = self._first_chunk_query
+        if after is not None:
+            params.update(last_created_at=after.created_at, last_uuid=after.uuid)
+            query = self._next_chunk_query
+        result: Result = await self._session.execute(statement=query, params=params)
+        row = result.mappings().one()
+        cursor = None
+        if row["last_uuid"] is not None:
+            cursor = SweepCursorDM(created_at=row["last_created_at"], uuid=row["last_uuid"])
+        return SweepChunkDM(scanned=row["scanned"], deleted=row["deleted"], cursor=cursor)
+
+
+PARTITION_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+PARTITION_NAME = re.compile(r"^messages_(p\d{6}|legacy)$")
+
+
+def _bound(value: str) -> Optional[datetime]:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def _partition(name: str, expression: str) -> PartitionDM:
+    match = PARTITION_BOUND.search(expression)
+    if match is None:
+        return PartitionDM(name=name, lower=None, upper=None)
+    return PartitionDM(name=name, lower=_bound(match.group(1)), upper=_bound(match.group(2)))
+
+
+class PartitionsGateway(ManagePartitions, MaintainSearchIndex):
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def get_partitions(self) -> List[PartitionDM]:
+        query = text("""
+            SELECT child.relname AS name, pg_get_expr(child.relpartbound, child.oid) AS bound
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = CAST('messages' AS regclass)
+        """)
+        result: Result = await self._session.execute(query)
+        return [_partition(row["name"], row["bound"]) for row in result.mappings()]
+
+    async def create_partition(self, lower: datetime, upper: datetime) -> PartitionDM:
+        # DDL takes no bind parameters; the bounds are datetimes built by
+        # the caller, never user input.
+        name = f"messages_p{lower:%Y%m}"
+        await self._session.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {name} PARTITION OF messages
+            FOR VALUES FROM ('{lower.isoformat(sep=' ')}') TO ('{upper.isoformat(sep=' ')}')
+        """))
+        return PartitionDM(name=name, lower=lower, upper=upper)
+
+    async def detach_partition(self, name: str, lock_timeout: int) -> None:
+        if not PARTITION_NAME.match(name):
+            raise ValueError(f"Unexpected partition name {name}")
+        await self._session.execute(
+            text("SELECT set_config('lock_timeout', :timeout, true)"),
+            {"timeout": str(lock_timeout)}
+        )
+        await self._session.execute(text(f"ALTER TABLE messages DETACH PARTITION {name}"))
+
+    async def get_detached_partitions(self) -> List[str]:
+        query = text("""
+            SELECT relname
+            FROM pg_class
+            WHERE relkind = 'r'
+                AND NOT relispartition
+                AND pg_table_is_visible(oid)
+                AND relname ~ '^messages_(p[0-9]{6}|legacy)$'
+        """)
+        result: Result = await self._session.execute(query)
+        return sorted(result.scalars())
+
+    async def stream_partition(self, name: str) -> AsyncIterator[Dict[str, Any]]:
+        if not PARTITION_NAME.match(name):
+            raise ValueError(f"Unexpected partition name {name}")
+        result = await self._session.stream(text(f"""
+            SELECT
+                chat_uuid::text AS chat_uuid, uuid::text AS uuid,
+                sender_type, sender_uuid::text AS sender_uuid,
+                recipient_type, recipient_uuid::text AS recipient_uuid,
+                message, timestamp, is_edited, edited_at, seq
+            FROM {name}
+            ORDER BY chat_uuid, timestamp DESC, uuid DESC
+        """))
+        async for row in result.mappings():
+            yield dict(row)
+
+    async def drop_partition(self, name: str) -> None:
+        if not PARTITION_NAME.match(name):
+            raise ValueError(f"Unexpected partition name {name}")
+        await self._session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+    async def clean_search_index(self) -> int:
+        # Merges the GIN pending lists of every partition into the main
+        # index structure, so searches never scan a long unsorted list.
+        query = text("""
+            SELECT coalesce(sum(gin_clean_pending_list(CAST(inhrelid AS regclass))), 0)
+            FROM pg_inherits
+            WHERE inhparent = CAST('ix_messages_search_vector' AS regclass)
+        """)
+        result: Result = await self._session.execute(query)
+        return result.scalar_one()
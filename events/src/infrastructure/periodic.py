@@ -0,0 +1,46 @@
+import asyncio
+from logging import Logger
+from typing import Awaitable, Callable, List, Tuple
+
+from dishka import AsyncContainer
+
+
+Job = Callable[[AsyncContainer], Awaitable[None]]
+
+
+class PeriodicRunner:
+    """
+    Runs jobs on fixed intervals in background tasks. Each run gets its own
+    REQUEST-scoped container, so sessions and gateways are not shared
+    between runs.
+    """
+
+    def __init__(self, container: AsyncContainer, logger: Logger) -> None:
+        self._container = container
+        self._logger = logger
+        self._jobs: List[Tuple[Job, float]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add(self, job: Job, interval: float) -> None:
+        self._jobs.append((job, interval))
+
+    async def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._run(job, interval))
+            for job, interval in self._jobs
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, job: Job, interval: float) -> None:
+        while True:
+            try:
+                async with self._container() as request_container:
+                    await job(request_container)
+            except Exception as e:
+                self._logger.error(f"Periodic job {job.__name__} failed: {e}")
+            await asyncio.sleep(interval)
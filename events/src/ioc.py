@@ -1,18 +1,54 @@
-from typing import AsyncIterable
+from logging import Logger
+from typing import AsyncIterable, List
 
-from dishka import Provider, Scope, provide, AnyOf, from_context
+from dishka import AsyncContainer, Provider, Scope, provide, AnyOf, from_context
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from redis.asyncio import Redis
 
+from common.src.infrastructure.batcher import Batcher
+from common.src.infrastructure.consumers import ConsumerLimiter, ConsumerRegistry
 from events.src.application import interfaces
-from events.src.application.interactors import DeleteUserInteractor
-from events.src.config import Config
+from events.src.application.interactors import (
+    DeleteDueUsersInteractor,
+    DeleteUsersInteractor,
+    FlushSearchIndexInteractor,
+    MaintainMessagePartitionsInteractor,
+    SweepInactiveUsersInteractor
+)
+from events.src.config import (
+    Config,
+    DeleteSchedulerConfig,
+    MessagePartitionsConfig,
+    UserSweeperConfig
+)
+from events.src.infrastructure.archive import PartitionArchiveWriter
+from events.src.infrastructure.cache import new_redis_client
 from events.src.infrastructure.database import new_session_maker
-from events.src.infrastructure.gateways import CrudsGateway
+from events.src.infrastructure.gateways import (
+    CrudsGateway,
+    PartitionsGateway,
+    ScheduleGateway,
+    SweepGateway
+)
 
 
 class AppProvider(Provider):
     config = from_context(provides=Config, scope=Scope.APP)
 
+    logger = from_context(provides=Logger, scope=Scope.APP)
+
+    @provide(scope=Scope.APP)
+    def get_delete_scheduler_config(self, config: Config) -> DeleteSchedulerConfig:
+        return config.delete_scheduler
+
+    @provide(scope=Scope.APP)
+    def get_user_sweeper_config(self, config: Config) -> UserSweeperConfig:
+        return config.user_sweeper
+
+    @provide(scope=Scope.APP)
+    def get_message_partitions_config(self, config: Config) -> MessagePartitionsConfig:
+        return config.message_partitions
+
     @provide(scope=Scope.APP)
     def get_session_maker(self, config: Config) -> async_sessionmaker[AsyncSession]:
         return new_session_maker(config.postgres)
@@ -25,10 +61,78 @@ class AppProvider(Provider):
         async with session_maker() as session:
             yield session
 
+    @provide(scope=Scope.APP)
+    async def get_redis_client(self, config: Config) -> AsyncIterable[Redis]:
+        redis_client = new_redis_client(config.redis)
+        yield redis_client
+        await redis_client.aclose()
+
+    @provide(scope=Scope.APP)
+    def get_consumer_registry(self, config: Config) -> ConsumerRegistry:
+        return ConsumerRegistry({
+            "delete_rotten_user": ConsumerLimiter(
+                queue="delete_rotten_user",
+                prefetch=config.delete_consumer.prefetch,
+                max_concurrency=config.delete_consumer.max_concurrency,
+                throttle_threshold=config.delete_consumer.throttle_threshold,
+            ),
+        })
+
+    @provide(scope=Scope.APP)
+    async def get_delete_users_batcher(
+        self,
+        config: Config,
+        container: AsyncContainer,
+    ) -> AsyncIterable[Batcher]:
+        async def delete_users(user_uuids: List[str]) -> List[None]:
+            async with container() as request_container:
+                interactor = await request_container.get(DeleteUsersInteractor)
+                await interactor(user_uuids)
+            return [None] * len(user_uuids)
+
+        batcher = Batcher(
+            flush=delete_users,
+            max_size=config.delete_consumer.max_batch_size,
+            max_wait=config.delete_consumer.max_batch_wait,
+        )
+        yield batcher
+        await batcher.close()
+
     cruds_gateway = provide(
         CrudsGateway,
         scope=Scope.REQUEST,
-        provides=interfaces.DeleteUser
+        provides=AnyOf[interfaces.DeleteUser, interfaces.CheckUserStatus]
+    )
+
+    schedule_gateway = provide(
+        ScheduleGateway,
+        scope=Scope.REQUEST,
+        provides=interfaces.ScheduleDeletion
+    )
+
+    sweep_gateway = provide(
+        SweepGateway,
+        scope=Scope.REQUEST,
+        provides=interfaces.SweepUsers
     )
 
-    delete_user_interactor = provide(DeleteUserInteractor, scope=Scope.REQUEST)
\ No newline at end of file
+    partitions_gateway = provide(
+        PartitionsGateway,
+        scope=Scope.REQUEST,
+        provides=AnyOf[interfaces.ManagePartitions, interfaces.MaintainSearchIndex]
+    )
+
+    partition_archive_writer = provide(
+        PartitionArchiveWriter,
+        scope=Scope.APP,
+        provides=interfaces.ArchiveMessages
+    )
+
+    delete_users_interactor = provide(DeleteUsersInteractor, scope=Scope.REQUEST)
+    delete_due_users_interactor = provide(DeleteDueUsersInteractor, scope=Scope.REQUEST)
+    sweep_inactive_users_interactor = provide(SweepInactiveUsersInteractor, scope=Scope.REQUEST)
+    maintain_message_partitions_interactor = provide(
+        MaintainMessagePartitionsInteractor,
+        scope=Scope.REQUEST
+    )
+    flush_search_index_interactor = provide(FlushSearchIndexInteractor, scope=Scope.REQUEST)
@@ -0,0 +1,43 @@
+from logging import Logger
+
+from dishka import AsyncContainer
+
+from events.src.application.interactors import (
+    DeleteDueUsersInteractor,
+    FlushSearchIndexInteractor,
+    MaintainMessagePartitionsInteractor,
+    SweepInactiveUsersInteractor
+)
+
+
+async def delete_due_users(container: AsyncContainer) -> None:
+    interactor = await container.get(DeleteDueUsersInteractor)
+    await interactor()
+
+
+async def sweep_inactive_users(container: AsyncContainer) -> None:
+    interactor = await container.get(SweepInactiveUsersInteractor)
+    logger = await container.get(Logger)
+    stats = await interactor()
+    logger.info(
+        f"User sweep finished: scanned={stats.scanned} deleted={stats.deleted} "
+        f"chunks={stats.chunks} duration={stats.duration:.3f}s"
+    )
+
+
+async def maintain_message_partitions(container: AsyncContainer) -> None:
+    interactor = await container.get(MaintainMessagePartitionsInteractor)
+    logger = await container.get(Logger)
+    stats = await interactor()
+    logger.info(
+        f"Message partitions maintained: created={stats.created} detached={stats.detached} "
+        f"archived={stats.archived} archived_rows={stats.archived_rows}"
+    )
+
+
+async def flush_message_search_index(container: AsyncContainer) -> None:
+    interactor = await container.get(FlushSearchIndexInteractor)
+    pages = await interactor()
+    if pages:
+        logger = await container.get(Logger)
+        logger.info(f"Message search index pending list flushed: pages={pages}")
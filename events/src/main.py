@@ -1,20 +1,47 @@
+import logging
+from logging import Logger
+
 from dishka import make_async_container
 from dishka.integrations import faststream as faststream_integration
-from faststream import FastStream
+from faststream.asgi import AsgiFastStream
 
+from common.src.infrastructure.admin import ConsumersAdmin, MetricsExporter
 from events.src.config import Config
+from events.src.jobs import (
+    delete_due_users,
+    flush_message_search_index,
+    maintain_message_partitions,
+    sweep_inactive_users
+)
 from events.src.tasks import TasksController
 from events.src.infrastructure.broker import new_broker
+from events.src.infrastructure.periodic import PeriodicRunner
 from events.src.ioc import AppProvider
 
 
 config = Config()
-container = make_async_container(AppProvider(), context={Config: config})
+logging.basicConfig(level=config.app.log_level)
+logger = logging.getLogger("events")
+container = make_async_container(AppProvider(), context={Config: config, Logger: logger})
 
 
-def get_faststream_app() -> FastStream:
-    broker = new_broker(config.rabbitmq)
-    app = FastStream(broker)
+def get_faststream_app() -> AsgiFastStream:
+    broker = new_broker(config.rabbitmq, prefetch=config.delete_consumer.prefetch)
+    app = AsgiFastStream(
+        broker,
+        asgi_routes=[
+            ("/admin/consumers", ConsumersAdmin(container, broker)),
+            ("/metrics", MetricsExporter(container, broker)),
+        ],
+    )
+    runner = PeriodicRunner(container, logger)
+    runner.add(delete_due_users, interval=config.delete_scheduler.poll_interval)
+    runner.add(sweep_inactive_users, interval=config.user_sweeper.interval)
+    runner.add(maintain_message_partitions, interval=config.message_partitions.interval)
+    runner.add(flush_message_search_index, interval=config.message_search_index.flush_interval)
+    app.after_startup(runner.start)
+    app.on_shutdown(runner.stop)
+    app.on_shutdown(container.close)
     faststream_integration.setup_dishka(container, app, auto_inject=True)
     broker.include_router(TasksController)
     return app
@@ -23,4 +50,4 @@ app = get_faststream_app()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
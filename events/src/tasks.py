@@ -1,16 +1,21 @@
 from dishka.integrations.base import FromDishka as Depends
 from faststream.rabbit import RabbitRouter
 
-from events.src.application.interactors import DeleteUserInteractor
+from common.src.infrastructure.batcher import Batcher
+from common.src.infrastructure.consumers import ConsumerRegistry
 
 
 TasksController=RabbitRouter()
 
 
+# Deletions are scheduled in Redis now (see jobs.delete_due_users); this
+# consumer only drains messages published before the switch.
 @TasksController.subscriber("delete_rotten_user")
 async def delete_user(
     message: dict,
-    interactor: Depends[DeleteUserInteractor]
+    batcher: Depends[Batcher],
+    consumers: Depends[ConsumerRegistry]
 ) -> None:
-    user_uuid = message.get("user_uuid")
-    await interactor(user_uuid)
+    if user_uuid := message.get("user_uuid"):
+        async with consumers.limit("delete_rotten_user"):
+            await batcher.submit(user_uuid)
@@ -0,0 +1,144 @@
+"""
+End-to-end throughput of the confirmation mail path.
+
+Publishes N messages to `send_register_confirmation` through FastStream's
+in-memory TestRabbitBroker, so they go through the real subscriber, limiter,
+batcher, SendSignupMailInteractor and SMTP pool, and counts them as they land
+in a local capturing aiosmtpd server. No RabbitMQ is involved: the channel
+prefetch is not applied and --concurrency alone bounds the messages in
+flight, so the figures are those of the service's own path. The per-message
+access log of the broker is silenced, as it would dominate the timings.
+
+    python -m mail.benchmarks.signup_mail -n 5000 --concurrency 200
+
+Pool and batch settings come from the usual SMTP_* and MAIL_CONSUMER_*
+environment variables.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+from time import monotonic
+from typing import Dict, List
+from uuid import uuid4
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _configure_env(port: int) -> None:
+    defaults = {
+        "REGISTRATION_CONFIRM_PATH": "http://localhost/confirm",
+        "SMTP_LOG_LEVEL": "WARNING",
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(port),
+        "SMTP_SENDER_EMAIL": "bench@example.com",
+        "RABBITMQ_HOST": "localhost",
+        "RABBITMQ_PORT": "5672",
+        "RABBITMQ_USER": "guest",
+        "RABBITMQ_PASSWORD": "guest",
+        "RABBITMQ_VHOST": "/",
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+async def run(count: int, concurrency: int, locale: str) -> None:
+    from aiosmtpd.controller import Controller
+    from faststream.rabbit import TestRabbitBroker
+
+    from mail.src import main
+    from mail.src.infrastructure.capture import CaptureHandler
+    from mail.src.infrastructure.metrics import SendMetrics
+
+    logging.getLogger("faststream.access.rabbit").setLevel(logging.WARNING)
+    published: Dict[str, float] = {}
+    latencies: List[float] = []
+    done = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def on_message(envelope) -> None:
+        received = monotonic()
+
+        def record() -> None:
+            for recipient in envelope.rcpt_tos:
+                started = published.pop(recipient, None)
+                if started is not None:
+                    latencies.append(received - started)
+            if len(latencies) >= count:
+                done.set()
+
+        # aiosmtpd runs its own loop in a thread
+        loop.call_soon_threadsafe(record)
+
+    handler = CaptureHandler(keep=0, on_message=on_message)
+    controller = Controller(
+        handler=handler,
+        hostname=main.config.email.smtp_host,
+        port=main.config.email.smtp_port
+    )
+    controller.start()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def publish(broker, index: int) -> None:
+        recipient = f"bench-{index}@example.com"
+        async with limit:
+            published[recipient] = monotonic()
+            await broker.publish(
+                {"message_uuid": str(uuid4()), "email": recipient, "locale": locale},
+                queue="send_register_confirmation",
+            )
+
+    try:
+        async with TestRabbitBroker(main.broker) as broker:
+            started = monotonic()
+            await asyncio.gather(*(publish(broker, i) for i in range(count)))
+            try:
+                await asyncio.wait_for(done.wait(), timeout=30)
+            except asyncio.TimeoutError:
+                pass
+            elapsed = monotonic() - started
+            metrics = (await main.container.get(SendMetrics)).snapshot()
+    finally:
+        await main.container.close()
+        controller.stop()
+
+    print(f"messages:    {count} published, {len(latencies)} captured")
+    print(f"elapsed:     {elapsed:.2f}s")
+    print(f"throughput:  {len(latencies) / elapsed:.1f} emails/s")
+    if latencies:
+        print(
+            "latency ms:  "
+            f"mean {statistics.mean(latencies) * 1000:.1f}  "
+            f"p50 {_percentile(latencies, 50) * 1000:.1f}  "
+            f"p95 {_percentile(latencies, 95) * 1000:.1f}  "
+            f"p99 {_percentile(latencies, 99) * 1000:.1f}  "
+            f"max {max(latencies) * 1000:.1f}"
+        )
+    print(f"capture:     {handler.snapshot()}")
+    print(f"send:        {metrics}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--locale", default="ru")
+    args = parser.parse_args()
+    _configure_env(_free_port())
+    asyncio.run(run(args.count, args.concurrency, args.locale))
+
+
+if __name__ == "__main__":
+    main()
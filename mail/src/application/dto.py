@@ -1,7 +1,10 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 
 
 @dataclass(slots=True)
 class SendEmailDTO:
     message_uuid: str
-    email: str
\ No newline at end of file
+    email: str
+    locale: Optional[str] = field(default=None)
+    attempt: int = field(default=0)
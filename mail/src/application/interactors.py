@@ -1,21 +1,60 @@
+import asyncio
+from typing import List, Optional, Union
+
 from mail.src.application.dto import SendEmailDTO
-from mail.src.application.interfaces import EmailSender, GetTemplates
-from mail.src.domain.entities import SendEmailDM
+from mail.src.application.interfaces import EmailSender, GetTemplates, RetryEmail
+from mail.src.config import AppConfig, RetryConfig
+from mail.src.domain.entities import EmailDM, RenderEmailDM
+from mail.src.domain.exceptions import PermanentDeliveryError
 
 class SendSignupMailInteractor:
     def __init__(
         self,
+        config: AppConfig,
         templates_gateway: GetTemplates,
         send_email_gateway: EmailSender
     ) -> None:
+        self._config = config
         self._templates_gateway = templates_gateway
         self._send_email_gateway = send_email_gateway
 
-    async def __call__(self, params: SendEmailDTO) -> None:
-        body_html = self._templates_gateway.registration_template(params.message_uuid)
-        params = SendEmailDM(
-            subject="Подтверждение регистрации аккаунта",
-            body_html=body_html,
-            recipient=params.email
-        )
-        await self._send_email_gateway.send_html_email(params)
\ No newline at end of file
+    async def __call__(self, batch: List[SendEmailDTO]) -> List[Optional[Exception]]:
+        emails = [self._render(params) for params in batch]
+        return await asyncio.gather(*(self._send(email) for email in emails))
+
+    def _render(self, params: SendEmailDTO) -> Union[EmailDM, Exception]:
+        try:
+            return self._templates_gateway.render_email(RenderEmailDM(
+                template="registration",
+                locale=params.locale or self._config.default_locale,
+                recipient=params.email,
+                context={"uuid": params.message_uuid}
+            ))
+        except (LookupError, ValueError) as e:
+            return PermanentDeliveryError(str(e))
+
+    async def _send(self, email: Union[EmailDM, Exception]) -> Optional[Exception]:
+        if isinstance(email, Exception):
+            return email
+        try:
+            await self._send_email_gateway.send_email(email)
+        except Exception as e:
+            return e
+        return None
+
+
+class RetrySignupMailInteractor:
+    def __init__(
+        self,
+        config: RetryConfig,
+        retry_gateway: RetryEmail,
+    ) -> None:
+        self._config = config
+        self._retry_gateway = retry_gateway
+
+    async def __call__(self, params: SendEmailDTO, error: Exception) -> None:
+        if isinstance(error, PermanentDeliveryError) or params.attempt >= self._config.max_attempts:
+            await self._retry_gateway.bury(params, reason=str(error))
+            return
+        params.attempt += 1
+        await self._retry_gateway.schedule_retry(params, delay_tier=params.attempt)
@@ -1,14 +1,23 @@
 from abc import abstractmethod
 from typing import Protocol
 
-from mail.src.domain.entities import SendEmailDM
+from mail.src.application.dto import SendEmailDTO
+from mail.src.domain.entities import EmailDM, RenderEmailDM
 
 
 class GetTemplates(Protocol):
     @abstractmethod 
-    def registration_template(self, uuid: str) -> str: ...
+    def render_email(self, params: RenderEmailDM) -> EmailDM: ...
 
 
 class EmailSender(Protocol):
     @abstractmethod
-    async def send_html_email(self, params: SendEmailDM) -> None: ...
\ No newline at end of file
+    async def send_email(self, params: EmailDM) -> None: ...
+
+
+class RetryEmail(Protocol):
+    @abstractmethod
+    async def schedule_retry(self, params: SendEmailDTO, delay_tier: int) -> None: ...
+
+    @abstractmethod
+    async def bury(self, params: SendEmailDTO, reason: str) -> None: ...
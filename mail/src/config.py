@@ -1,4 +1,6 @@
 from os import environ as env
+from pathlib import Path
+from typing import Optional
 
 from pydantic import BaseModel, Field
 
@@ -6,12 +8,23 @@ from pydantic import BaseModel, Field
 class AppConfig(BaseModel):
     confirm_path: str = Field(alias='REGISTRATION_CONFIRM_PATH')
     log_level: str = Field(alias='SMTP_LOG_LEVEL') #INFO
+    templates_dir: Path = Field(
+        default=Path(__file__).parent / 'templates',
+        alias='MAIL_TEMPLATES_DIR'
+    )
+    default_locale: str = Field(default='ru', alias='MAIL_DEFAULT_LOCALE')
+    capture_dir: Optional[Path] = Field(default=None, alias='SMTP_CAPTURE_DIR')
+    capture_keep: int = Field(default=1000, alias='SMTP_CAPTURE_KEEP')
 
 
 class EmailConfig(BaseModel):
     smtp_host: str = Field(alias='SMTP_HOST') #127.0.0.1
     smtp_port: int = Field(alias='SMTP_PORT') #1025
     sender_email: str = Field(alias='SMTP_SENDER_EMAIL') #your_email@example.com
+    timeout: float = Field(default=10.0, alias='SMTP_TIMEOUT')
+    pool_size: int = Field(default=5, alias='SMTP_POOL_SIZE')
+    max_messages_per_connection: int = Field(default=100, alias='SMTP_MAX_MESSAGES_PER_CONNECTION')
+    keepalive_interval: float = Field(default=30.0, alias='SMTP_KEEPALIVE_INTERVAL')
 
 
 class RabbitMQConfig(BaseModel):
@@ -22,7 +35,35 @@ class RabbitMQConfig(BaseModel):
     vhost: str = Field(alias='RABBITMQ_VHOST')
 
 
+class ConsumerConfig(BaseModel):
+    prefetch: int = Field(default=50, alias='MAIL_CONSUMER_PREFETCH')
+    max_concurrency: int = Field(default=20, alias='MAIL_CONSUMER_MAX_CONCURRENCY')
+    throttle_threshold: int = Field(default=50, alias='MAIL_CONSUMER_THROTTLE_THRESHOLD')
+    max_batch_size: int = Field(default=20, alias='MAIL_CONSUMER_BATCH_SIZE')
+    max_batch_wait: float = Field(default=0.05, alias='MAIL_CONSUMER_BATCH_WAIT')
+    # batches sent at once, so one slow relay doesn't hold up the rest; sends still queue for SMTP_POOL_SIZE connections
+    max_flushes: int = Field(default=5, alias='MAIL_CONSUMER_MAX_FLUSHES')
+
+
+class RetryConfig(BaseModel):
+    # definitions.json declares four delay queues; later attempts reuse the last
+    max_attempts: int = Field(default=4, alias='MAIL_RETRY_MAX_ATTEMPTS')
+
+
+class SpoolConfig(BaseModel):
+    enabled: bool = Field(default=False, alias='MAIL_SPOOL_ENABLED')
+    directory: Path = Field(default=Path('/var/spool/nedviga-mail'), alias='MAIL_SPOOL_DIR')
+    segment_size: int = Field(default=16 * 1024 * 1024, alias='MAIL_SPOOL_SEGMENT_SIZE')
+    fsync_interval: float = Field(default=0.005, alias='MAIL_SPOOL_FSYNC_INTERVAL')
+    compact_ratio: float = Field(default=0.25, alias='MAIL_SPOOL_COMPACT_RATIO')
+    workers: int = Field(default=20, alias='MAIL_SPOOL_WORKERS')
+    retry_delay: float = Field(default=5.0, alias='MAIL_SPOOL_RETRY_DELAY')
+
+
 class Config(BaseModel):
     app: AppConfig = Field(default_factory=lambda: AppConfig(**env))
     email: EmailConfig = Field(default_factory=lambda: EmailConfig(**env))
-    rabbitmq: RabbitMQConfig = Field(default_factory=lambda: RabbitMQConfig(**env))
\ No newline at end of file
+    rabbitmq: RabbitMQConfig = Field(default_factory=lambda: RabbitMQConfig(**env))
+    consumer: ConsumerConfig = Field(default_factory=lambda: ConsumerConfig(**env))
+    retry: RetryConfig = Field(default_factory=lambda: RetryConfig(**env))
+    spool: SpoolConfig = Field(default_factory=lambda: SpoolConfig(**env))
@@ -1,23 +1,26 @@
 from dishka.integrations.base import FromDishka as Depends
-from dishka.integrations.base import wrap_injection
 from faststream.rabbit import RabbitRouter
 
+from common.src.infrastructure.consumers import ConsumerRegistry
 from mail.src.application.dto import SendEmailDTO
-from mail.src.application.interactors import SendSignupMailInteractor
+from mail.src.infrastructure.delivery import Delivery
 
 
 EmailController=RabbitRouter()
 
 
 class EmailHandler:
-    @EmailController.subscriber("send_register_confirmation")
-    @wrap_injection
+    @EmailController.subscriber("send_register_confirmation", retry=True)
     async def registration_handler(
         message: dict,
-        interactor: Depends[SendSignupMailInteractor]
-    ) -> str:
+        delivery: Depends[Delivery],
+        consumers: Depends[ConsumerRegistry]
+    ) -> None:
         params = SendEmailDTO(
             message_uuid=message.get("message_uuid"),
-            email=message.get("email")
+            email=message.get("email"),
+            locale=message.get("locale"),
+            attempt=message.get("attempt", 0)
         )
-        await interactor(params)
\ No newline at end of file
+        async with consumers.limit("send_register_confirmation"):
+            await delivery.deliver(params)
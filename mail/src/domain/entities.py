@@ -1,8 +1,16 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict
 
 
 @dataclass(slots=True)
-class SendEmailDM:
-    subject: str
-    body_html: str
-    recipient: str
\ No newline at end of file
+class RenderEmailDM:
+    template: str
+    locale: str
+    recipient: str
+    context: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class EmailDM:
+    recipient: str
+    message: bytes
@@ -0,0 +1,2 @@
+class PermanentDeliveryError(Exception):
+    """The relay rejected the message for good; retrying will not help."""
@@ -0,0 +1,12 @@
+from typing import List
+
+from common.src.infrastructure import admin
+from mail.src.infrastructure.metrics import SendMetrics
+
+
+class MetricsExporter(admin.MetricsExporter):
+    """Prometheus text exposition of the subscriber limiters and send counters."""
+
+    async def _service_lines(self) -> List[str]:
+        send_metrics = await self._container.get(SendMetrics)
+        return [f"mail_{name} {value}" for name, value in send_metrics.snapshot().items()]
@@ -0,0 +1,52 @@
+import asyncio
+import mailbox
+from collections import deque
+from pathlib import Path
+from time import monotonic
+from typing import Any, Callable, Deque, Optional
+
+
+class CaptureHandler:
+    """
+    aiosmtpd handler that accepts every message and keeps it instead of
+    relaying it: the last `keep` messages in memory, or every message in a
+    Maildir when `mailbox_dir` is set.
+    """
+
+    def __init__(
+        self,
+        mailbox_dir: Optional[Path] = None,
+        keep: int = 1000,
+        on_message: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        self.messages: Deque[bytes] = deque(maxlen=keep)
+        self.received_total = 0
+        self.recipients_total = 0
+        self.bytes_total = 0
+        self.first_received: Optional[float] = None
+        self.last_received: Optional[float] = None
+        self._mailbox = mailbox.Maildir(mailbox_dir, create=True) if mailbox_dir else None
+        self._on_message = on_message
+
+    async def handle_DATA(self, server: Any, session: Any, envelope: Any) -> str:
+        content = envelope.original_content or envelope.content
+        now = monotonic()
+        self.first_received = self.first_received or now
+        self.last_received = now
+        self.received_total += 1
+        self.recipients_total += len(envelope.rcpt_tos)
+        self.bytes_total += len(content)
+        if self._mailbox is not None:
+            await asyncio.to_thread(self._mailbox.add, content)
+        else:
+            self.messages.append(content)
+        if self._on_message is not None:
+            self._on_message(envelope)
+        return "250 Message accepted for delivery"
+
+    def snapshot(self) -> dict:
+        return {
+            "received_total": self.received_total,
+            "recipients_total": self.recipients_total,
+            "bytes_total": self.bytes_total,
+        }
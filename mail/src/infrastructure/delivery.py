@@ -0,0 +1,86 @@
+import asyncio
+import json
+from abc import abstractmethod
+from logging import Logger
+from typing import List, Protocol
+
+from dishka import AsyncContainer
+
+from common.src.infrastructure.batcher import Batcher
+from mail.src.application.dto import SendEmailDTO
+from mail.src.application.interactors import RetrySignupMailInteractor
+from mail.src.infrastructure.spool import MailSpool
+
+
+class Delivery(Protocol):
+    @abstractmethod
+    async def deliver(self, params: SendEmailDTO) -> None: ...
+
+
+class DirectDelivery(Delivery):
+    """Sends through the batch pipeline and schedules a retry on failure."""
+
+    def __init__(self, batcher: Batcher, container: AsyncContainer) -> None:
+        self._batcher = batcher
+        self._container = container
+
+    async def deliver(self, params: SendEmailDTO) -> None:
+        try:
+            await self._batcher.submit(params)
+        except Exception as e:
+            async with self._container() as request_container:
+                interactor = await request_container.get(RetrySignupMailInteractor)
+                await interactor(params, e)
+
+
+class SpooledDelivery(Delivery):
+    """
+    Accepts messages as soon as they are durable in the local spool and
+    leaves the SMTP work to background workers, so broker acks do not wait
+    on the relay.
+    """
+
+    def __init__(
+        self,
+        spool: MailSpool,
+        direct: DirectDelivery,
+        workers: int,
+        retry_delay: float,
+        logger: Logger,
+    ) -> None:
+        self._spool = spool
+        self._direct = direct
+        self._workers = workers
+        self._retry_delay = retry_delay
+        self._logger = logger
+        self._tasks: List[asyncio.Task] = []
+
+    async def deliver(self, params: SendEmailDTO) -> None:
+        await self._spool.append(json.dumps({
+            "message_uuid": params.message_uuid,
+            "email": params.email,
+            "locale": params.locale,
+            "attempt": params.attempt,
+        }).encode())
+
+    async def start(self) -> None:
+        await self._spool.open()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self._workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._spool.close()
+
+    async def _work(self) -> None:
+        while True:
+            entry = await self._spool.get()
+            try:
+                await self._direct.deliver(SendEmailDTO(**json.loads(entry.payload)))
+            except Exception as e:
+                self._logger.error(f"Spooled email delivery failed, will retry: {e}")
+                await asyncio.sleep(self._retry_delay)
+                self._spool.requeue(entry)
+                continue
+            self._spool.complete(entry)
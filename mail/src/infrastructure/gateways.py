@@ -1,34 +1,92 @@
 from logging import Logger
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+
 import aiosmtplib
+from faststream.rabbit import RabbitBroker
 
-from mail.src.application.interfaces import EmailSender
+from mail.src.application.dto import SendEmailDTO
+from mail.src.application.interfaces import EmailSender, RetryEmail
 from mail.src.config import EmailConfig
-from mail.src.domain.entities import SendEmailDM
+from mail.src.domain.entities import EmailDM
+from mail.src.domain.exceptions import PermanentDeliveryError
+from mail.src.infrastructure.metrics import SendMetrics
+from mail.src.infrastructure.smtp import SmtpConnectionPool
+
+
+# Delay queues register_confirmation_retry_1..N declared in definitions.json
+RETRY_TIERS = 4
 
 
 class SendEmailGateway(EmailSender):
     def __init__(
         self, 
         config: EmailConfig,
+        pool: SmtpConnectionPool,
         logger: Logger
     ) -> None:
         self._config = config
+        self._pool = pool
         self._logger = logger
 
-    async def send_html_email(self, params: SendEmailDM) -> None:
-        message = MIMEMultipart("alternative")
-        message["Subject"] = params.subject
-        message["From"] = self._config.sender_email
-        message["To"] = params.recipient
-        message.attach(MIMEText(params.body_html, "html"))
+    async def send_email(self, params: EmailDM) -> None:
         try:
-            await aiosmtplib.send(
-                message,
-                hostname=self._config.smtp_host,
-                port=self._config.smtp_port
+            await self._pool.send(
+                sender=self._config.sender_email,
+                recipient=params.recipient,
+                message=params.message
             )
             self._logger.info(f"Email successfully sent to {params.recipient}")
+        except aiosmtplib.SMTPRecipientsRefused as e:
+            self._logger.error(f"Recipient {params.recipient} refused: {e}")
+            raise PermanentDeliveryError(str(e)) from e
+        except aiosmtplib.SMTPResponseException as e:
+            self._logger.error(f"Failed to send email to {params.recipient}: {e}")
+            if e.code >= 500:
+                raise PermanentDeliveryError(str(e)) from e
+            raise
         except Exception as e:
-            self._logger.error(f"Failed to send email to {params.recipient}: {e}")
\ No newline at end of file
+            self._logger.error(f"Failed to send email to {params.recipient}: {e}")
+            raise
+
+
+class RetryGateway(RetryEmail):
+    def __init__(
+        self,
+        broker: RabbitBroker,
+        metrics: SendMetrics,
+        logger: Logger
+    ) -> None:
+        self._broker = broker
+        self._metrics = metrics
+        self._logger = logger
+
+    async def schedule_retry(self, params: SendEmailDTO, delay_tier: int) -> None:
+        # Attempts past the last declared queue reuse its delay; an unbound
+        # routing key would drop the message.
+        delay_tier = min(delay_tier, RETRY_TIERS)
+        await self._broker.publish(
+            self._to_body(params),
+            exchange="send_retry_exchange",
+            routing_key=f"register_confirmation_retry_{delay_tier}",
+            persist=True
+        )
+        self._metrics.retried_total += 1
+
+    async def bury(self, params: SendEmailDTO, reason: str) -> None:
+        body = self._to_body(params)
+        body["error"] = reason
+        await self._broker.publish(
+            body,
+            exchange="send_retry_exchange",
+            routing_key="register_confirmation_dead",
+            persist=True
+        )
+        self._metrics.dead_total += 1
+        self._logger.error(f"Giving up on email to {params.email}: {reason}")
+
+    def _to_body(self, params: SendEmailDTO) -> dict:
+        return {
+            "message_uuid": params.message_uuid,
+            "email": params.email,
+            "locale": params.locale,
+            "attempt": params.attempt
+        }
@@ -0,0 +1,25 @@
+class SendMetrics:
+    def __init__(self) -> None:
+        self.batches_total = 0
+        self.batched_messages_total = 0
+        self.sent_total = 0
+        self.failed_total = 0
+        self.retried_total = 0
+        self.dead_total = 0
+
+    def record_batch(self, outcomes: list) -> None:
+        failed = sum(1 for outcome in outcomes if outcome is not None)
+        self.batches_total += 1
+        self.batched_messages_total += len(outcomes)
+        self.sent_total += len(outcomes) - failed
+        self.failed_total += failed
+
+    def snapshot(self) -> dict:
+        return {
+            "batches_total": self.batches_total,
+            "batched_messages_total": self.batched_messages_total,
+            "sent_total": self.sent_total,
+            "failed_total": self.failed_total,
+            "retried_total": self.retried_total,
+            "dead_total": self.dead_total,
+        }
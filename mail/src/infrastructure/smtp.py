@@ -0,0 +1,126 @@
+import asyncio
+from collections import deque
+from contextlib import suppress
+from logging import Logger
+from time import monotonic
+from typing import Deque, Optional
+
+import aiosmtplib
+
+from mail.src.config import EmailConfig
+
+
+class _Connection:
+    __slots__ = ("client", "sent", "last_used")
+
+    def __init__(self, client: aiosmtplib.SMTP) -> None:
+        self.client = client
+        self.sent = 0
+        self.last_used = monotonic()
+
+
+class SmtpConnectionPool:
+    """
+    Keeps up to `pool_size` SMTP sessions open to the relay and reuses them
+    across messages. A session is closed after `max_messages_per_connection`
+    messages, idle sessions are kept alive with NOOP, and a send on a
+    session the relay has dropped is retried once on a fresh one.
+    """
+
+    def __init__(self, config: EmailConfig, logger: Logger) -> None:
+        self._config = config
+        self._logger = logger
+        self._idle: Deque[_Connection] = deque()
+        self._slots = asyncio.Semaphore(config.pool_size)
+        self._keepalive_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def send(self, sender: str, recipient: str, message: bytes) -> None:
+        if self._closed:
+            raise RuntimeError("SMTP connection pool is closed")
+        if self._keepalive_task is None:
+            self._keepalive_task = asyncio.create_task(self._keepalive())
+        async with self._slots:
+            connection = await self._checkout()
+            try:
+                await connection.client.sendmail(sender, [recipient], message)
+            except aiosmtplib.SMTPServerDisconnected:
+                await self._discard(connection)
+                connection = await self._connect()
+                await self._send_or_discard(connection, sender, recipient, message)
+            except Exception:
+                await self._discard(connection)
+                raise
+            await self._checkin(connection)
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._keepalive_task
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    async def _send_or_discard(
+        self,
+        connection: _Connection,
+        sender: str,
+        recipient: str,
+        message: bytes,
+    ) -> None:
+        try:
+            await connection.client.sendmail(sender, [recipient], message)
+        except Exception:
+            await self._discard(connection)
+            raise
+
+    async def _checkout(self) -> _Connection:
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.client.is_connected:
+                return connection
+            await self._discard(connection)
+        return await self._connect()
+
+    async def _checkin(self, connection: _Connection) -> None:
+        connection.sent += 1
+        connection.last_used = monotonic()
+        if self._closed or connection.sent >= self._config.max_messages_per_connection:
+            await self._discard(connection)
+        else:
+            self._idle.append(connection)
+
+    async def _connect(self) -> _Connection:
+        client = aiosmtplib.SMTP(
+            hostname=self._config.smtp_host,
+            port=self._config.smtp_port,
+            timeout=self._config.timeout,
+        )
+        await client.connect()
+        return _Connection(client)
+
+    async def _discard(self, connection: _Connection) -> None:
+        if not connection.client.is_connected:
+            return
+        try:
+            await connection.client.quit()
+        except aiosmtplib.SMTPException:
+            connection.client.close()
+
+    async def _keepalive(self) -> None:
+        interval = self._config.keepalive_interval
+        while True:
+            await asyncio.sleep(interval)
+            stale = [c for c in self._idle if monotonic() - c.last_used >= interval]
+            for connection in stale:
+                self._idle.remove(connection)
+            for connection in stale:
+                try:
+                    await connection.client.noop()
+                except aiosmtplib.SMTPException as e:
+                    self._logger.info(f"Dropping SMTP connection after failed NOOP: {e}")
+                    await self._discard(connection)
+                    continue
+                connection.last_used = monotonic()
+                self._idle.append(connection)
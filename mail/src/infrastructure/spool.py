@@ -0,0 +1,277 @@
+import asyncio
+import os
+import struct
+import zlib
+from collections import defaultdict, deque
+from contextlib import suppress
+from dataclasses import dataclass
+from logging import Logger
+from pathlib import Path
+from typing import BinaryIO, Deque, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+
+ENQUEUE = 1
+DONE = 2
+RECORD_HEADER = struct.Struct(">IIB16s")
+
+
+@dataclass(slots=True)
+class SpoolEntry:
+    entry_id: bytes
+    length: int
+    segment: Optional[int] = None
+    offset: int = 0
+    payload: bytes = b""
+
+
+def _record(kind: int, entry_id: bytes, payload: bytes = b"") -> bytes:
+    crc = zlib.crc32(bytes((kind,)) + entry_id + payload)
+    return RECORD_HEADER.pack(len(payload), crc, kind, entry_id) + payload
+
+
+class MailSpool:
+    """
+    Append-only, segmented on-disk queue.
+
+    `append` returns once its record is fsynced; records that arrive within
+    `fsync_interval` of each other share one write and one fsync. `complete`
+    appends a DONE marker without waiting for the disk. On open, segments
+    are replayed to rebuild the pending entries and a torn tail is cut off.
+    DONE markers may refer to entries of older segments, so segments are
+    only deleted from the oldest end, once every entry in them is done. When
+    the oldest sealed segment is mostly done, its live entries are copied
+    forward so it can be dropped.
+
+    Payloads stay on disk: a pending entry only keeps where its record is,
+    and the payload is read back when `get` hands the entry to a worker and
+    released again by `complete` or `requeue`, so memory follows the number
+    of workers rather than the backlog.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_size: int,
+        fsync_interval: float,
+        compact_ratio: float,
+        logger: Logger,
+    ) -> None:
+        self._directory = Path(directory)
+        self._segment_size = segment_size
+        self._fsync_interval = fsync_interval
+        self._compact_ratio = compact_ratio
+        self._logger = logger
+        self._pending: Dict[bytes, SpoolEntry] = {}
+        self._queue: "asyncio.Queue[SpoolEntry]" = asyncio.Queue()
+        self._live: Dict[int, int] = defaultdict(int)
+        self._total: Dict[int, int] = defaultdict(int)
+        self._segments: Deque[int] = deque()
+        self._compacting: Optional[int] = None
+        self._delete_later: Set[int] = set()
+        # A record of None copies the entry's current record forward.
+        self._buffer: List[Tuple[Optional[bytes], Optional[SpoolEntry], Optional[asyncio.Future]]] = []
+        self._dirty = asyncio.Event()
+        self._file: Optional[BinaryIO] = None
+        self._active = 0
+        self._active_size = 0
+        self._flusher: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def open(self) -> None:
+        await asyncio.to_thread(self._recover)
+        for entry in self._pending.values():
+            self._queue.put_nowait(entry)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        self._logger.info(f"Mail spool opened with {len(self._pending)} pending entries")
+
+    async def close(self) -> None:
+        self._closed = True
+        self._dirty.set()
+        if self._flusher is not None:
+            await self._flusher
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+
+    async def append(self, payload: bytes) -> bytes:
+        if self._closed:
+            raise RuntimeError("Mail spool is closed")
+        entry = SpoolEntry(entry_id=uuid4().bytes, length=len(payload))
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((_record(ENQUEUE, entry.entry_id, payload), entry, future))
+        self._dirty.set()
+        await future
+        self._pending[entry.entry_id] = entry
+        self._queue.put_nowait(entry)
+        return entry.entry_id
+
+    async def get(self) -> SpoolEntry:
+        entry = await self._queue.get()
+        while True:
+            segment, offset = entry.segment, entry.offset
+            try:
+                entry.payload = await asyncio.to_thread(self._read, segment, offset, entry.length)
+                return entry
+            except FileNotFoundError:
+                # Copied forward and its old segment dropped while being read
+                if (entry.segment, entry.offset) == (segment, offset):
+                    raise
+
+    def requeue(self, entry: SpoolEntry) -> None:
+        entry.payload = b""
+        if entry.entry_id in self._pending:
+            self._queue.put_nowait(entry)
+
+    def complete(self, entry: SpoolEntry) -> None:
+        entry.payload = b""
+        if self._pending.pop(entry.entry_id, None) is None:
+            return
+        self._buffer.append((_record(DONE, entry.entry_id), None, None))
+        self._dirty.set()
+        if entry.segment is not None:
+            self._release(entry.segment)
+
+    def _release(self, segment: int) -> None:
+        self._live[segment] -= 1
+        self._collect()
+
+    def _collect(self) -> None:
+        while len(self._segments) > 1 and self._live[self._segments[0]] <= 0:
+            segment = self._segments.popleft()
+            self._delete_later.add(segment)
+            self._live.pop(segment, None)
+            self._total.pop(segment, None)
+            self._dirty.set()
+        if len(self._segments) < 2:
+            return
+        oldest = self._segments[0]
+        if oldest != self._compacting and self._live[oldest] < self._total[oldest] * self._compact_ratio:
+            self._compacting = oldest
+            for entry in self._pending.values():
+                if entry.segment == oldest:
+                    self._buffer.append((None, entry, None))
+            self._dirty.set()
+
+    async def _flush_loop(self) -> None:
+        while not (self._closed and not self._buffer):
+            await self._dirty.wait()
+            if not self._closed:
+                await asyncio.sleep(self._fsync_interval)
+            self._dirty.clear()
+            batch, self._buffer = self._buffer, []
+            to_delete, self._delete_later = self._delete_later, set()
+            try:
+                segment, offsets = await asyncio.to_thread(self._write, [(record, entry) for record, entry, _ in batch])
+                await asyncio.to_thread(self._unlink, to_delete)
+            except Exception as e:
+                self._logger.error(f"Mail spool write failed: {e}")
+                for _, _, future in batch:
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+                continue
+            if not self._segments or self._segments[-1] != segment:
+                self._segments.append(segment)
+            for (_, entry, future), offset in zip(batch, offsets):
+                if entry is not None:
+                    self._assign(entry, segment, offset)
+                if future is not None and not future.done():
+                    future.set_result(None)
+            self._collect()
+
+    def _assign(self, entry: SpoolEntry, segment: int, offset: int) -> None:
+        if entry.segment is not None and entry.entry_id not in self._pending:
+            return
+        previous = entry.segment
+        entry.segment = segment
+        entry.offset = offset
+        self._live[segment] += 1
+        self._total[segment] += 1
+        if previous is not None and previous != segment:
+            self._live[previous] -= 1
+
+    def _segment_path(self, segment: int) -> Path:
+        return self._directory / f"segment-{segment:08d}.log"
+
+    def _read(self, segment: int, offset: int, length: int) -> bytes:
+        with open(self._segment_path(segment), "rb") as file:
+            file.seek(offset)
+            return file.read(length)
+
+    def _write(self, items: List[Tuple[Optional[bytes], Optional[SpoolEntry]]]) -> Tuple[int, List[int]]:
+        if self._file is None or self._active_size >= self._segment_size:
+            self._roll()
+        records, offsets = [], []
+        position = self._active_size
+        for record, entry in items:
+            if record is None:
+                payload = self._read(entry.segment, entry.offset, entry.length)
+                record = _record(ENQUEUE, entry.entry_id, payload)
+            records.append(record)
+            offsets.append(position + RECORD_HEADER.size)
+            position += len(record)
+        data = b"".join(records)
+        if data:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._active_size += len(data)
+        return self._active, offsets
+
+    def _roll(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._active += 1
+        self._file = open(self._segment_path(self._active), "ab")
+        self._active_size = 0
+        directory_fd = os.open(self._directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+    def _unlink(self, segments: Set[int]) -> None:
+        for segment in segments:
+            with suppress(FileNotFoundError):
+                self._segment_path(segment).unlink()
+
+    def _recover(self) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        paths = sorted(self._directory.glob("segment-*.log"))
+        for path in paths:
+            segment = int(path.stem.removeprefix("segment-"))
+            self._active = max(self._active, segment)
+            self._replay(path, segment, is_last=path == paths[-1])
+        for entry in self._pending.values():
+            self._live[entry.segment] += 1
+        for path in paths:
+            self._segments.append(int(path.stem.removeprefix("segment-")))
+        while len(self._segments) > 1 and self._live[self._segments[0]] == 0:
+            self._segment_path(self._segments.popleft()).unlink()
+        if paths:
+            self._file = open(paths[-1], "ab")
+            self._active_size = paths[-1].stat().st_size
+
+    def _replay(self, path: Path, segment: int, is_last: bool) -> None:
+        data = path.read_bytes()
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            length, crc, kind, entry_id = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(bytes((kind,)) + entry_id + payload) != crc:
+                break
+            if kind == ENQUEUE:
+                self._pending[entry_id] = SpoolEntry(entry_id, length, segment, start)
+                self._total[segment] += 1
+            elif kind == DONE:
+                self._pending.pop(entry_id, None)
+            offset = start + length
+        if offset < len(data):
+            self._logger.warning(f"Mail spool segment {path.name} is torn at byte {offset}")
+            if is_last:
+                with open(path, "r+b") as file:
+                    file.truncate(offset)
@@ -1,26 +1,118 @@
+import html
+import quopri
+import re
+from email.header import Header
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple, Union
+
 from mail.src.application.interfaces import GetTemplates
-from mail.src.config import AppConfig
+from mail.src.config import AppConfig, EmailConfig
+from mail.src.domain.entities import EmailDM, RenderEmailDM
+
+
+FIELD_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+SOFT_BREAK = b"=\r\n"
+
+
+def _quoted_printable(text: str) -> bytes:
+    return quopri.encodestring(text.encode()).replace(b"\n", b"\r\n")
+
+
+def _compile(text: str) -> List[Union[bytes, str]]:
+    """
+    Splits a template into quoted-printable encoded static segments and the
+    names of the fields between them. Segments are joined with soft line
+    breaks, so static parts are encoded once and never touched again.
+    """
+    segments: List[Union[bytes, str]] = []
+    position = 0
+    for match in FIELD_PATTERN.finditer(text):
+        segments.append(_quoted_printable(text[position:match.start()]))
+        segments.append(match.group(1))
+        position = match.end()
+    segments.append(_quoted_printable(text[position:]))
+    return segments
+
+
+def _encode_header(value: str) -> bytes:
+    return Header(value, "utf-8").encode().replace("\n", "\r\n").encode()
+
+
+class CompiledTemplate:
+    def __init__(self, subject: str, body: str, sender: str) -> None:
+        self._subject = subject
+        self._body = _compile(body)
+        self._static_subject = FIELD_PATTERN.search(subject) is None
+        self._headers = b"".join((
+            b"From: ", sender.encode(), b"\r\n",
+            b"MIME-Version: 1.0\r\n",
+            b'Content-Type: text/html; charset="utf-8"\r\n',
+            b"Content-Transfer-Encoding: quoted-printable\r\n",
+        ))
+        if self._static_subject:
+            self._headers += b"Subject: " + _encode_header(subject) + b"\r\n"
+
+    def render(self, recipient: str, context: Mapping[str, str]) -> bytes:
+        if "\r" in recipient or "\n" in recipient:
+            raise ValueError("Recipient must not contain line breaks")
+        parts = [self._headers, b"To: ", recipient.encode(), b"\r\n"]
+        if not self._static_subject:
+            subject = FIELD_PATTERN.sub(lambda m: str(context[m.group(1)]), self._subject)
+            parts += [b"Subject: ", _encode_header(subject), b"\r\n"]
+        parts.append(b"\r\n")
+        parts.append(SOFT_BREAK.join(
+            segment if isinstance(segment, bytes)
+            else _quoted_printable(html.escape(str(context[segment])))
+            for segment in self._body
+        ))
+        return b"".join(parts)
+
+
+class TemplateRegistry:
+    """
+    Loads every `<locale>/<name>.html` under `directory` once. A template
+    file starts with a `Subject:` line and a blank line, then the HTML body
+    with `{{ field }}` placeholders.
+    """
+
+    def __init__(self, directory: Path, sender: str, default_locale: str) -> None:
+        self._default_locale = default_locale
+        self._templates: Dict[Tuple[str, str], CompiledTemplate] = {}
+        for path in sorted(Path(directory).glob("*/*.html")):
+            header, _, body = path.read_text(encoding="utf-8").partition("\n\n")
+            subject = header.removeprefix("Subject:").strip()
+            self._templates[(path.stem, path.parent.name)] = CompiledTemplate(
+                subject=subject,
+                body=body,
+                sender=sender,
+            )
+
+    def get(self, name: str, locale: str) -> CompiledTemplate:
+        template = self._templates.get((name, locale))
+        if template is None:
+            template = self._templates.get((name, self._default_locale))
+        if template is None:
+            raise LookupError(f"Template {name} is not registered")
+        return template
+
 
 class TemplatesGateway(GetTemplates):
-    def __init__(self, config: AppConfig):
+    def __init__(self, registry: TemplateRegistry, config: AppConfig):
+        self._registry = registry
         self._config = config
 
-    def registration_template(self, uuid: str) -> str:
-        return  """
-        <html>
-            <body>
-                <h1>Добро пожаловать!</h1>
-                <p>Спасибо за регистрацию в нашем сервисе. Для подтверждения аккаунта, \
-                    пожалуйста, перейдите по ссылке ниже:</p>
-                <a href="{path}/{uuid}">Подтвердить аккаунт</a>
-                <p>Если ссылка не работает, скопируйте и вставьте её в браузер:</p>
-                <p>{path}{uuid}</p>
-                <br>
-                <p>С наилучшими пожеланиями,</p>
-                <p>Команда поддержки</p>
-            </body>
-        </html>
-        """.format(
-            path=self._config.confirm_path,
-            uuid=uuid
-        )
\ No newline at end of file
+    def render_email(self, params: RenderEmailDM) -> EmailDM:
+        template = self._registry.get(params.template, params.locale)
+        context = {"path": self._config.confirm_path, **params.context}
+        return EmailDM(
+            recipient=params.recipient,
+            message=template.render(params.recipient, context)
+        )
+
+
+def new_template_registry(app_config: AppConfig, email_config: EmailConfig) -> TemplateRegistry:
+    return TemplateRegistry(
+        directory=app_config.templates_dir,
+        sender=email_config.sender_email,
+        default_locale=app_config.default_locale,
+    )
@@ -1,12 +1,25 @@
 from logging import Logger
+from typing import AsyncIterable, List, Optional
 
-from dishka import Provider, Scope, provide, from_context
+from dishka import AsyncContainer, Provider, Scope, provide, from_context
+from faststream.rabbit import RabbitBroker
 
+from common.src.infrastructure.batcher import Batcher
+from common.src.infrastructure.consumers import ConsumerLimiter, ConsumerRegistry
 from mail.src.application import interfaces
-from mail.src.application.interactors import SendSignupMailInteractor
-from mail.src.config import Config
-from mail.src.infrastructure.gateways import SendEmailGateway
-from mail.src.infrastructure.templates import TemplatesGateway
+from mail.src.application.dto import SendEmailDTO
+from mail.src.application.interactors import RetrySignupMailInteractor, SendSignupMailInteractor
+from mail.src.config import AppConfig, Config, EmailConfig, RetryConfig
+from mail.src.infrastructure.delivery import Delivery, DirectDelivery, SpooledDelivery
+from mail.src.infrastructure.gateways import RetryGateway, SendEmailGateway
+from mail.src.infrastructure.metrics import SendMetrics
+from mail.src.infrastructure.smtp import SmtpConnectionPool
+from mail.src.infrastructure.spool import MailSpool
+from mail.src.infrastructure.templates import (
+    TemplateRegistry,
+    TemplatesGateway,
+    new_template_registry
+)
 
 
 class AppProvider(Provider):
@@ -14,6 +27,106 @@ class AppProvider(Provider):
 
     logger = from_context(provides=Logger, scope=Scope.APP)
 
+    broker = from_context(provides=RabbitBroker, scope=Scope.APP)
+
+    @provide(scope=Scope.APP)
+    def get_app_config(self, config: Config) -> AppConfig:
+        return config.app
+
+    @provide(scope=Scope.APP)
+    def get_email_config(self, config: Config) -> EmailConfig:
+        return config.email
+
+    @provide(scope=Scope.APP)
+    def get_retry_config(self, config: Config) -> RetryConfig:
+        return config.retry
+
+    @provide(scope=Scope.APP)
+    def get_send_metrics(self) -> SendMetrics:
+        return SendMetrics()
+
+    @provide(scope=Scope.APP)
+    async def get_send_batcher(
+        self,
+        config: Config,
+        metrics: SendMetrics,
+        container: AsyncContainer,
+    ) -> AsyncIterable[Batcher]:
+        async def send_batch(batch: List[SendEmailDTO]) -> List[Optional[Exception]]:
+            async with container() as request_container:
+                interactor = await request_container.get(SendSignupMailInteractor)
+                outcomes = await interactor(batch)
+            metrics.record_batch(outcomes)
+            return outcomes
+
+        batcher = Batcher(
+            flush=send_batch,
+            max_size=config.consumer.max_batch_size,
+            max_wait=config.consumer.max_batch_wait,
+            max_flushes=config.consumer.max_flushes,
+        )
+        yield batcher
+        await batcher.close()
+
+    @provide(scope=Scope.APP)
+    async def get_smtp_pool(
+        self,
+        config: EmailConfig,
+        logger: Logger
+    ) -> AsyncIterable[SmtpConnectionPool]:
+        pool = SmtpConnectionPool(config, logger)
+        yield pool
+        await pool.close()
+
+    @provide(scope=Scope.APP)
+    async def get_delivery(
+        self,
+        config: Config,
+        batcher: Batcher,
+        logger: Logger,
+        container: AsyncContainer,
+    ) -> AsyncIterable[Delivery]:
+        direct = DirectDelivery(batcher, container)
+        if not config.spool.enabled:
+            yield direct
+            return
+        spool = MailSpool(
+            directory=config.spool.directory,
+            segment_size=config.spool.segment_size,
+            fsync_interval=config.spool.fsync_interval,
+            compact_ratio=config.spool.compact_ratio,
+            logger=logger,
+        )
+        delivery = SpooledDelivery(
+            spool=spool,
+            direct=direct,
+            workers=config.spool.workers,
+            retry_delay=config.spool.retry_delay,
+            logger=logger,
+        )
+        await delivery.start()
+        yield delivery
+        await delivery.stop()
+
+    @provide(scope=Scope.APP)
+    def get_template_registry(
+        self,
+        app_config: AppConfig,
+        email_config: EmailConfig
+    ) -> TemplateRegistry:
+        return new_template_registry(app_config, email_config)
+
+    @provide(scope=Scope.APP)
+    def get_consumer_registry(self, config: Config) -> ConsumerRegistry:
+        return ConsumerRegistry({
+            "send_register_confirmation": ConsumerLimiter(
+                queue="send_register_confirmation",
+                prefetch=config.consumer.prefetch,
+                max_concurrency=config.consumer.max_concurrency,
+                throttle_threshold=config.consumer.throttle_threshold,
+            ),
+        })
+
     send_email_gateway = provide(
         SendEmailGateway,
         scope=Scope.REQUEST,
@@ -26,4 +139,11 @@ class AppProvider(Provider):
         provides=interfaces.GetTemplates
     )
 
-    send_signup_email_interactor = provide(SendSignupMailInteractor, scope=Scope.REQUEST)
\ No newline at end of file
+    retry_gateway = provide(
+        RetryGateway,
+        scope=Scope.REQUEST,
+        provides=interfaces.RetryEmail
+    )
+
+    send_signup_email_interactor = provide(SendSignupMailInteractor, scope=Scope.REQUEST)
+    retry_signup_email_interactor = provide(RetrySignupMailInteractor, scope=Scope.REQUEST)
\ No newline at end of file
@@ -5,32 +5,59 @@ from logging import Logger
 from aiosmtpd.controller import Controller
 from dishka import make_async_container
 from dishka.integrations import faststream as faststream_integration
-from faststream import FastStream
+from faststream.asgi import AsgiFastStream
+from faststream.rabbit import RabbitBroker
 
+from common.src.infrastructure.admin import ConsumersAdmin
 from mail.src.config import Config
-from mail.src.controllers.controllers import EmailController, EmailHandler
+from mail.src.controllers.controllers import EmailController
+from mail.src.infrastructure.admin import MetricsExporter
 from mail.src.infrastructure.broker import new_broker
+from mail.src.infrastructure.capture import CaptureHandler
+from mail.src.infrastructure.delivery import Delivery
 from mail.src.ioc import AppProvider
 
 
 config = Config()
 logging.basicConfig(level=config.app.log_level)
 logger = logging.getLogger("SMTPServer")
-container = make_async_container(AppProvider(), context={Config: config, Logger: logger})
+broker = new_broker(config.rabbitmq, prefetch=config.consumer.prefetch)
+container = make_async_container(
+    AppProvider(),
+    context={Config: config, Logger: logger, RabbitBroker: broker}
+)
 
 
-def get_faststream_app() -> FastStream:
-    broker = new_broker(config.rabbitmq)
-    app = FastStream(broker)
+async def start_delivery() -> None:
+    # Opens the spool, when enabled, so entries left from a previous run are
+    # resent without waiting for new messages.
+    await container.get(Delivery)
+
+
+def get_faststream_app() -> AsgiFastStream:
+    app = AsgiFastStream(
+        broker,
+        asgi_routes=[
+            ("/admin/consumers", ConsumersAdmin(container, broker)),
+            ("/metrics", MetricsExporter(container, broker)),
+        ],
+    )
+    app.after_startup(start_delivery)
+    app.on_shutdown(container.close)
     faststream_integration.setup_dishka(container, app, auto_inject=True)
     broker.include_router(EmailController)
     return app
 
+app = get_faststream_app()
 
 
 async def start_smtp_server(config: Config) -> None:
+    handler = CaptureHandler(
+        mailbox_dir=config.app.capture_dir,
+        keep=config.app.capture_keep
+    )
     controller = Controller(
-        handler=EmailHandler(), 
+        handler=handler, 
         hostname=config.email.smtp_host, 
         port=config.email.smtp_port
     )
@@ -40,7 +67,7 @@ async def start_smtp_server(config: Config) -> None:
         await asyncio.Future()
     except asyncio.CancelledError:
         controller.stop()
-        logger.info("SMTP server stopped.")
+        logger.info(f"SMTP server stopped. Captured: {handler.snapshot()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+import asyncio
+import logging
+
+from mail.src.application.dto import SendEmailDTO
+from mail.src.infrastructure.gateways import RETRY_TIERS, RetryGateway
+from mail.src.infrastructure.metrics import SendMetrics
+
+
+class _Broker:
+    def __init__(self) -> None:
+        self.routing_keys = []
+
+    async def publish(self, message, exchange: str, routing_key: str, persist: bool) -> None:
+        self.routing_keys.append(routing_key)
+
+
+def test_retries_past_the_last_delay_queue_reuse_it():
+    broker = _Broker()
+    gateway = RetryGateway(broker, SendMetrics(), logging.getLogger("test-retry"))
+    params = SendEmailDTO(message_uuid="m1", email="user@example.com")
+
+    async def scenario():
+        for tier in range(1, RETRY_TIERS + 3):
+            await gateway.schedule_retry(params, delay_tier=tier)
+
+    asyncio.run(scenario())
+    assert broker.routing_keys == [
+        f"register_confirmation_retry_{min(tier, RETRY_TIERS)}" for tier in range(1, RETRY_TIERS + 3)
+    ]